@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import PDF
+from .models import PDF, PDFText
 
 
 @admin.register(PDF)
@@ -28,4 +28,12 @@ class PDFAdmin(admin.ModelAdmin):
         ('Timestamps', {
             'fields': ('created_at', 'updated_at')
         }),
-    )
\ No newline at end of file
+    )
+
+
+@admin.register(PDFText)
+class PDFTextAdmin(admin.ModelAdmin):
+    list_display = ('file', 'status', 'page_count', 'created_at', 'updated_at')
+    list_filter = ('status',)
+    search_fields = ('file',)
+    readonly_fields = ('file', 'page_count', 'error', 'created_at', 'updated_at')
@@ -0,0 +1,18 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from PDFs.storage import collect_unreferenced_blobs
+
+
+class Command(BaseCommand):
+    help = "Delete stored PDF files that no PDF points at any more."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--grace", type=int, default=settings.PDF_BLOB_GC_GRACE_SECONDS,
+            help="Keep files saved within this many seconds (default PDF_BLOB_GC_GRACE_SECONDS).",
+        )
+
+    def handle(self, *args, **options):
+        deleted = collect_unreferenced_blobs(grace=options["grace"])
+        self.stdout.write(self.style.SUCCESS(f"Deleted {len(deleted)} unreferenced file(s)."))
@@ -0,0 +1,56 @@
+import os
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from PDFs.models import PDFUploadSession
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete resumable PDF uploads that were not resumed in time, with their partial "
+        "files, and leftover partial or chunk files without a session."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--hours", type=float, default=settings.PDF_UPLOAD_SESSION_TTL_HOURS,
+            help="Age of the last chunk after which an upload expires "
+                 "(default PDF_UPLOAD_SESSION_TTL_HOURS).",
+        )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(hours=options["hours"])
+        stale = PDFUploadSession.objects.filter(updated_at__lt=cutoff)
+        expired = 0
+        for pk in stale.values_list("pk", flat=True).iterator():
+            with transaction.atomic():
+                # skip sessions a chunk or finalize request holds; re-check the age under the lock
+                session = stale.filter(pk=pk).select_for_update(skip_locked=True).first()
+                if session is not None:
+                    session.discard()
+                    expired += 1
+
+        orphans = 0
+        live = {
+            f"{pk}.part" for pk in PDFUploadSession.objects.values_list("pk", flat=True)
+        }
+        oldest = time.time() - options["hours"] * 3600
+        with os.scandir(settings.TEMP_UPLOAD_DIR) as entries:
+            for entry in entries:
+                if (
+                    entry.is_file() and entry.name.endswith((".part", ".chunk"))
+                    and entry.name not in live and entry.stat().st_mtime < oldest
+                ):
+                    try:
+                        os.remove(entry.path)
+                    except FileNotFoundError:
+                        continue
+                    orphans += 1
+        self.stdout.write(self.style.SUCCESS(
+            f"Expired {expired} upload(s), removed {orphans} orphaned partial file(s)."
+        ))
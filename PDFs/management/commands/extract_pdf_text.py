@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand
+
+from PDFs.models import PDF
+from PDFs.search import rebuild_index
+from PDFs.services import extract_file_text, pending_files
+
+
+class Command(BaseCommand):
+    help = "Extract and index the text of stored PDFs that have not been extracted yet."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--all", action="store_true", help="Re-extract every stored file."
+        )
+        parser.add_argument(
+            "--rebuild-index", action="store_true",
+            help="Only rebuild the search index from the text already extracted.",
+        )
+
+    def handle(self, *args, **options):
+        if options["rebuild_index"]:
+            rebuild_index()
+            self.stdout.write(self.style.SUCCESS("PDF text index rebuilt."))
+            return
+
+        if options["all"]:
+            files = (
+                PDF.objects.exclude(file="").exclude(file__isnull=True)
+                .values_list("file", flat=True).distinct()
+            )
+        else:
+            files = pending_files()
+        done = failed = 0
+        for file_name in files.iterator():
+            document = extract_file_text(file_name, force=options["all"])
+            if document.status == document.STATUS_DONE:
+                done += 1
+            else:
+                failed += 1
+                self.stderr.write(f"{file_name}: {document.error}")
+        self.stdout.write(self.style.SUCCESS(f"Extracted {done} file(s), {failed} failed."))
@@ -0,0 +1,24 @@
+# Generated by Django 4.2.30 on 2026-10-18 03:14
+
+import PDFs.storage
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('PDFs', '0003_pdf_pdfs_pdf_uploade_666dfa_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='pdf',
+            name='file',
+            field=models.FileField(blank=True, null=True, storage=PDFs.storage.ContentAddressedStorage(), upload_to='pdfs/blobs/', validators=[django.core.validators.FileExtensionValidator(allowed_extensions=['pdf'])]),
+        ),
+        migrations.AddIndex(
+            model_name='pdf',
+            index=models.Index(fields=['file'], name='PDFs_pdf_file_5d522c_idx'),
+        ),
+    ]
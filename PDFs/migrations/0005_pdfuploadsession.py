@@ -0,0 +1,38 @@
+# Generated by Django 4.2.30 on 2026-10-18 03:16
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notebook', '0002_note_notebook_no_owner_i_959e24_idx_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('PDFs', '0004_pdf_content_addressed_storage'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PDFUploadSession',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('file_name', models.CharField(max_length=255)),
+                ('title', models.CharField(blank=True, max_length=255, null=True)),
+                ('description', models.TextField(blank=True, null=True)),
+                ('is_public', models.BooleanField(default=False)),
+                ('total_size', models.BigIntegerField()),
+                ('offset', models.BigIntegerField(default=0)),
+                ('checksum', models.BigIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('linked_note', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='notebook.note')),
+                ('owner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pdf_upload_sessions', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['owner', 'created_at'], name='PDFs_pdfupl_owner_i_ba4965_idx'), models.Index(fields=['updated_at'], name='PDFs_pdfupl_updated_4eb745_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 4.2.30 on 2026-10-18 03:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('PDFs', '0005_pdfuploadsession'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pdf',
+            name='source_hash',
+            field=models.CharField(blank=True, editable=False, max_length=64, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='pdf',
+            index=models.Index(fields=['linked_note', 'source_hash'], name='PDFs_pdf_linked__4f49c4_idx'),
+        ),
+    ]
@@ -0,0 +1,77 @@
+# Generated by Django 4.2.30 on 2026-10-18 03:35
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+# The index as of this migration; PDFs.search keeps it current afterwards.
+CREATE_SQL = {
+    "sqlite": [
+        "CREATE VIRTUAL TABLE IF NOT EXISTS pdfs_textpage_search USING fts5("
+        "text, content='PDFs_pdftextpage', content_rowid='id', "
+        "tokenize='unicode61 remove_diacritics 2')",
+    ],
+    "postgresql": [
+        "CREATE TABLE IF NOT EXISTS pdfs_textpage_search ("
+        "page_id bigint PRIMARY KEY REFERENCES \"PDFs_pdftextpage\" (id) "
+        "ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED, "
+        "document tsvector NOT NULL)",
+        "CREATE INDEX IF NOT EXISTS pdfs_textpage_search_document_gin "
+        "ON pdfs_textpage_search USING GIN (document)",
+    ],
+}
+DROP_SQL = {
+    "sqlite": ["DROP TABLE IF EXISTS pdfs_textpage_search"],
+    "postgresql": ["DROP TABLE IF EXISTS pdfs_textpage_search"],
+}
+
+
+def create_search_index(apps, schema_editor):
+    with schema_editor.connection.cursor() as cursor:
+        for statement in CREATE_SQL.get(schema_editor.connection.vendor, []):
+            cursor.execute(statement)
+
+
+def drop_search_index(apps, schema_editor):
+    with schema_editor.connection.cursor() as cursor:
+        for statement in DROP_SQL.get(schema_editor.connection.vendor, []):
+            cursor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('PDFs', '0006_pdf_source_hash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PDFText',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file', models.CharField(max_length=255, unique=True)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('done', 'Done'), ('failed', 'Failed')], default='pending', max_length=20)),
+                ('page_count', models.PositiveIntegerField(default=0)),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='PDFTextPage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('page_number', models.PositiveIntegerField()),
+                ('text', models.TextField()),
+                ('document', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pages', to='PDFs.pdftext')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='pdftext',
+            index=models.Index(fields=['status'], name='PDFs_pdftex_status_962231_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='pdftextpage',
+            constraint=models.UniqueConstraint(fields=('document', 'page_number'), name='pdfs_textpage_unique_page'),
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
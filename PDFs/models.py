@@ -1,16 +1,33 @@
+import logging
+import os
 import uuid
-from django.db import models
+from django.conf import settings
+from django.db import models, transaction
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
 from accounts.models import User
-from notebook.models import Note
+from notebook.models import Note, adjust_notebook_summary
 from django.core.validators import FileExtensionValidator
+from .storage import pdf_storage
+
+logger = logging.getLogger(__name__)
+
+
+class PDFQuerySet(models.QuerySet):
+    def visible_to(self, user):
+        """PDFs `user` may read: their own uploads and public ones."""
+        return self.filter(models.Q(uploaded_by=user) | models.Q(is_public=True))
+
 
 class PDF(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     
     # File details
     file_name = models.CharField(max_length=255)
+    # Content-addressed: identical uploads share one stored blob (see PDFs.storage)
     file = models.FileField(
-        upload_to="pdfs/files/",
+        upload_to="pdfs/blobs/",
+        storage=pdf_storage,
         validators=[FileExtensionValidator(allowed_extensions=["pdf"])],
         null=True,
         blank=True,
@@ -26,6 +43,8 @@ class PDF(models.Model):
         null=True,
         blank=True
     )
+    # render_key() of the note content a generated PDF was rendered from
+    source_hash = models.CharField(max_length=64, blank=True, null=True, editable=False)
 
     # Ownership & access
     uploaded_by = models.ForeignKey(
@@ -38,6 +57,8 @@ class PDF(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = PDFQuerySet.as_manager()
+
     class Meta:
         ordering = ["-created_at"]
         verbose_name = "PDF"
@@ -50,10 +71,170 @@ class PDF(models.Model):
             models.Index(fields=['uploaded_by', 'is_public']),
             models.Index(fields=['uploaded_by', 'created_at']),
             models.Index(fields=['is_public', 'created_at']),
+            models.Index(fields=['file']),
+            models.Index(fields=['linked_note', 'source_hash']),
         ]
 
     def __str__(self) -> str:
         return self.file_name
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._remember_stored_state()
+        return instance
+
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        self._remember_stored_state()
+
+    def _remember_stored_state(self):
+        # Notebook.pdf_count follows linked_note; text extraction follows the stored file
+        if 'linked_note_id' in self.__dict__:
+            self._linked_note_id = self.linked_note_id
+        if 'file' in self.__dict__:
+            self._stored_file = self.file.name
+
+    def save(self, *args, **kwargs):
+        old = None if self._state.adding else getattr(self, '_linked_note_id', self.linked_note_id)
+        new = self.linked_note_id
+        old_file = None if self._state.adding else getattr(self, '_stored_file', None)
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
+            if old != new:
+                notebooks = linked_notebooks([old, new], self)
+                adjust_notebook_summary(notebooks.get(old), pdfs=-1)
+                adjust_notebook_summary(notebooks.get(new), pdfs=1)
+            if self.file and self.file.name != old_file and settings.PDF_TEXT_EXTRACTION:
+                queue_text_extraction(self.file.name)
+        self._linked_note_id = new
+        self._stored_file = self.file.name
+
+
+class PDFText(models.Model):
+    """
+    Text extracted from one stored file. Files are content-addressed, so every PDF row
+    pointing at the same file shares one extraction.
+    """
+    STATUS_PENDING = 'pending'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_DONE, 'Done'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    file = models.CharField(max_length=255, unique=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    page_count = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status']),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.file} ({self.status})"
+
+
+class PDFTextPage(models.Model):
+    """
+    Whitespace-normalized text of one page; indexed for full-text search (see PDFs.search).
+    """
+    document = models.ForeignKey(PDFText, on_delete=models.CASCADE, related_name='pages')
+    page_number = models.PositiveIntegerField()
+    text = models.TextField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['document', 'page_number'], name='pdfs_textpage_unique_page'
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.document.file} p.{self.page_number}"
+
+
+class PDFUploadSession(models.Model):
+    """
+    A resumable upload in progress. Chunks are appended to `temp_path` at `offset`;
+    the PDF row is only created when the session is finalized.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name="pdf_upload_sessions")
+
+    # Metadata for the PDF created on finalize
+    file_name = models.CharField(max_length=255)
+    title = models.CharField(max_length=255, blank=True, null=True)
+    description = models.TextField(blank=True, null=True)
+    linked_note = models.ForeignKey(Note, on_delete=models.SET_NULL, null=True, blank=True)
+    is_public = models.BooleanField(default=False)
+
+    # Progress
+    total_size = models.BigIntegerField()
+    offset = models.BigIntegerField(default=0)
+    checksum = models.BigIntegerField(default=0)  # running CRC-32 of bytes[0:offset]
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['owner', 'created_at']),
+            models.Index(fields=['updated_at']),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.file_name} ({self.offset}/{self.total_size})"
+
+    @property
+    def temp_path(self) -> str:
+        return os.path.join(settings.TEMP_UPLOAD_DIR, f"{self.id}.part")
+
+    def discard(self):
+        """Delete the session together with its partial file."""
+        try:
+            os.remove(self.temp_path)
+        except FileNotFoundError:
+            pass
+        self.delete()
+
+
+def linked_notebooks(note_ids, pdf=None):
+    """
+    Map note ids to their notebook ids, using the PDF's cached linked note when possible.
+    """
+    note_ids = {pk for pk in note_ids if pk is not None}
+    cached = pdf._state.fields_cache.get('linked_note') if pdf is not None else None
+    notebooks = {}
+    if cached is not None and cached.pk in note_ids:
+        notebooks[cached.pk] = cached.notebook_id
+        note_ids.discard(cached.pk)
+    if note_ids:
+        notebooks.update(Note.objects.filter(pk__in=note_ids).values_list('pk', 'notebook_id'))
+    return notebooks
+
+
+@receiver(post_delete, sender=PDF)
+def release_notebook_pdf_count(sender, instance, **kwargs):
+    note_id = getattr(instance, '_linked_note_id', instance.linked_note_id)
+    if note_id is not None:
+        adjust_notebook_summary(linked_notebooks([note_id]).get(note_id), pdfs=-1)
+
 
+def queue_text_extraction(file_name):
+    """Extract the file's text in the background once the current transaction commits."""
+    from edunova.celery import background_jobs_available
+    from .tasks import extract_pdf_text
 
+    if not background_jobs_available():
+        logger.error(
+            "No CELERY_BROKER_URL: text of %s not extracted; run extract_pdf_text", file_name
+        )
+        return
+    transaction.on_commit(lambda: extract_pdf_text.delay(file_name))
@@ -0,0 +1,132 @@
+"""
+Full-text index over extracted PDF pages (see edunova.search and PDFs.services).
+
+On SQLite `pdfs_textpage_search` is an external-content FTS5 table over PDFTextPage, so
+page text is stored once. On PostgreSQL it holds a `tsvector` per page (GIN indexed)
+and follows page deletes through its foreign key.
+"""
+from django.db import connection
+
+from edunova.search import (
+    MARK_END, MARK_START, PG_CONFIG, match_expression, pg_headline_options, query_terms,
+    render_snippet, search_supported, vendor,
+)
+
+TABLE = "pdfs_textpage_search"
+PAGE_TABLE = "PDFs_pdftextpage"
+DOCUMENT_TABLE = "PDFs_pdftext"
+PDF_TABLE = "PDFs_pdf"
+SNIPPET_TOKENS = 24
+
+
+def _q(name):
+    return connection.ops.quote_name(name)
+
+
+def index_pages(page_ids):
+    """Add freshly inserted pages to the index."""
+    if not page_ids or not search_supported():
+        return
+    marks = ", ".join(["%s"] * len(page_ids))
+    with connection.cursor() as cursor:
+        if vendor() == "sqlite":
+            cursor.execute(
+                f"INSERT INTO {TABLE} (rowid, text) "
+                f"SELECT id, text FROM {_q(PAGE_TABLE)} WHERE id IN ({marks})",
+                list(page_ids),
+            )
+        else:
+            cursor.execute(
+                f"INSERT INTO {TABLE} (page_id, document) "
+                f"SELECT id, to_tsvector('{PG_CONFIG}', text) FROM {_q(PAGE_TABLE)} "
+                f"WHERE id IN ({marks})",
+                list(page_ids),
+            )
+
+
+def unindex_documents(document_ids):
+    """
+    Drop the index entries of the documents' pages. Call before deleting the pages:
+    FTS5 external-content deletes need the indexed text.
+    """
+    if not document_ids or not search_supported():
+        return
+    marks = ", ".join(["%s"] * len(document_ids))
+    with connection.cursor() as cursor:
+        if vendor() == "sqlite":
+            cursor.execute(
+                f"INSERT INTO {TABLE} ({TABLE}, rowid, text) "
+                f"SELECT 'delete', id, text FROM {_q(PAGE_TABLE)} "
+                f"WHERE document_id IN ({marks})",
+                list(document_ids),
+            )
+        else:
+            cursor.execute(
+                f"DELETE FROM {TABLE} WHERE page_id IN "
+                f"(SELECT id FROM {_q(PAGE_TABLE)} WHERE document_id IN ({marks}))",
+                list(document_ids),
+            )
+
+
+def rebuild_index():
+    """Re-create the index from the stored page text."""
+    if not search_supported():
+        return
+    with connection.cursor() as cursor:
+        if vendor() == "sqlite":
+            cursor.execute(f"INSERT INTO {TABLE} ({TABLE}) VALUES ('rebuild')")
+        else:
+            cursor.execute(f"DELETE FROM {TABLE}")
+            cursor.execute(
+                f"INSERT INTO {TABLE} (page_id, document) "
+                f"SELECT id, to_tsvector('{PG_CONFIG}', text) FROM {_q(PAGE_TABLE)}"
+            )
+
+
+def search_pages(text, user, limit, offset=0):
+    """
+    Ranked page hits inside the PDFs `user` may read (PDFQuerySet.visible_to: own uploads
+    or public). Returns a list of `(pdf_id, page_number, rank, snippet_html)`.
+    """
+    terms = query_terms(text)
+    if not terms or not search_supported():
+        return []
+    expression = match_expression(terms)
+    owner = user.pk if user.is_authenticated else None
+    pages, documents, pdfs = _q(PAGE_TABLE), _q(DOCUMENT_TABLE), _q(PDF_TABLE)
+    with connection.cursor() as cursor:
+        if vendor() == "sqlite":
+            cursor.execute(
+                f"SELECT p.id, pg.page_number, -bm25({TABLE}) AS rank, "
+                f"snippet({TABLE}, 0, %s, %s, '…', %s) "
+                f"FROM {TABLE} JOIN {pages} pg ON pg.id = {TABLE}.rowid "
+                f"JOIN {documents} d ON d.id = pg.document_id "
+                f"JOIN {pdfs} p ON p.file = d.file "
+                f"WHERE {TABLE} MATCH %s AND (p.uploaded_by_id = %s OR p.is_public) "
+                f"ORDER BY bm25({TABLE}), p.id, pg.page_number LIMIT %s OFFSET %s",
+                [MARK_START, MARK_END, SNIPPET_TOKENS, expression, owner, limit, offset],
+            )
+        else:
+            # ts_headline re-parses the page, so it only runs on the page of hits
+            cursor.execute(
+                f"SELECT hit.pdf_id, pg.page_number, hit.rank, "
+                f"ts_headline('{PG_CONFIG}', pg.text, hit.q, %s) "
+                f"FROM (SELECT p.id AS pdf_id, s.page_id, q, ts_rank_cd(s.document, q) AS rank "
+                f"      FROM {TABLE} s JOIN {pages} pg ON pg.id = s.page_id "
+                f"      JOIN {documents} d ON d.id = pg.document_id "
+                f"      JOIN {pdfs} p ON p.file = d.file, to_tsquery('{PG_CONFIG}', %s) q "
+                f"      WHERE s.document @@ q AND (p.uploaded_by_id = %s OR p.is_public) "
+                f"      ORDER BY rank DESC, p.id, s.page_id LIMIT %s OFFSET %s) hit "
+                f"JOIN {pages} pg ON pg.id = hit.page_id "
+                f"ORDER BY hit.rank DESC, hit.pdf_id, pg.page_number",
+                [pg_headline_options(SNIPPET_TOKENS), expression, owner, limit, offset],
+            )
+        rows = cursor.fetchall()
+
+    from .models import PDF
+
+    to_python = PDF._meta.pk.to_python
+    return [
+        (to_python(pdf_id), page, rank, render_snippet(snippet))
+        for pdf_id, page, rank, snippet in rows
+    ]
@@ -1,5 +1,6 @@
+from django.conf import settings
 from rest_framework import serializers
-from .models import PDF
+from .models import PDF, PDFUploadSession
 
 
 MAX_PDF_MB = 10
@@ -38,10 +39,42 @@ class PDFSerializer(serializers.ModelSerializer):
             })
         return attrs
 
-    def update(self, instance, validated_data):
-        new_file = validated_data.get('file')
-        if new_file and instance.file:
-            # delete old file before replacing
-            instance.file.delete(save=False)
-        return super().update(instance, validated_data)
 
+class PDFUploadSessionSerializer(serializers.ModelSerializer):
+    checksum = serializers.SerializerMethodField()
+
+    class Meta:
+        model = PDFUploadSession
+        fields = [
+            'id', 'file_name', 'title', 'description', 'linked_note', 'is_public',
+            'total_size', 'offset', 'checksum', 'created_at', 'updated_at'
+        ]
+        read_only_fields = ['offset', 'checksum', 'created_at', 'updated_at']
+
+    def get_checksum(self, obj):
+        # CRC-32 of the bytes received so far, so clients can confirm what to resume from
+        return f"{obj.checksum:08x}"
+
+    def validate_file_name(self, value):
+        if not value.lower().endswith('.pdf'):
+            raise serializers.ValidationError("Uploaded file must be a PDF")
+        return value
+
+    def validate_total_size(self, value):
+        max_bytes = settings.PDF_RESUMABLE_MAX_MB * 1024 * 1024
+        if value <= 0:
+            raise serializers.ValidationError("total_size must be positive")
+        if value > max_bytes:
+            raise serializers.ValidationError(
+                f"PDF size must be <= {settings.PDF_RESUMABLE_MAX_MB} MB"
+            )
+        return value
+
+    def validate(self, attrs):
+        linked_note = attrs.get('linked_note')
+        request = self.context.get('request')
+        if linked_note and request and linked_note.owner != request.user:
+            raise serializers.ValidationError({
+                'linked_note': "You do not own the linked note."
+            })
+        return attrs
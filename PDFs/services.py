@@ -0,0 +1,92 @@
+import logging
+import re
+
+from django.conf import settings
+from django.db import transaction
+from pypdf import PdfReader
+from pypdf.errors import PyPdfError
+
+from .models import PDF, PDFText, PDFTextPage
+from .search import index_pages, unindex_documents
+
+logger = logging.getLogger(__name__)
+
+# Pages are written (and pypdf's object cache dropped) every PAGE_BATCH pages, so memory
+# depends on the batch, not on the document length.
+PAGE_BATCH = 25
+WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    return WHITESPACE_RE.sub(" ", text or "").strip()[:settings.PDF_TEXT_MAX_PAGE_CHARS]
+
+
+def _store_pages(batch):
+    with transaction.atomic():
+        pages = PDFTextPage.objects.bulk_create(batch)
+        index_pages([page.pk for page in pages])
+
+
+def discard_text(file_names):
+    """Remove the extracted text (and index entries) of files that no longer exist."""
+    documents = list(PDFText.objects.filter(file__in=file_names).values_list('pk', flat=True))
+    if documents:
+        with transaction.atomic():
+            unindex_documents(documents)
+            PDFText.objects.filter(pk__in=documents).delete()
+
+
+def extract_file_text(file_name, force=False):
+    """
+    Extract and index the per-page text of a stored file. Files already extracted are
+    skipped unless `force` is set; content-addressed names change with the content, so
+    a new or replaced file always gets a fresh extraction.
+    """
+    document, _ = PDFText.objects.get_or_create(file=file_name)
+    if document.status == PDFText.STATUS_DONE and not force:
+        return document
+
+    with transaction.atomic():
+        unindex_documents([document.pk])
+        document.pages.all().delete()
+
+    storage = PDF._meta.get_field('file').storage
+    page_count = 0
+    try:
+        with storage.open(file_name, 'rb') as fh:
+            reader = PdfReader(fh)
+            batch = []
+            for page_count, page in enumerate(reader.pages, start=1):
+                text = normalize_text(page.extract_text())
+                if text:
+                    batch.append(
+                        PDFTextPage(document=document, page_number=page_count, text=text)
+                    )
+                if page_count % PAGE_BATCH == 0:
+                    _store_pages(batch)
+                    batch = []
+                    # parsed objects are cached per reader; drop them to keep memory flat
+                    reader.resolved_objects.clear()
+            _store_pages(batch)
+    except (OSError, PyPdfError, ValueError) as exc:
+        logger.warning(f"Text extraction failed for {file_name}: {exc}")
+        document.status = PDFText.STATUS_FAILED
+        document.error = str(exc)
+        document.page_count = page_count
+        document.save(update_fields=['status', 'error', 'page_count', 'updated_at'])
+        return document
+
+    document.status = PDFText.STATUS_DONE
+    document.error = ''
+    document.page_count = page_count
+    document.save(update_fields=['status', 'error', 'page_count', 'updated_at'])
+    return document
+
+
+def pending_files():
+    """Stored file names of PDF rows that have no successful extraction yet."""
+    done = PDFText.objects.filter(status=PDFText.STATUS_DONE).values('file')
+    return (
+        PDF.objects.exclude(file='').exclude(file__isnull=True).exclude(file__in=done)
+        .values_list('file', flat=True).distinct()
+    )
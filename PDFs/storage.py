@@ -0,0 +1,145 @@
+import hashlib
+import os
+import posixpath
+import re
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.move import file_move_safe
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+BLOB_NAME_RE = re.compile(r'(?:^|/)[0-9a-f]{2}/([0-9a-f]{64})\.pdf$')
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    Stores each distinct file once under `<upload_to>/<sha[:2]>/<sha>.pdf`.
+
+    The SHA-256 is computed while the upload is streamed to a temporary file, so saving
+    content that is already stored just discards the temporary copy and returns the
+    existing name. Several PDF rows can therefore share one blob, so blobs are never
+    deleted along with a row: `collect_unreferenced_blobs` removes them later.
+
+    Every save touches the blob, and the collector skips blobs touched within its grace
+    period, so a blob handed out by a save is not collected before the PDF row pointing
+    at it is committed.
+    """
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+
+        digest = hashlib.sha256()
+        on_disk = hasattr(content, 'temporary_file_path')
+        if on_disk:
+            # Already on disk (large uploads): hash in place and move it, no extra copy.
+            temp_path = content.temporary_file_path()
+            with open(temp_path, 'rb') as fh:
+                for chunk in iter(lambda: fh.read(64 * 1024), b''):
+                    digest.update(chunk)
+        else:
+            fd, temp_path = tempfile.mkstemp(suffix='.part', dir=settings.TEMP_UPLOAD_DIR)
+            with os.fdopen(fd, 'wb') as fh:
+                for chunk in content.chunks():
+                    digest.update(chunk)
+                    fh.write(chunk)
+
+        sha = digest.hexdigest()
+        name = posixpath.join(posixpath.dirname(name), sha[:2], f'{sha}.pdf')
+        full_path = self.path(name)
+        try:
+            # Fails if the collector moved the blob aside meanwhile; store it again then
+            os.utime(full_path)
+        except FileNotFoundError:
+            pass
+        else:
+            if not on_disk:
+                os.remove(temp_path)
+            return name
+
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        file_move_safe(temp_path, full_path, allow_overwrite=True)
+        # a moved upload keeps the time of its last chunk
+        os.utime(full_path)
+        if self.file_permissions_mode is not None:
+            os.chmod(full_path, self.file_permissions_mode)
+        return name
+
+
+class LocalTempFile(File):
+    """
+    A file already assembled on local disk; the storage moves it instead of copying it.
+    """
+
+    def temporary_file_path(self):
+        return self.file.name
+
+
+pdf_storage = ContentAddressedStorage()
+
+
+def blob_sha256(name):
+    """
+    Return the content hash encoded in a content-addressed file name, or None.
+    """
+    match = BLOB_NAME_RE.search(name or '')
+    return match.group(1) if match else None
+
+
+def collect_unreferenced_blobs(grace=None):
+    """
+    Delete stored PDF files no PDF row points at and that were not saved within the
+    last `grace` seconds (default PDF_BLOB_GC_GRACE_SECONDS). Returns the deleted names.
+
+    Each candidate is renamed aside before it is deleted: a save that deduplicated
+    against it just before the rename shows up as a fresh modification time and the
+    blob is put back, and a save after the rename stores the file again.
+    """
+    from .models import PDF
+    from .services import discard_text
+
+    if grace is None:
+        grace = settings.PDF_BLOB_GC_GRACE_SECONDS
+    field = PDF._meta.get_field('file')
+    storage = field.storage
+    root = storage.path(field.upload_to)
+    cutoff = time.time() - grace
+
+    candidates = {}
+    for directory, _, files in os.walk(root):
+        for file_name in files:
+            path = os.path.join(directory, file_name)
+            name = posixpath.join(
+                field.upload_to.rstrip('/'), *os.path.relpath(path, root).split(os.sep)
+            )
+            if blob_sha256(name) and os.path.getmtime(path) < cutoff:
+                candidates[name] = path
+    referenced = set()
+    names = list(candidates)
+    for start in range(0, len(names), 500):
+        referenced.update(
+            PDF.objects.filter(file__in=names[start:start + 500]).values_list('file', flat=True)
+        )
+
+    deleted = []
+    for name, path in candidates.items():
+        if name in referenced:
+            continue
+        aside = f'{path}.gc'
+        try:
+            os.rename(path, aside)
+        except FileNotFoundError:
+            continue
+        if os.path.getmtime(aside) >= cutoff:
+            os.replace(aside, path)
+            continue
+        os.remove(aside)
+        deleted.append(name)
+    discard_text(deleted)
+    return deleted
@@ -0,0 +1,29 @@
+from celery import shared_task
+from django.core.management import call_command
+
+from .services import extract_file_text
+from .storage import collect_unreferenced_blobs
+
+
+@shared_task
+def extract_pdf_text(file_name, force=False):
+    """
+    Extract and index the text of a stored PDF file (skipped if already extracted).
+    """
+    document = extract_file_text(file_name, force=force)
+    return document.status
+
+
+@shared_task
+def collect_pdf_blobs():
+    """
+    Delete stored PDF files no PDF points at any more (run by Celery beat, see
+    CELERY_BEAT_SCHEDULE). Returns how many were deleted.
+    """
+    return len(collect_unreferenced_blobs())
+
+
+@shared_task
+def expire_pdf_uploads():
+    """Drop resumable uploads not resumed within PDF_UPLOAD_SESSION_TTL_HOURS (Celery beat)."""
+    call_command("expire_pdf_uploads")
@@ -1,13 +1,37 @@
 """
 Unit tests for PDFs app.
 """
-from django.test import TestCase
+import hashlib
+import io
+import json
+import os
+import re
+import tempfile
+import zlib
+from datetime import timedelta
+from unittest import mock
+from pathlib import Path
+from urllib.parse import unquote
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
 from django.contrib.auth import get_user_model
 from django.urls import reverse
+from django.utils import timezone
 from django.core.files.uploadedfile import SimpleUploadedFile
 from rest_framework.test import APIClient
 from rest_framework import status
-from .models import PDF
+from rest_framework.renderers import JSONRenderer
+from .models import PDF, PDFText, PDFUploadSession
+from .serializers import PDFSerializer
+from .services import extract_file_text
+from .storage import collect_unreferenced_blobs
+from .tasks import collect_pdf_blobs, expire_pdf_uploads
+from .utils import layout
+from .utils.generator import generate_pdf_from_text, generate_pdf_to_file
+from .views import PDFUploadSessionView
 import uuid
 
 User = get_user_model()
@@ -106,3 +130,588 @@ class PDFAPITestCase(TestCase):
         url = reverse('pdf-detail', kwargs={'pk': self.pdf.id})
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class PDFDownloadTestCase(TestCase):
+    """Test cases for conditional and ranged PDF downloads."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.body = b'%PDF-1.4\n' + bytes(range(256)) * 40
+        self.pdf = PDF.objects.create(file_name='test.pdf', uploaded_by=self.user)
+        self.pdf.file.save('test.pdf', ContentFile(self.body), save=True)
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('pdf-download', kwargs={'pk': self.pdf.id})
+
+    def test_full_download_has_validators(self):
+        """Test full download advertises ranges and validators."""
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(b''.join(response.streaming_content), self.body)
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertIn('ETag', response)
+        self.assertIn('Last-Modified', response)
+
+    def test_if_none_match_returns_not_modified(self):
+        """Test revalidation with a matching ETag returns 304."""
+        etag = self.client.get(self.url)['ETag']
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response['ETag'], etag)
+        self.assertIn('Last-Modified', response)
+
+    def test_if_modified_since_returns_not_modified(self):
+        """Test revalidation with only the Last-Modified date returns 304."""
+        last_modified = self.client.get(self.url)['Last-Modified']
+        response = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response['Last-Modified'], last_modified)
+
+    def test_single_range(self):
+        """Test a single byte range returns 206 with the requested slice."""
+        response = self.client.get(self.url, HTTP_RANGE='bytes=10-19')
+        self.assertEqual(response.status_code, status.HTTP_206_PARTIAL_CONTENT)
+        self.assertEqual(b''.join(response.streaming_content), self.body[10:20])
+        self.assertEqual(response['Content-Range'], f'bytes 10-19/{len(self.body)}')
+
+    def test_multiple_ranges(self):
+        """Test multiple ranges return a multipart/byteranges body."""
+        response = self.client.get(self.url, HTTP_RANGE='bytes=0-3,-4')
+        self.assertEqual(response.status_code, status.HTTP_206_PARTIAL_CONTENT)
+        self.assertTrue(response['Content-Type'].startswith('multipart/byteranges'))
+        body = b''.join(response.streaming_content)
+        self.assertEqual(len(body), int(response['Content-Length']))
+        self.assertIn(self.body[:4], body)
+        self.assertIn(self.body[-4:], body)
+
+    def test_unsatisfiable_range(self):
+        """Test a range past the end of the file returns 416."""
+        response = self.client.get(self.url, HTTP_RANGE=f'bytes={len(self.body) + 10}-')
+        self.assertEqual(response.status_code, status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+
+    def test_stale_if_range_serves_full_file(self):
+        """Test a stale If-Range validator falls back to the full file."""
+        response = self.client.get(self.url, HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE='"stale"')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+class ProxyStandIn:
+    """
+    Local stand-in for the front proxy in deploy/nginx.conf: resolves X-Accel-Redirect
+    against the internal location and X-Sendfile against the filesystem.
+    """
+    CONF = Path(settings.BASE_DIR) / 'deploy' / 'nginx.conf'
+
+    def __init__(self):
+        pattern = r'location\s+(\S+)\s*{\s*internal;\s*alias\s+(\S+);'
+        match = re.search(pattern, self.CONF.read_text())
+        self.location, self.alias = match.groups()
+
+    def resolve(self, response):
+        if 'X-Accel-Redirect' in response:
+            path = unquote(response['X-Accel-Redirect'])
+            assert path.startswith(self.location), path
+            return (Path(settings.MEDIA_ROOT) / path[len(self.location):]).read_bytes()
+        if 'X-Sendfile' in response:
+            return Path(response['X-Sendfile']).read_bytes()
+        return b''.join(response.streaming_content)
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class PDFOffloadTestCase(TestCase):
+    """Test cases for handing PDF transfers to the front proxy."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.proxy = ProxyStandIn()
+        self.owner = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.body = b'%PDF-1.4\n' + b'x' * 2048
+        self.pdf = PDF.objects.create(file_name='test.pdf', uploaded_by=self.owner)
+        self.pdf.file.save('test.pdf', ContentFile(self.body), save=True)
+        self.url = reverse('pdf-download', kwargs={'pk': self.pdf.id})
+
+    def test_x_accel_redirect(self):
+        """Test nginx mode returns an internal redirect the proxy can serve."""
+        self.client.force_authenticate(user=self.owner)
+        with self.settings(
+            PDF_DOWNLOAD_MODE='x-accel-redirect', PDF_X_ACCEL_LOCATION=self.proxy.location
+        ):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.content, b'')
+        self.assertEqual(self.proxy.resolve(response), self.body)
+
+    def test_x_sendfile(self):
+        """Test Apache/lighttpd mode returns the file path for the proxy."""
+        self.client.force_authenticate(user=self.owner)
+        with self.settings(PDF_DOWNLOAD_MODE='x-sendfile'):
+            response = self.client.get(self.url)
+        self.assertEqual(response['X-Sendfile'], self.pdf.file.path)
+        self.assertEqual(self.proxy.resolve(response), self.body)
+
+    def test_offload_still_checks_permissions(self):
+        """Test private PDFs are not handed to the proxy for other users."""
+        other = User.objects.create_user(
+            username='otheruser',
+            email='other@example.com',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=other)
+        with self.settings(PDF_DOWNLOAD_MODE='x-accel-redirect'):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertNotIn('X-Accel-Redirect', response)
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class PDFStorageTestCase(TestCase):
+    """Test cases for content-addressed, reference-counted PDF storage."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def _upload(self, body, name='book.pdf'):
+        upload = SimpleUploadedFile(name, body, content_type='application/pdf')
+        response = self.client.post(
+            reverse('pdf-upload'), {'file_name': name, 'file': upload}, format='multipart'
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return PDF.objects.get(pk=response.data['id'])
+
+    def test_identical_uploads_share_blob(self):
+        """Test identical uploads are stored once under their SHA-256."""
+        body = b'%PDF-1.4\nsame textbook'
+        first = self._upload(body)
+        second = self._upload(body, name='copy.pdf')
+        self.assertEqual(first.file.name, second.file.name)
+        self.assertIn(hashlib.sha256(body).hexdigest(), first.file.name)
+
+    def test_blob_collected_after_last_reference(self):
+        """Test unreferenced blobs are collected only once no PDF points at them."""
+        first = self._upload(b'%PDF-1.4\nshared')
+        second = self._upload(b'%PDF-1.4\nshared')
+        path = first.file.path
+
+        self.client.delete(reverse('pdf-detail', kwargs={'pk': first.id}))
+        self.assertEqual(collect_unreferenced_blobs(grace=0), [])
+        self.assertTrue(os.path.exists(path))
+        self.client.delete(reverse('pdf-detail', kwargs={'pk': second.id}))
+        self.assertTrue(os.path.exists(path))
+        self.assertEqual(collect_unreferenced_blobs(grace=0), [first.file.name])
+        self.assertFalse(os.path.exists(path))
+
+    def test_replacing_file_leaves_old_blob_to_collector(self):
+        """Test a replaced file is collected unless it is still referenced."""
+        pdf = self._upload(b'%PDF-1.4\nold')
+        old_path = pdf.file.path
+        url = reverse('pdf-detail', kwargs={'pk': pdf.id})
+
+        upload = SimpleUploadedFile('same.pdf', b'%PDF-1.4\nold', content_type='application/pdf')
+        self.client.patch(url, {'file': upload}, format='multipart')
+        collect_unreferenced_blobs(grace=0)
+        self.assertTrue(os.path.exists(old_path))
+
+        upload = SimpleUploadedFile('new.pdf', b'%PDF-1.4\nnew', content_type='application/pdf')
+        self.client.patch(url, {'file': upload}, format='multipart')
+        self.assertTrue(os.path.exists(old_path))
+        call_command('collect_pdf_blobs', '--grace', '0', stdout=io.StringIO())
+        self.assertFalse(os.path.exists(old_path))
+
+    @override_settings(PDF_BLOB_GC_GRACE_SECONDS=0)
+    def test_collection_is_scheduled(self):
+        """Test Celery beat runs the collector, which deletes unreferenced blobs."""
+        tasks = [entry['task'] for entry in settings.CELERY_BEAT_SCHEDULE.values()]
+        self.assertIn('PDFs.tasks.collect_pdf_blobs', tasks)
+        pdf = self._upload(b'%PDF-1.4\nscheduled')
+        path = pdf.file.path
+        pdf.delete()
+        self.assertEqual(collect_pdf_blobs.delay().get(), 1)
+        self.assertFalse(os.path.exists(path))
+
+    def test_recently_saved_blob_survives_collection(self):
+        """Test a blob reused by a save that has not committed its row yet is kept."""
+        body = b'%PDF-1.4\nreused'
+        pdf = self._upload(body)
+        path = pdf.file.path
+        PDF.objects.filter(pk=pdf.pk).delete()
+        os.utime(path, (0, 0))
+
+        # a concurrent upload deduplicates against the blob before its row exists
+        name = pdf.file.storage.save('pdfs/blobs/again.pdf', ContentFile(body))
+        self.assertEqual(name, pdf.file.name)
+        self.assertEqual(collect_unreferenced_blobs(), [])
+        self.assertTrue(os.path.exists(path))
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(), TEMP_UPLOAD_DIR=tempfile.mkdtemp())
+class PDFResumableUploadTestCase(TestCase):
+    """Test cases for the resumable chunked upload protocol."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.body = b'%PDF-1.4\n' + os.urandom(3000)
+
+    def _initiate(self):
+        response = self.client.post(
+            reverse('pdf-upload-session-create'),
+            {'file_name': 'big.pdf', 'title': 'Big', 'total_size': len(self.body)},
+            format='json',
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return reverse('pdf-upload-session', kwargs={'pk': response.data['id']})
+
+    def _put(self, url, offset, chunk, **extra):
+        return self.client.generic(
+            'PUT', url, chunk, content_type='application/offset+octet-stream',
+            HTTP_UPLOAD_OFFSET=str(offset), **extra
+        )
+
+    def test_chunked_upload_and_finalize(self):
+        """Test chunks appended in order are assembled into a PDF."""
+        url = self._initiate()
+        for offset in range(0, len(self.body), 1000):
+            chunk = self.body[offset:offset + 1000]
+            response = self._put(
+                url, offset, chunk, HTTP_X_CHUNK_SHA256=hashlib.sha256(chunk).hexdigest()
+            )
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['checksum'], f'{zlib.crc32(self.body):08x}')
+
+        response = self.client.post(
+            url + 'finalize/', {'sha256': hashlib.sha256(self.body).hexdigest()}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        pdf = PDF.objects.get(pk=response.data['id'])
+        with pdf.file.open('rb') as fh:
+            self.assertEqual(fh.read(), self.body)
+
+    def test_resume_after_offset_mismatch(self):
+        """Test a chunk at the wrong offset is rejected with the offset to resume from."""
+        url = self._initiate()
+        self._put(url, 0, self.body[:1000])
+        response = self._put(url, 2000, self.body[2000:3000])
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(response.data['offset'], 1000)
+        self.assertEqual(self.client.get(url).data['offset'], 1000)
+
+    def test_chunk_is_read_before_the_session_is_locked(self):
+        """Test the body is read unlocked and the offset re-checked under the lock."""
+        url = self._initiate()
+        session = PDFUploadSession.objects.get()
+        get_session = PDFUploadSessionView.get_session
+        calls = []
+
+        def racing_get_session(view, request, pk, lock=False):
+            calls.append(lock)
+            found = get_session(view, request, pk, lock=lock)
+            if not lock:
+                # another chunk commits while this one is still being received
+                PDFUploadSession.objects.filter(pk=pk).update(offset=1000)
+            return found
+
+        with mock.patch.object(PDFUploadSessionView, 'get_session', racing_get_session):
+            response = self._put(url, 0, self.body[:1000])
+        self.assertEqual(calls, [False, True])
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(response.data['offset'], 1000)
+        self.assertFalse(
+            [name for name in os.listdir(settings.TEMP_UPLOAD_DIR) if name.endswith('.chunk')]
+        )
+        self.assertEqual(os.path.getsize(session.temp_path), 0)
+
+    def test_corrupt_chunk_rejected(self):
+        """Test a chunk whose checksum does not match is not committed."""
+        url = self._initiate()
+        response = self._put(url, 0, self.body[:1000], HTTP_X_CHUNK_SHA256='0' * 64)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get(url).data['offset'], 0)
+
+    def test_finalize_incomplete_upload(self):
+        """Test finalizing before all bytes arrived is refused."""
+        url = self._initiate()
+        self._put(url, 0, self.body[:1000])
+        response = self.client.post(url + 'finalize/', {}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertFalse(PDF.objects.exists())
+
+    def test_finalize_retry_after_success(self):
+        """Test a repeated finalize creates no second PDF and reports the session gone."""
+        url = self._initiate()
+        self._put(url, 0, self.body)
+        first = self.client.post(url + 'finalize/', {}, format='json')
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        retry = self.client.post(url + 'finalize/', {}, format='json')
+        self.assertEqual(retry.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(PDF.objects.count(), 1)
+
+    def test_finalize_without_partial_file(self):
+        """Test finalizing an upload whose partial file is gone returns 404, not 500."""
+        url = self._initiate()
+        self._put(url, 0, self.body)
+        os.remove(PDFUploadSession.objects.get().temp_path)
+        response = self.client.post(url + 'finalize/', {}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertFalse(PDFUploadSession.objects.exists())
+
+    def test_stale_uploads_expire(self):
+        """Test expire_pdf_uploads drops stale sessions and orphaned partial files only."""
+        stale_url = self._initiate()
+        self._put(stale_url, 0, self.body[:1000])
+        fresh_url = self._initiate()
+        self._put(fresh_url, 0, self.body[:1000])
+        stale = PDFUploadSession.objects.get(pk=stale_url.rstrip('/').rsplit('/', 1)[1])
+        PDFUploadSession.objects.filter(pk=stale.pk).update(
+            updated_at=timezone.now() - timedelta(days=2)
+        )
+        orphan = os.path.join(settings.TEMP_UPLOAD_DIR, 'tmp-left-over.part')
+        with open(orphan, 'wb') as fh:
+            fh.write(b'partial')
+        os.utime(orphan, (0, 0))
+
+        with mock.patch('sys.stdout', io.StringIO()):
+            expire_pdf_uploads.delay()
+        self.assertFalse(PDFUploadSession.objects.filter(pk=stale.pk).exists())
+        self.assertFalse(os.path.exists(stale.temp_path))
+        self.assertFalse(os.path.exists(orphan))
+        self.assertEqual(self.client.get(fresh_url).data['offset'], 1000)
+        response = self.client.post(stale_url + 'finalize/', {}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class PDFLayoutTestCase(TestCase):
+    """Test cases for the note text layout engine."""
+
+    def test_lines_fit_the_page_width(self):
+        """Test wrapped lines never exceed the available width."""
+        metrics = layout.metrics_for(layout.STYLES['body'])
+        lines = layout.wrap_words(('word ' * 500).split(), metrics, layout.MAX_WIDTH)
+        self.assertGreater(len(lines), 1)
+        for line in lines:
+            self.assertLessEqual(metrics.word(line), layout.MAX_WIDTH)
+
+    def test_long_words_are_broken(self):
+        """Test a word wider than the line is split instead of overflowing."""
+        metrics = layout.metrics_for(layout.STYLES['body'])
+        lines = layout.wrap_words(['short', 'x' * 400, 'tail'], metrics, layout.MAX_WIDTH)
+        self.assertEqual(lines[0], 'short')
+        self.assertEqual(''.join(lines[1:-1]) + lines[-1].split()[0], 'x' * 400)
+        self.assertTrue(lines[-1].endswith('tail'))
+
+    def test_headings_lists_and_pagination(self):
+        """Test headings and list items get their styles and long notes paginate."""
+        content = '# Intro\n\n- first\n- second\n\n' + '\n\n'.join(['lorem ipsum ' * 50] * 40)
+        pages = list(layout.layout_document('Title', content))
+        self.assertGreater(len(pages), 1)
+        runs = pages[0]
+        self.assertEqual(runs[1].text, 'Intro')
+        self.assertEqual(runs[1].style, layout.STYLES['h1'])
+        self.assertEqual([r.text for r in runs[2:6]], ['•', 'first', '•', 'second'])
+        self.assertGreater(runs[3].x, runs[2].x)
+
+
+class PDFStreamingWriterTestCase(TestCase):
+    """Test cases for the streaming PDF writer."""
+
+    class WriteOnly:
+        """A sink with no seek/tell/getvalue, like a socket or pipe."""
+
+        def __init__(self):
+            self.parts = []
+
+        def write(self, data):
+            self.parts.append(data)
+
+    def test_xref_offsets_point_at_objects(self):
+        """Test every cross-reference entry addresses the object it names."""
+        data = generate_pdf_from_text('Title', '# Intro\n\n' + 'lorem ipsum ' * 2000).getvalue()
+        self.assertTrue(data.startswith(b'%PDF-1.4'))
+        self.assertTrue(data.endswith(b'%%EOF\n'))
+        xref_at = int(re.search(rb'startxref\n(\d+)', data).group(1))
+        self.assertTrue(data[xref_at:].startswith(b'xref\n'))
+        rows = data[xref_at:].split(b'\n')[3:]
+        count = int(data[xref_at:].split(b'\n')[1].split()[1])
+        for obj_id in range(1, count):
+            offset = int(rows[obj_id - 1][:10])
+            self.assertTrue(data[offset:].startswith(b'%d 0 obj' % obj_id))
+
+    def test_pages_and_text(self):
+        """Test the page tree counts every laid-out page and text is drawn."""
+        content = '\n\n'.join(['lorem (ipsum) ' * 60] * 40)
+        data = generate_pdf_from_text('Title', content).getvalue()
+        pages = len(list(layout.layout_document('Title', content)))
+        self.assertGreater(pages, 1)
+        self.assertIn(b'/Type /Pages /Kids', data)
+        self.assertIn(b'/Count %d' % pages, data)
+        streams = re.findall(rb'stream\n(.*?)\nendstream', data, re.S)
+        self.assertEqual(len(streams), pages)
+        self.assertIn(rb'(lorem \(ipsum\)', zlib.decompress(streams[0]))
+
+    def test_write_only_sink_and_reproducible(self):
+        """Test output needs only write() and is byte-for-byte reproducible."""
+        sink = self.WriteOnly()
+        pages = generate_pdf_to_file('Title', 'Body text', sink)
+        self.assertEqual(pages, 1)
+        self.assertEqual(b''.join(sink.parts), generate_pdf_from_text('Title', 'Body text').read())
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class PDFTextSearchTestCase(TestCase):
+    """Test cases for PDF text extraction and search."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.other = User.objects.create_user(
+            username='otheruser',
+            email='other@example.com',
+            password='testpass123'
+        )
+        # page 1 holds the title and intro; the long filler pushes "eigenvalues" to page 2
+        content = 'Introduction to vectors\n\n' + '\n\n'.join(['filler words ' * 80] * 12)
+        self.textbook = self.make_pdf(self.user, 'Algebra', content + '\n\nEigenvalues at last')
+        self.public = self.make_pdf(self.other, 'Shared', 'Public eigenvalues notes', True)
+        self.private = self.make_pdf(self.other, 'Secret', 'Private eigenvalues notes')
+        self.client.force_authenticate(user=self.user)
+
+    def make_pdf(self, owner, title, content, is_public=False):
+        pdf = PDF(file_name=f'{title}.pdf', title=title, uploaded_by=owner, is_public=is_public)
+        with self.captureOnCommitCallbacks(execute=True):
+            pdf.file.save(
+                f'{title}.pdf', ContentFile(generate_pdf_from_text(title, content).read()),
+                save=True,
+            )
+        return pdf
+
+    def search(self, query):
+        response = self.client.get(reverse('pdf-search'), {'q': query})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data['results']
+
+    def test_pages_are_extracted_once(self):
+        """Test each stored file is extracted on upload and skipped afterwards."""
+        document = PDFText.objects.get(file=self.textbook.file.name)
+        self.assertEqual(document.status, PDFText.STATUS_DONE)
+        self.assertGreater(document.page_count, 1)
+        with mock.patch('PDFs.services.PdfReader') as reader:
+            extract_file_text(self.textbook.file.name)
+        reader.assert_not_called()
+
+    def test_search_reports_pages_and_respects_visibility(self):
+        """Test hits carry page numbers and private PDFs of others stay hidden."""
+        results = self.search('eigenval')
+        hits = {(r['id'], r['page']) for r in results}
+        document = PDFText.objects.get(file=self.textbook.file.name)
+        self.assertIn((str(self.textbook.id), document.page_count), hits)
+        self.assertIn((str(self.public.id), 1), hits)
+        self.assertNotIn(str(self.private.id), {r['id'] for r in results})
+        self.assertIn('<mark>', results[0]['snippet'])
+
+        self.assertEqual(
+            [(r['id'], r['page']) for r in self.search('introduction vectors')],
+            [(str(self.textbook.id), 1)],
+        )
+
+    def test_text_released_with_file(self):
+        """Test a deleted PDF leaves the results and its file's text goes with the file."""
+        self.client.force_authenticate(user=self.other)
+        response = self.client.delete(reverse('pdf-detail', kwargs={'pk': self.public.id}))
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(self.search('public'), [])
+        collect_unreferenced_blobs(grace=0)
+        self.assertFalse(PDFText.objects.filter(file=self.public.file.name).exists())
+
+    def test_broken_file_marked_failed(self):
+        """Test unreadable files are recorded as failed rather than raising."""
+        pdf = PDF(file_name='broken.pdf', uploaded_by=self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            pdf.file.save('broken.pdf', ContentFile(b'%PDF-1.4 not really'), save=True)
+        self.assertEqual(PDFText.objects.get(file=pdf.file.name).status, PDFText.STATUS_FAILED)
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(), PDF_TEXT_EXTRACTION=False)
+class PDFListSerializationTestCase(TestCase):
+    """Test the compiled list rendering matches PDFSerializer exactly."""
+
+    def setUp(self):
+        from notebook.models import Note, Notebook
+
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        other = User.objects.create_user(
+            username='otheruser',
+            email='other@example.com',
+            password='testpass123'
+        )
+        notebook = Notebook.objects.create(name='Reading', owner=self.user)
+        note = Note.objects.create(notebook=notebook, title='N', content='x', owner=self.user)
+        plain = PDF.objects.create(file_name='plain.pdf', title='Plain', uploaded_by=self.user)
+        plain.file.save('plain.pdf', ContentFile(b'%PDF-1.4 plain'), save=True)
+        covered = PDF.objects.create(
+            file_name='covered.pdf', title='Covered ✓', description='With a cover',
+            uploaded_by=self.user, linked_note=note,
+        )
+        covered.file.save('covered.pdf', ContentFile(b'%PDF-1.4 covered'), save=True)
+        covered.cover_image.save('cover.png', ContentFile(b'not really a png'), save=True)
+        PDF.objects.create(file_name='empty.pdf', title='No file', uploaded_by=self.user)
+        PDF.objects.create(
+            file_name='shared.pdf', title='Shared', uploaded_by=other, is_public=True
+        )
+        PDF.objects.create(file_name='private.pdf', title='Private', uploaded_by=other)
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('pdf-list')
+
+    def expected(self, response, ids):
+        pdfs = PDF.objects.select_related('linked_note', 'uploaded_by').in_bulk(ids)
+        data = PDFSerializer(
+            [pdfs[pdf_id] for pdf_id in ids], many=True,
+            context={'request': response.wsgi_request},
+        ).data
+        return json.loads(JSONRenderer().render(data))
+
+    def test_pages_match_serializer(self):
+        """Test page-number and keyset pages render the same JSON as PDFSerializer."""
+        for params in ({'page_size': 50}, {'cursor': '', 'page_size': 2}):
+            response = self.client.get(self.url, params)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            results = response.json()['results']
+            self.assertTrue(results)
+            ids = [uuid.UUID(item['id']) for item in results]
+            self.assertEqual(results, self.expected(response, ids))
+
+        results = self.client.get(self.url, {'page_size': 50}).json()['results']
+        self.assertEqual(
+            sorted(item['title'] for item in results),
+            ['Covered ✓', 'No file', 'Plain', 'Shared'],
+        )
+        covered = next(item for item in results if item['title'] == 'Covered ✓')
+        self.assertTrue(covered['cover_image'].startswith('http://testserver/'))
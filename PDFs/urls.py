@@ -4,11 +4,23 @@ from .views import (
     PDFListView,
     PDFRetrieveUpdateDestroyView,
     PDFDownloadView,
+    PDFSearchView,
+    PDFUploadSessionCreateView,
+    PDFUploadSessionView,
+    PDFUploadSessionFinalizeView,
 )
 
 urlpatterns = [
     path('upload/', PDFUploadCreateView.as_view(), name='pdf-upload'),
     path('', PDFListView.as_view(), name='pdf-list'),
+    path('search/', PDFSearchView.as_view(), name='pdf-search'),
     path('<uuid:pk>/', PDFRetrieveUpdateDestroyView.as_view(), name='pdf-detail'),
     path('<uuid:pk>/download/', PDFDownloadView.as_view(), name='pdf-download'),
+    path('uploads/', PDFUploadSessionCreateView.as_view(), name='pdf-upload-session-create'),
+    path('uploads/<uuid:pk>/', PDFUploadSessionView.as_view(), name='pdf-upload-session'),
+    path(
+        'uploads/<uuid:pk>/finalize/',
+        PDFUploadSessionFinalizeView.as_view(),
+        name='pdf-upload-session-finalize',
+    ),
 ]
\ No newline at end of file
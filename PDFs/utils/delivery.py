@@ -0,0 +1,220 @@
+import hashlib
+import uuid
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe
+
+from ..storage import blob_sha256
+
+CHUNK_SIZE = 64 * 1024
+# More ranges than this is not a PDF viewer paging through a file; serve the whole thing instead.
+MAX_RANGES = 16
+
+
+def file_etag(pdf) -> str:
+    """
+    Strong validator for the stored file. Content-addressed files use their SHA-256;
+    legacy names fall back to a digest of name, size and row timestamp.
+    """
+    sha = blob_sha256(pdf.file.name)
+    if sha:
+        return f'"{sha}"'
+    updated = pdf.updated_at.timestamp() if pdf.updated_at else ''
+    stamp = f"{pdf.file.name}:{pdf.file.size}:{updated}"
+    return '"%s"' % hashlib.sha256(stamp.encode()).hexdigest()[:32]
+
+
+def parse_range_header(header: str, size: int):
+    """
+    Parse a `Range: bytes=...` header into a sorted list of inclusive (start, end) tuples.
+
+    Returns None when the header should be ignored (malformed, not bytes, too many ranges)
+    and an empty list when it is syntactically valid but nothing is satisfiable.
+    """
+    if not header or '=' not in header:
+        return None
+    unit, _, spec = header.partition('=')
+    if unit.strip().lower() != 'bytes':
+        return None
+
+    ranges = []
+    for part in spec.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        start, sep, end = part.partition('-')
+        if not sep:
+            return None
+        start, end = start.strip(), end.strip()
+        try:
+            if start == '':
+                # suffix range: last N bytes
+                length = int(end)
+                if length <= 0:
+                    continue
+                ranges.append((max(size - length, 0), size - 1))
+                continue
+            first = int(start)
+            last = int(end) if end else None
+        except ValueError:
+            return None
+        if first < 0 or (last is not None and last < first):
+            return None
+        if first >= size:
+            continue
+        if last is None:
+            last = size - 1
+        ranges.append((first, min(last, size - 1)))
+
+    if len(ranges) > MAX_RANGES:
+        return None
+
+    # Coalesce overlapping / adjacent ranges so the response never repeats bytes.
+    ranges.sort()
+    merged = []
+    for first, last in ranges:
+        if merged and first <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], last))
+        else:
+            merged.append((first, last))
+    return merged
+
+
+class RangeFileIterator:
+    """
+    Iterates over byte ranges of an open file in CHUNK_SIZE blocks.
+    `parts` is a sequence of either bytes (emitted verbatim) or (start, end) tuples.
+    """
+
+    def __init__(self, fh, parts):
+        self.fh = fh
+        self.parts = parts
+
+    def __iter__(self):
+        for part in self.parts:
+            if isinstance(part, bytes):
+                yield part
+                continue
+            start, end = part
+            self.fh.seek(start)
+            remaining = end - start + 1
+            while remaining > 0:
+                chunk = self.fh.read(min(CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                yield chunk
+
+    def close(self):
+        self.fh.close()
+
+
+def offload_pdf_file(pdf, filename: str):
+    """
+    Build a header-only response that lets the front proxy send the file itself.
+    Returns None when offloading is disabled or the storage cannot be addressed by the proxy.
+    """
+    mode = getattr(settings, 'PDF_DOWNLOAD_MODE', 'django')
+    if mode == 'x-accel-redirect':
+        location = settings.PDF_X_ACCEL_LOCATION.rstrip('/') + '/'
+        header, value = 'X-Accel-Redirect', location + quote(pdf.file.name)
+    elif mode == 'x-sendfile':
+        try:
+            value = pdf.file.path
+        except NotImplementedError:
+            # remote storage backends have no local path to hand over
+            return None
+        header = 'X-Sendfile'
+    else:
+        return None
+
+    response = HttpResponse(content_type='application/pdf')
+    response[header] = value
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+def _if_range_matches(request, etag: str, last_modified) -> bool:
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if not if_range:
+        return True
+    if_range = if_range.strip()
+    if if_range.startswith('"'):
+        return if_range == etag
+    if if_range.startswith('W/'):
+        # weak validators never satisfy If-Range
+        return False
+    since = parse_http_date_safe(if_range)
+    return since is not None and last_modified is not None and int(last_modified) == since
+
+
+def serve_pdf_file(request, pdf, filename: str):
+    """
+    Serve a stored PDF honouring conditional GET (ETag / Last-Modified) and byte ranges.
+    """
+    etag = file_etag(pdf)
+    # whole seconds: If-Modified-Since is compared against this with second precision
+    last_modified = int(pdf.updated_at.timestamp()) if pdf.updated_at else None
+    size = pdf.file.size
+    disposition = f'attachment; filename="{filename}"'
+
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is not None:
+        # 304 Not Modified / 412 Precondition Failed
+        response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified)
+        response['Accept-Ranges'] = 'bytes'
+        return response
+
+    ranges = None
+    range_header = request.META.get('HTTP_RANGE')
+    if range_header and _if_range_matches(request, etag, last_modified):
+        ranges = parse_range_header(range_header, size)
+
+    if ranges == []:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+    elif ranges is None:
+        response = FileResponse(
+            pdf.file.storage.open(pdf.file.name, 'rb'), content_type='application/pdf'
+        )
+    elif len(ranges) == 1:
+        start, end = ranges[0]
+        fh = pdf.file.storage.open(pdf.file.name, 'rb')
+        response = StreamingHttpResponse(
+            RangeFileIterator(fh, [(start, end)]), status=206, content_type='application/pdf'
+        )
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        response['Content-Length'] = str(end - start + 1)
+    else:
+        boundary = uuid.uuid4().hex
+        parts = []
+        length = 0
+        for start, end in ranges:
+            head = (
+                f'--{boundary}\r\n'
+                f'Content-Type: application/pdf\r\n'
+                f'Content-Range: bytes {start}-{end}/{size}\r\n\r\n'
+            ).encode()
+            parts.extend([head, (start, end), b'\r\n'])
+            length += len(head) + (end - start + 1) + 2
+        tail = f'--{boundary}--\r\n'.encode()
+        parts.append(tail)
+        length += len(tail)
+        fh = pdf.file.storage.open(pdf.file.name, 'rb')
+        response = StreamingHttpResponse(
+            RangeFileIterator(fh, parts), status=206,
+            content_type=f'multipart/byteranges; boundary={boundary}',
+        )
+        response['Content-Length'] = str(length)
+
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified)
+    response['Accept-Ranges'] = 'bytes'
+    response['Content-Disposition'] = disposition
+    return response
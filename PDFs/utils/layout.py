@@ -0,0 +1,195 @@
+"""
+Text layout for generated PDFs.
+
+Turns a note (plain text with light markdown: `#` headings, `-`/`*`/`1.` list items,
+blank-line separated paragraphs) into positioned text runs, one page at a time.
+Word and glyph widths are cached per font, and line widths are accumulated
+incrementally, so wrapping costs one dictionary lookup per word.
+"""
+import re
+from dataclasses import dataclass
+from typing import Iterator, List
+
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.units import cm
+from reportlab.pdfbase.pdfmetrics import stringWidth
+
+
+@dataclass(frozen=True)
+class Style:
+    font: str
+    size: float
+    leading: float
+    color: str = "#000000"
+    space_before: float = 0
+
+
+STYLES = {
+    "title": Style("Helvetica-Bold", 16, 20, "#222222"),
+    "h1": Style("Helvetica-Bold", 15, 19, "#222222", space_before=6),
+    "h2": Style("Helvetica-Bold", 13, 17, "#222222", space_before=4),
+    "h3": Style("Helvetica-Bold", 12, 15, "#222222", space_before=2),
+    "body": Style("Helvetica", 11, 14),
+}
+
+PAGE_WIDTH, PAGE_HEIGHT = A4
+LEFT_MARGIN = 2 * cm
+BOTTOM_MARGIN = 2 * cm
+BODY_TOP = PAGE_HEIGHT - 3 * cm
+CONTINUATION_TOP = PAGE_HEIGHT - 2 * cm
+MAX_WIDTH = PAGE_WIDTH - 4 * cm
+PARAGRAPH_GAP = 10
+LIST_INDENT = 0.6 * cm
+
+HEADING_RE = re.compile(r"^(#{1,3})\s+(.*)$")
+LIST_RE = re.compile(r"^\s*([-*•]|\d+[.)])\s+(.*)$")
+
+
+@dataclass(frozen=True)
+class TextRun:
+    x: float
+    y: float
+    text: str
+    style: Style
+
+
+class FontMetrics:
+    """
+    Advance widths for one font at one size. Word widths are memoized (bounded);
+    glyph widths back the splitting of words longer than a line.
+    """
+    MAX_WORDS = 50000
+
+    def __init__(self, font: str, size: float):
+        self.font = font
+        self.size = size
+        self._words = {}
+        self._glyphs = {}
+        self.space = self.glyph(" ")
+
+    def glyph(self, char: str) -> float:
+        width = self._glyphs.get(char)
+        if width is None:
+            width = self._glyphs[char] = stringWidth(char, self.font, self.size)
+        return width
+
+    def word(self, word: str) -> float:
+        width = self._words.get(word)
+        if width is None:
+            if len(self._words) >= self.MAX_WORDS:
+                self._words.clear()
+            width = self._words[word] = stringWidth(word, self.font, self.size)
+        return width
+
+    def split_word(self, word: str, width: float) -> List[str]:
+        """Break a word wider than `width` into pieces that fit, glyph by glyph."""
+        pieces = []
+        start = 0
+        used = 0.0
+        for i, char in enumerate(word):
+            w = self.glyph(char)
+            if used + w > width and i > start:
+                pieces.append(word[start:i])
+                start = i
+                used = 0.0
+            used += w
+        pieces.append(word[start:])
+        return pieces
+
+
+_metrics = {}
+
+
+def metrics_for(style: Style) -> FontMetrics:
+    key = (style.font, style.size)
+    if key not in _metrics:
+        _metrics[key] = FontMetrics(style.font, style.size)
+    return _metrics[key]
+
+
+def wrap_words(words, metrics: FontMetrics, width: float) -> List[str]:
+    """
+    Greedy line filling with incrementally accumulated widths.
+    """
+    lines = []
+    current = []
+    used = 0.0
+    space = metrics.space
+    for word in words:
+        w = metrics.word(word)
+        if w > width:
+            # Flush and hard-break words that cannot fit on any line
+            if current:
+                lines.append(" ".join(current))
+            *full, word = metrics.split_word(word, width)
+            lines.extend(full)
+            w = metrics.word(word)
+            current, used = [word], w
+            continue
+        if not current:
+            current, used = [word], w
+        elif used + space + w <= width:
+            current.append(word)
+            used += space + w
+        else:
+            lines.append(" ".join(current))
+            current, used = [word], w
+    if current:
+        lines.append(" ".join(current))
+    return lines
+
+
+def parse_blocks(content: str):
+    """
+    Yield (kind, marker, text) blocks: kind is "h1".."h3", "item" or "body".
+    """
+    paragraph = []
+    for raw in (content or "").split("\n"):
+        line = raw.strip()
+        heading = HEADING_RE.match(line)
+        item = LIST_RE.match(raw)
+        if not line or heading or item:
+            if paragraph:
+                yield "body", None, " ".join(paragraph)
+                paragraph = []
+            if heading:
+                yield f"h{len(heading.group(1))}", None, heading.group(2)
+            elif item:
+                yield "item", item.group(1), item.group(2)
+            continue
+        paragraph.append(line)
+    if paragraph:
+        yield "body", None, " ".join(paragraph)
+
+
+def layout_document(title: str, content: str) -> Iterator[List[TextRun]]:
+    """
+    Lay out a note and yield the text runs of each page in order (at least one page).
+    """
+    heading = title[:100] if title else "Note"
+    page = [TextRun(LEFT_MARGIN, CONTINUATION_TOP, heading, STYLES["title"])]
+    y = BODY_TOP
+    previous = None
+
+    for kind, marker, text in parse_blocks(content):
+        style = STYLES["body"] if kind in ("item", "body") else STYLES[kind]
+        metrics = metrics_for(style)
+        indent = LIST_INDENT if kind == "item" else 0
+        lines = wrap_words(text.split(), metrics, MAX_WIDTH - indent)
+        if previous is not None and not (kind == "item" and previous == "item"):
+            y -= PARAGRAPH_GAP
+        y -= style.space_before
+        previous = kind
+
+        for index, line in enumerate(lines):
+            if y < BOTTOM_MARGIN:
+                yield page
+                page = []
+                y = CONTINUATION_TOP
+            if index == 0 and marker:
+                bullet = "•" if marker in ("-", "*", "•") else marker
+                page.append(TextRun(LEFT_MARGIN, y, bullet, style))
+            page.append(TextRun(LEFT_MARGIN + indent, y, line, style))
+            y -= style.leading
+
+    yield page
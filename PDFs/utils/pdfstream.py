@@ -0,0 +1,183 @@
+"""
+Minimal streaming PDF writer for laid-out text (see layout.layout_document).
+
+Each page is written to the output as soon as it is added, so memory holds one page
+of text runs plus a few integers per object, whatever the document size. The output
+only needs `write()`: files, temporary files and response streams all work.
+Standard Type 1 fonts (Helvetica family, WinAnsiEncoding) are referenced, not embedded.
+"""
+import zlib
+
+from reportlab.lib import colors
+
+from .layout import PAGE_HEIGHT, PAGE_WIDTH
+
+
+def _pdf_string(text: str) -> bytes:
+    """Literal string in WinAnsiEncoding with PDF escapes."""
+    raw = text.encode("cp1252", "replace")
+    out = bytearray(b"(")
+    for byte in raw:
+        if byte in (0x28, 0x29, 0x5C):  # ( ) \
+            out += b"\\" + bytes([byte])
+        elif byte < 0x20:
+            out += b"\\%03o" % byte
+        else:
+            out.append(byte)
+    out += b")"
+    return bytes(out)
+
+
+def _pdf_text_string(text: str) -> bytes:
+    """Text string (outline titles, document info) as UTF-16BE hex."""
+    return b"<FEFF" + text.encode("utf-16-be").hex().upper().encode() + b">"
+
+
+def _num(value: float) -> bytes:
+    return (b"%.2f" % value).rstrip(b"0").rstrip(b".")
+
+
+class StreamingPDFWriter:
+    CATALOG_ID = 1
+    PAGES_ID = 2
+
+    def __init__(self, fh, title: str = None, compress: bool = True):
+        self.fh = fh
+        self.title = title
+        self.compress = compress
+        self.position = 0
+        self.offsets = {}
+        self.next_id = 3
+        self.page_ids = []
+        self.outline = []
+        self.fonts = {}
+        self.font_ids = {}
+        self.resources_id = self._allocate()
+        self._write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+
+    def _allocate(self) -> int:
+        obj_id = self.next_id
+        self.next_id += 1
+        return obj_id
+
+    def _write(self, data: bytes):
+        self.fh.write(data)
+        self.position += len(data)
+
+    def _object(self, obj_id: int, body: bytes, stream: bytes = None):
+        self.offsets[obj_id] = self.position
+        self._write(b"%d 0 obj\n" % obj_id)
+        if stream is None:
+            self._write(body + b"\nendobj\n")
+        else:
+            self._write(body + b"\nstream\n" + stream + b"\nendstream\nendobj\n")
+
+    def _font_name(self, font: str) -> bytes:
+        if font not in self.fonts:
+            self.fonts[font] = b"F%d" % (len(self.fonts) + 1)
+            self.font_ids[font] = self._allocate()
+            self._object(
+                self.font_ids[font],
+                b"<< /Type /Font /Subtype /Type1 /BaseFont /%s /Encoding /WinAnsiEncoding >>"
+                % font.encode(),
+            )
+        return self.fonts[font]
+
+    def add_page(self, runs) -> int:
+        """Write one page of TextRuns; returns the page object id (for outlines)."""
+        ops = [b"BT"]
+        font = color = None
+        for run in runs:
+            style = run.style
+            if (style.font, style.size) != font:
+                font = (style.font, style.size)
+                ops.append(b"/%s %s Tf" % (self._font_name(style.font), _num(style.size)))
+            if style.color != color:
+                color = style.color
+                rgb = colors.HexColor(color)
+                ops.append(b"%s %s %s rg" % (_num(rgb.red), _num(rgb.green), _num(rgb.blue)))
+            ops.append(
+                b"1 0 0 1 %s %s Tm %s Tj" % (_num(run.x), _num(run.y), _pdf_string(run.text))
+            )
+        ops.append(b"ET")
+        content = b"\n".join(ops)
+
+        content_id = self._allocate()
+        if self.compress:
+            content = zlib.compress(content)
+            head = b"<< /Length %d /Filter /FlateDecode >>" % len(content)
+        else:
+            head = b"<< /Length %d >>" % len(content)
+        self._object(content_id, head, content)
+
+        page_id = self._allocate()
+        self._object(
+            page_id,
+            b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 %s %s] /Resources %d 0 R "
+            b"/Contents %d 0 R >>"
+            % (self.PAGES_ID, _num(PAGE_WIDTH), _num(PAGE_HEIGHT), self.resources_id, content_id),
+        )
+        self.page_ids.append(page_id)
+        return page_id
+
+    def add_outline(self, title: str, page_id: int, y: float):
+        """Add a top-level bookmark pointing at `y` on a written page."""
+        self.outline.append((title, page_id, y))
+
+    def _write_outline(self):
+        if not self.outline:
+            return None
+        root_id = self._allocate()
+        item_ids = [self._allocate() for _ in self.outline]
+        for index, (title, page_id, y) in enumerate(self.outline):
+            links = b""
+            if index > 0:
+                links += b" /Prev %d 0 R" % item_ids[index - 1]
+            if index < len(item_ids) - 1:
+                links += b" /Next %d 0 R" % item_ids[index + 1]
+            self._object(
+                item_ids[index],
+                b"<< /Title %s /Parent %d 0 R /Dest [%d 0 R /XYZ 0 %s 0]%s >>"
+                % (_pdf_text_string(title), root_id, page_id, _num(y), links),
+            )
+        self._object(
+            root_id,
+            b"<< /Type /Outlines /First %d 0 R /Last %d 0 R /Count %d >>"
+            % (item_ids[0], item_ids[-1], len(item_ids)),
+        )
+        return root_id
+
+    def close(self):
+        """Write the page tree, catalog, cross-reference table and trailer."""
+        if not self.page_ids:
+            self.add_page([])
+        fonts = b" ".join(
+            b"/%s %d 0 R" % (name, self.font_ids[font]) for font, name in self.fonts.items()
+        )
+        self._object(self.resources_id, b"<< /Font << %s >> >>" % fonts)
+        kids = b" ".join(b"%d 0 R" % page_id for page_id in self.page_ids)
+        self._object(
+            self.PAGES_ID, b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(self.page_ids))
+        )
+        outline_id = self._write_outline()
+        catalog = b"<< /Type /Catalog /Pages %d 0 R" % self.PAGES_ID
+        if outline_id:
+            catalog += b" /Outlines %d 0 R /PageMode /UseOutlines" % outline_id
+        self._object(self.CATALOG_ID, catalog + b" >>")
+
+        info_id = self._allocate()
+        info = b"<< /Producer (EduNova)"
+        if self.title:
+            info += b" /Title " + _pdf_text_string(self.title)
+        self._object(info_id, info + b" >>")
+
+        xref_at = self.position
+        size = self.next_id
+        rows = [b"xref\n0 %d\n" % size, b"0000000000 65535 f \n"]
+        for obj_id in range(1, size):
+            rows.append(b"%010d 00000 n \n" % self.offsets[obj_id])
+        self._write(b"".join(rows))
+        self._write(
+            b"trailer\n<< /Size %d /Root %d 0 R /Info %d 0 R >>\nstartxref\n%d\n%%%%EOF\n"
+            % (size, self.CATALOG_ID, info_id, xref_at)
+        )
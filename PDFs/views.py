@@ -1,15 +1,31 @@
-from django.http import FileResponse, Http404
-from rest_framework import generics, permissions
+import hashlib
+import os
+import uuid
+import zlib
+
+from django.conf import settings
+from django.db import transaction
+from django.http import Http404
+from rest_framework import generics, permissions, status
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from rest_framework.pagination import PageNumberPagination
-from django.db.models import Q
 
-from .models import PDF
-from .serializers import PDFSerializer
+from edunova.pagination import KeysetPageNumberPagination
+from edunova.search import next_page_link, page_window, query_terms
+from edunova.serializers import CompiledListMixin, CompiledRowSerializer
+
+from .models import PDF, PDFUploadSession
+from .search import search_pages
+from .serializers import PDFSerializer, PDFUploadSessionSerializer
+from .storage import LocalTempFile, blob_sha256
+from .utils.delivery import offload_pdf_file, serve_pdf_file
+
+UPLOAD_READ_SIZE = 64 * 1024
 
 
-class PDFPagination(PageNumberPagination):
+class PDFPagination(KeysetPageNumberPagination):
+    # ?cursor= walks (created_at, id) on the (uploaded_by|is_public, created_at) indexes
+    keyset_field = 'created_at'
     page_size = 10
     page_size_query_param = 'page_size'
     max_page_size = 50
@@ -21,16 +37,17 @@ class PDFUploadCreateView(generics.CreateAPIView):
     permission_classes = [permissions.IsAuthenticated]
 
 
-class PDFListView(generics.ListAPIView):
+class PDFListView(CompiledListMixin, generics.ListAPIView):
     serializer_class = PDFSerializer
+    # list pages render .values() rows (same JSON as PDFSerializer)
+    row_serializer = CompiledRowSerializer(PDFSerializer)
     permission_classes = [permissions.IsAuthenticated]
     pagination_class = PDFPagination
 
     def get_queryset(self):
-        user = self.request.user
         return (
             PDF.objects.select_related('linked_note', 'uploaded_by')
-            .filter(Q(uploaded_by=user) | Q(is_public=True))
+            .visible_to(self.request.user)
             .order_by('-created_at')
         )
 
@@ -41,20 +58,52 @@ class PDFRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
 
     def get_queryset(self):
         # Allow owners to access; public readable by anyone authenticated
-        user = self.request.user
-        return PDF.objects.select_related('linked_note', 'uploaded_by').filter(
-            Q(uploaded_by=user) | Q(is_public=True)
+        return PDF.objects.select_related('linked_note', 'uploaded_by').visible_to(
+            self.request.user
         )
 
     def perform_destroy(self, instance):
-        # Delete associated file from storage
-        if instance.file:
-            instance.file.delete(save=False)
         if instance.cover_image:
             instance.cover_image.delete(save=False)
+        # The file blob may be shared with other PDFs; collect_pdf_blobs removes it once
+        # nothing points at it
         super().perform_destroy(instance)
 
 
+class PDFSearchView(APIView):
+    """
+    Full-text search inside the PDFs the user may read: `?q=` (every word must match,
+    as a prefix), `?page=`, `?page_size=`. Each result is a PDF with the matching `page`
+    number, its `rank` and an HTML `snippet` with matches wrapped in <mark>.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    page_size = 10
+    max_page_size = 50
+
+    def get(self, request):
+        text = request.query_params.get('q', '')
+        if not query_terms(text):
+            return Response(
+                {'detail': 'Query parameter "q" is required.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        page, page_size, offset = page_window(request, self.page_size, self.max_page_size)
+        hits = search_pages(text, request.user, page_size + 1, offset)
+        has_next = len(hits) > page_size
+        hits = hits[:page_size]
+
+        pdfs = PDF.objects.select_related('linked_note', 'uploaded_by').in_bulk(
+            [pdf_id for pdf_id, _, _, _ in hits]
+        )
+        results = []
+        for pdf_id, page_number, rank, snippet in hits:
+            if pdf_id in pdfs:
+                data = PDFSerializer(pdfs[pdf_id], context={'request': request}).data
+                data.update(page=page_number, rank=rank, snippet=snippet)
+                results.append(data)
+        return Response({'next': next_page_link(request, page, has_next), 'results': results})
+
+
 class PDFDownloadView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
@@ -70,9 +119,184 @@ class PDFDownloadView(APIView):
         if not pdf.file:
             raise Http404
 
-        response = FileResponse(pdf.file.open('rb'), content_type='application/pdf')
-        disposition = f'attachment; filename="{pdf.file_name or (str(pdf.id) + ".pdf")}"'
-        response['Content-Disposition'] = disposition
+        filename = pdf.file_name or (str(pdf.id) + ".pdf")
+        # Let the front proxy move the bytes when configured; it handles ranges itself
+        response = offload_pdf_file(pdf, filename)
+        if response is None:
+            # Conditional GET and byte ranges let PDF viewers revalidate and page lazily
+            response = serve_pdf_file(request, pdf, filename)
         return response
 
 
+# Resumable uploads: initiate -> PUT chunks at Upload-Offset -> finalize
+class PDFUploadSessionCreateView(generics.CreateAPIView):
+    serializer_class = PDFUploadSessionSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def perform_create(self, serializer):
+        session = serializer.save(owner=self.request.user)
+        open(session.temp_path, 'wb').close()
+
+
+class PDFUploadSessionView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_session(self, request, pk, lock=False):
+        sessions = PDFUploadSession.objects.filter(owner=request.user)
+        if lock:
+            sessions = sessions.select_for_update()
+        try:
+            return sessions.get(pk=pk)
+        except PDFUploadSession.DoesNotExist:
+            raise Http404
+
+    def get(self, request, pk):
+        # Clients call this after a dropped connection to learn where to resume
+        session = self.get_session(request, pk)
+        return Response(PDFUploadSessionSerializer(session).data)
+
+    def put(self, request, pk):
+        try:
+            offset = int(request.headers['Upload-Offset'])
+            length = int(request.META.get('CONTENT_LENGTH') or 0)
+        except (KeyError, ValueError):
+            return Response(
+                {'detail': 'Upload-Offset and Content-Length headers are required.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if length <= 0:
+            return Response({'detail': 'Empty chunk.'}, status=status.HTTP_400_BAD_REQUEST)
+        if length > settings.PDF_UPLOAD_CHUNK_MAX_BYTES:
+            return Response(
+                {'detail': f'Chunks must be <= {settings.PDF_UPLOAD_CHUNK_MAX_BYTES} bytes.'},
+                status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            )
+
+        # Cheap early answers for a stale offset or an oversized chunk, before the body
+        session = self.get_session(request, pk)
+        error = self.check_chunk(session, offset, length)
+        if error:
+            return error
+
+        # The body is read from the network into a scratch file with no transaction or
+        # lock held, so a slow client does not block finalize/abort on the session
+        scratch = f'{session.temp_path}.{uuid.uuid4().hex}.chunk'
+        try:
+            digest = hashlib.sha256()
+            received = 0
+            with open(scratch, 'wb') as fh:
+                while received < length:
+                    block = request.stream.read(min(UPLOAD_READ_SIZE, length - received))
+                    if not block:
+                        break
+                    fh.write(block)
+                    digest.update(block)
+                    received += len(block)
+
+            expected = request.headers.get('X-Chunk-SHA256')
+            error = None
+            if received != length:
+                error = 'Chunk was truncated.'
+            elif expected and expected.lower() != digest.hexdigest():
+                error = 'Chunk checksum mismatch.'
+            if error:
+                return Response(
+                    {'detail': error, 'offset': session.offset},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+
+            # Commit: re-check the offset under the lock and append from local disk
+            with transaction.atomic():
+                session = self.get_session(request, pk, lock=True)
+                error = self.check_chunk(session, offset, length)
+                if error:
+                    return error
+                checksum = session.checksum
+                mode = 'r+b' if os.path.exists(session.temp_path) else 'w+b'
+                with open(session.temp_path, mode) as out, open(scratch, 'rb') as chunk:
+                    # Drop any bytes a previously interrupted commit left past the offset
+                    out.seek(offset)
+                    out.truncate()
+                    for block in iter(lambda: chunk.read(UPLOAD_READ_SIZE), b''):
+                        out.write(block)
+                        checksum = zlib.crc32(block, checksum)
+                session.offset = offset + length
+                session.checksum = checksum
+                session.save(update_fields=['offset', 'checksum', 'updated_at'])
+        finally:
+            try:
+                os.remove(scratch)
+            except FileNotFoundError:
+                pass
+        return Response(PDFUploadSessionSerializer(session).data)
+
+    def check_chunk(self, session, offset, length):
+        if offset != session.offset:
+            return Response(
+                {'detail': 'Offset mismatch.', 'offset': session.offset},
+                status=status.HTTP_409_CONFLICT,
+            )
+        if offset + length > session.total_size:
+            return Response(
+                {'detail': 'Chunk exceeds the declared total_size.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        return None
+
+    def delete(self, request, pk):
+        with transaction.atomic():
+            self.get_session(request, pk, lock=True).discard()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class PDFUploadSessionFinalizeView(PDFUploadSessionView):
+    http_method_names = ['post', 'options']
+
+    def post(self, request, pk):
+        # Locked like a chunk PUT: a concurrent retry waits here and then finds the
+        # session gone (404) instead of reading a temp file that was moved away
+        with transaction.atomic():
+            session = self.get_session(request, pk, lock=True)
+            return self.finalize(request, session)
+
+    def finalize(self, request, session):
+        if session.offset != session.total_size:
+            return Response(
+                {'detail': 'Upload is incomplete.', 'offset': session.offset},
+                status=status.HTTP_409_CONFLICT,
+            )
+        if not os.path.exists(session.temp_path):
+            # the partial file was removed (expire_pdf_uploads); the session is dead too
+            session.discard()
+            return Response({'detail': 'Upload expired.'}, status=status.HTTP_404_NOT_FOUND)
+        with open(session.temp_path, 'rb') as fh:
+            if fh.read(5) != b'%PDF-':
+                return Response(
+                    {'detail': 'Uploaded file must be a PDF'}, status=status.HTTP_400_BAD_REQUEST
+                )
+
+        pdf = PDF(
+            file_name=session.file_name,
+            title=session.title,
+            description=session.description,
+            linked_note=session.linked_note,
+            uploaded_by=request.user,
+            is_public=session.is_public,
+        )
+        # The storage hashes the assembled file from disk and moves it into place
+        with open(session.temp_path, 'rb') as fh:
+            pdf.file.save(session.file_name, LocalTempFile(fh), save=False)
+
+        expected = (request.data.get('sha256') or '').lower()
+        if expected and expected != blob_sha256(pdf.file.name):
+            # the stored blob is left to collect_pdf_blobs
+            session.discard()
+            return Response(
+                {'detail': 'File checksum mismatch; upload discarded.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        pdf.save()
+        session.discard()
+        data = PDFSerializer(pdf, context={'request': request}).data
+        return Response(data, status=status.HTTP_201_CREATED)
@@ -0,0 +1,129 @@
+"""
+JWT authentication without the per-request user query.
+
+Access tokens issued by MyTokenObtainPairSerializer carry the user's id, username, email,
+role, is_active and email_verified, plus `auth_version`: a digest of those values and
+the password hash. For safe (read-only) requests, ClaimsJWTAuthentication builds
+request.user from the claims when `auth_version` still matches the user's current
+version. Current versions are kept in a per-process cache for JWT_CLAIMS_USER_TTL
+seconds, so a client making many requests costs one small query per TTL instead of one
+per request.
+
+Writes, tokens without `auth_version` (issued before it existed) and tokens whose
+version is stale (password, role or activation changed since) go through the regular
+database lookup of JWTAuthentication. A change made in another process reaches this
+one within the TTL.
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import router
+from django.db.models.signals import post_delete, post_save
+from django.utils.crypto import salted_hmac
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings
+
+User = get_user_model()
+
+AUTH_VERSION_CLAIM = "auth_version"
+# User fields carried as claims (besides the id); the rest load from the database
+# only if a view reads them
+CLAIM_FIELDS = ("username", "email", "role", "is_active", "email_verified")
+VERSION_FIELDS = CLAIM_FIELDS + ("password",)
+# entries kept by the per-process version cache before it is cleared
+VERSION_CACHE_MAX_ENTRIES = 10000
+
+_versions = {}
+_versions_lock = threading.Lock()
+
+
+def auth_version(values):
+    """Digest of a user's claim fields and password hash, given as a dict."""
+    message = "|".join(str(values[name]) for name in VERSION_FIELDS)
+    return salted_hmac("accounts.auth_version", message, algorithm="sha256").hexdigest()[:20]
+
+
+def user_auth_version(user):
+    return auth_version({name: getattr(user, name) for name in VERSION_FIELDS})
+
+
+def current_auth_version(user_id):
+    """The user's auth version, from the per-process cache or one query."""
+    # keyed like the token's user id claim, which simplejwt stores as a string
+    user_id = str(user_id)
+    now = time.monotonic()
+    cached = _versions.get(user_id)
+    if cached is not None and cached[0] > now:
+        return cached[1]
+    values = User.objects.filter(pk=user_id).values(*VERSION_FIELDS).first()
+    version = auth_version(values) if values is not None else None
+    with _versions_lock:
+        if len(_versions) >= VERSION_CACHE_MAX_ENTRIES:
+            _versions.clear()
+        _versions[user_id] = (now + settings.JWT_CLAIMS_USER_TTL, version)
+    return version
+
+
+def forget_auth_version(user_id):
+    with _versions_lock:
+        _versions.pop(str(user_id), None)
+
+
+def _user_changed(sender, instance, **kwargs):
+    forget_auth_version(instance.pk)
+
+
+post_save.connect(_user_changed, sender=User, dispatch_uid="accounts.auth_version.save")
+post_delete.connect(_user_changed, sender=User, dispatch_uid="accounts.auth_version.delete")
+
+
+def token_user(validated_token):
+    """
+    A User built from the token's claims, as if loaded with `.only()`: the claim fields
+    are set, any other field is loaded from the database on first access.
+    """
+    values = {
+        api_settings.USER_ID_FIELD: validated_token[api_settings.USER_ID_CLAIM],
+        **{name: validated_token[name] for name in CLAIM_FIELDS},
+    }
+    fields = [f for f in User._meta.concrete_fields if f.attname in values]
+    return User.from_db(
+        router.db_for_read(User),
+        [f.attname for f in fields],
+        [f.to_python(values[f.attname]) for f in fields],
+    )
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that serves safe requests from the token's claims while its
+    `auth_version` is current, and falls back to the database lookup otherwise.
+    """
+
+    def authenticate(self, request):
+        if request.method not in SAFE_METHODS or settings.JWT_CLAIMS_USER_TTL <= 0:
+            return super().authenticate(request)
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+        validated_token = self.get_validated_token(raw_token)
+        return self.get_claims_user(validated_token), validated_token
+
+    def get_claims_user(self, validated_token):
+        version = validated_token.get(AUTH_VERSION_CLAIM)
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        if (
+            version is not None
+            and user_id is not None
+            and all(name in validated_token for name in CLAIM_FIELDS)
+            and validated_token["is_active"]
+            and current_auth_version(user_id) == version
+        ):
+            return token_user(validated_token)
+        return self.get_user(validated_token)
@@ -0,0 +1,115 @@
+"""
+Google ID token verification with cached signing keys.
+
+google.oauth2.id_token.verify_oauth2_token downloads Google's signing certificates on
+every call. verify_google_id_token() keeps them for as long as Google's Cache-Control
+max-age allows: parsed public keys in process memory, the certificates themselves in
+the shared cache (so a new worker does not fetch them again), and verifies signatures
+locally with PyJWT.
+
+A token signed with a key id we do not know triggers one early refetch (Google may have
+rotated its keys), at most every REFETCH_INTERVAL seconds.
+"""
+import re
+import threading
+import time
+
+import jwt
+import requests
+from cryptography.x509 import load_pem_x509_certificate
+from django.conf import settings
+from django.core.cache import cache
+
+GOOGLE_ISSUERS = ("accounts.google.com", "https://accounts.google.com")
+CACHE_KEY = "google-auth:certs"
+# seconds the certificates are kept when the response carries no max-age
+DEFAULT_MAX_AGE = 300
+REFETCH_INTERVAL = 30
+FETCH_TIMEOUT = 5
+
+_lock = threading.Lock()
+_keys = {}
+_expires = 0.0
+_last_fetch = float("-inf")
+
+
+class GoogleCertsUnavailable(Exception):
+    """Google's signing certificates could not be fetched."""
+
+
+def _max_age(headers):
+    match = re.search(r"max-age=(\d+)", headers.get("Cache-Control", ""))
+    if match is None:
+        return DEFAULT_MAX_AGE
+    age = headers.get("Age", "0")
+    return max(0, int(match.group(1)) - (int(age) if age.isdigit() else 0))
+
+
+def _fetch_certs():
+    global _last_fetch
+    _last_fetch = time.monotonic()
+    try:
+        response = requests.get(settings.GOOGLE_CERTS_URL, timeout=FETCH_TIMEOUT)
+        response.raise_for_status()
+        certs = response.json()
+    except (requests.RequestException, ValueError) as exc:
+        raise GoogleCertsUnavailable(f"Could not fetch Google certificates: {exc}") from exc
+    return certs, _max_age(response.headers)
+
+
+def _signing_keys(refresh=False):
+    """Public keys by key id, from this process, the shared cache or Google."""
+    global _keys, _expires
+    if not refresh and time.time() < _expires:
+        return _keys
+    with _lock:
+        now = time.time()
+        if not refresh and now < _expires:
+            return _keys
+        stored = None if refresh else cache.get(CACHE_KEY)
+        if stored is None:
+            certs, max_age = _fetch_certs()
+            stored = {"certs": certs, "expires": now + max_age}
+            if max_age:
+                cache.set(CACHE_KEY, stored, timeout=max_age)
+        _keys = {
+            kid: load_pem_x509_certificate(pem.encode("ascii")).public_key()
+            for kid, pem in stored["certs"].items()
+        }
+        _expires = stored["expires"]
+        return _keys
+
+
+def clear_key_cache():
+    """Forget the cached certificates, here and in the shared cache."""
+    global _keys, _expires, _last_fetch
+    with _lock:
+        _keys, _expires, _last_fetch = {}, 0.0, float("-inf")
+    cache.delete(CACHE_KEY)
+
+
+def verify_google_id_token(token, audience):
+    """
+    The claims of a Google-signed ID token issued for `audience`. Raises ValueError if
+    the token is malformed, expired, or not signed by Google for this audience, and
+    GoogleCertsUnavailable if the certificates could not be fetched.
+    """
+    try:
+        kid = jwt.get_unverified_header(token).get("kid")
+    except jwt.InvalidTokenError as exc:
+        raise ValueError(f"Malformed ID token: {exc}") from exc
+    keys = _signing_keys()
+    if kid not in keys and time.monotonic() - _last_fetch >= REFETCH_INTERVAL:
+        keys = _signing_keys(refresh=True)
+    if kid not in keys:
+        raise ValueError("ID token is signed with an unknown key.")
+    try:
+        claims = jwt.decode(
+            token, keys[kid], algorithms=["RS256"], audience=audience,
+            options={"require": ["exp", "iat", "iss", "aud"]},
+        )
+    except jwt.InvalidTokenError as exc:
+        raise ValueError(f"Invalid ID token: {exc}") from exc
+    if claims["iss"] not in GOOGLE_ISSUERS:
+        raise ValueError(f"Wrong issuer: {claims['iss']}")
+    return claims
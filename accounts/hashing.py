@@ -0,0 +1,185 @@
+"""
+Password hashing in worker processes.
+
+Password hashes are deliberately CPU-expensive (hundreds of ms with PBKDF2). These
+helpers run them in worker processes, off the web process's own CPU time:
+
+- hash_passwords() hashes a batch in a pool the caller owns (imports).
+- make_password() / check_password() are the django.contrib.auth.hashers functions run
+  in this process's shared pool of PASSWORD_HASH_WORKERS processes (User.set_password
+  and User.check_password use them, so logins, registration and password changes all
+  do). With PASSWORD_HASH_WORKERS = 0 they hash on the calling thread.
+
+Admission control: at most PASSWORD_HASH_MAX_PENDING hashes run or wait in the shared
+pool at once; a caller that cannot get a slot within PASSWORD_HASH_QUEUE_TIMEOUT
+seconds gets HashingOverloaded (503). With Gunicorn's threaded workers (the default in
+gunicorn_config.py, which enables the pool) a login storm therefore holds a bounded number of web threads and a
+bounded share of the CPUs, and the other threads keep serving cheap requests. stats()
+reports the queue depth.
+"""
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import django
+from django.conf import settings
+from django.contrib.auth import hashers
+
+from edunova.exceptions import ServiceUnavailable
+
+logger = logging.getLogger(__name__)
+
+# passwords sent to a worker per task
+HASH_CHUNK_SIZE = 8
+# pending hashes per worker process when PASSWORD_HASH_MAX_PENDING is 0
+PENDING_PER_WORKER = 4
+
+
+class HashingOverloaded(ServiceUnavailable):
+    default_detail = 'Too many password checks in progress, try again shortly.'
+    default_code = 'password_hashing_overloaded'
+
+
+def hashing_pool(workers=None, mp_context=None):
+    """A process pool ready to run password hashers (`workers` defaults to the CPUs)."""
+    # spawned workers (macOS, Windows, forkserver) start without Django configured
+    return ProcessPoolExecutor(
+        max_workers=workers, mp_context=mp_context, initializer=django.setup
+    )
+
+
+def hash_passwords(passwords, pool=None):
+    """
+    make_password() for each of `passwords`, in order, using `pool` when given. None
+    gives an unusable password, computed here since it involves no hashing.
+    """
+    hashed = [hashers.make_password(None) if p is None else None for p in passwords]
+    pending = [i for i, password in enumerate(passwords) if password is not None]
+    values = [passwords[i] for i in pending]
+    if pool is None:
+        results = map(hashers.make_password, values)
+    else:
+        results = pool.map(hashers.make_password, values, chunksize=HASH_CHUNK_SIZE)
+    for i, value in zip(pending, results):
+        hashed[i] = value
+    return hashed
+
+
+class _SharedPool:
+    """The per-process pool behind make_password()/check_password(), created lazily."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.executor = None
+        self.slots = None
+        self.capacity = 0
+        self.pending = 0
+        self.rejected = 0
+
+    def start(self):
+        with self.lock:
+            if self.executor is None:
+                workers = settings.PASSWORD_HASH_WORKERS
+                self.capacity = (
+                    settings.PASSWORD_HASH_MAX_PENDING or workers * PENDING_PER_WORKER
+                )
+                self.slots = threading.BoundedSemaphore(self.capacity)
+                # not fork: the web process may be running threads
+                methods = multiprocessing.get_all_start_methods()
+                context = multiprocessing.get_context(
+                    "forkserver" if "forkserver" in methods else "spawn"
+                )
+                self.executor = hashing_pool(workers, context)
+            return self.executor, self.slots
+
+    def run(self, func, *args):
+        executor, slots = self.start()
+        if not slots.acquire(timeout=settings.PASSWORD_HASH_QUEUE_TIMEOUT):
+            with self.lock:
+                self.rejected += 1
+            logger.warning("Password hashing queue full (%s pending)", self.capacity)
+            raise HashingOverloaded()
+        with self.lock:
+            self.pending += 1
+        try:
+            return executor.submit(func, *args).result()
+        except BrokenProcessPool:
+            # a worker died; the next call starts a new pool
+            self.reset(executor)
+            raise ServiceUnavailable("Password hashing is restarting, try again shortly.")
+        finally:
+            with self.lock:
+                self.pending -= 1
+            slots.release()
+
+    def reset(self, executor=None):
+        with self.lock:
+            if executor is None or executor is self.executor:
+                self.executor = None
+
+    def shutdown(self):
+        """Stop the workers and start over (counters included) on the next call."""
+        with self.lock:
+            executor = self.executor
+            self.__init__()
+        if executor is not None:
+            executor.shutdown()
+
+
+_shared = _SharedPool()
+# a forked child (e.g. a gunicorn worker forked after the pool started) gets its own
+os.register_at_fork(after_in_child=lambda: _shared.__init__())
+
+
+def _run(func, *args):
+    if settings.PASSWORD_HASH_WORKERS <= 0:
+        return func(*args)
+    return _shared.run(func, *args)
+
+
+def make_password(password):
+    """django.contrib.auth.hashers.make_password, in the shared pool."""
+    if password is None:
+        return hashers.make_password(None)
+    return _run(hashers.make_password, password)
+
+
+def check_password(password, encoded, setter=None):
+    """
+    django.contrib.auth.hashers.check_password, in the shared pool. `setter` is called
+    here (with the raw password) when the password is correct but its hash should be
+    upgraded to the preferred hasher.
+
+    A missing password or an unusable hash goes to the pool too: Django hashes a random
+    password for them, so these checks take as long as real ones.
+    """
+    correct = _run(hashers.check_password, password, encoded)
+    if correct and setter is not None and _must_update(encoded):
+        setter(password)
+    return correct
+
+
+def _must_update(encoded):
+    preferred = hashers.get_hasher("default")
+    try:
+        hasher = hashers.identify_hasher(encoded)
+    except ValueError:
+        return False
+    return hasher.algorithm != preferred.algorithm or preferred.must_update(encoded)
+
+
+def stats():
+    """
+    Shared pool metrics: enabled (False when PASSWORD_HASH_WORKERS is 0 and hashing runs
+    on the request thread), workers, capacity, pending (queue depth), rejected.
+    """
+    return {
+        "enabled": settings.PASSWORD_HASH_WORKERS > 0,
+        "workers": settings.PASSWORD_HASH_WORKERS,
+        "capacity": _shared.capacity,
+        "pending": _shared.pending,
+        "rejected": _shared.rejected,
+    }
@@ -0,0 +1,184 @@
+import contextlib
+import csv
+import io
+import json
+import os
+import sys
+import time
+from itertools import islice
+
+from django.contrib.auth.password_validation import validate_password
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.core.validators import validate_email
+from django.db import IntegrityError, transaction
+
+from accounts.hashing import hash_passwords, hashing_pool
+from accounts.models import (
+    HANDLE_SAVE_ATTEMPTS, ROLE_CHOICES, Profile, User, allocate_handles,
+)
+
+ROLES = {value for value, _ in ROLE_CHOICES}
+FULL_NAME_MAX_LENGTH = Profile._meta.get_field("full_name").max_length
+
+
+class Command(BaseCommand):
+    help = (
+        "Create users (and their profiles) from a CSV or JSON Lines roster, streaming: "
+        "columns email, username, password, role, full_name; only email is required. "
+        "Rows without a password get an unusable one (set it through a reset). Existing "
+        "and duplicate emails are skipped and reported."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Roster file, or - for standard input.")
+        parser.add_argument(
+            "--format", choices=["csv", "jsonl"],
+            help="Input format (default: from the file extension, else csv).",
+        )
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--workers", type=int, default=os.cpu_count(),
+            help="Processes hashing passwords (0 or 1 hashes in this process).",
+        )
+        parser.add_argument("--role", default="student", choices=sorted(ROLES))
+        parser.add_argument(
+            "--skip-password-validation", action="store_true",
+            help="Accept passwords the AUTH_PASSWORD_VALIDATORS would reject.",
+        )
+
+    def handle(self, *args, **options):
+        self.options = options
+        self.seen = set()
+        self.imported = self.skipped = 0
+        started = time.monotonic()
+        workers = options["workers"] or 0
+        with self.open_roster() as rows:
+            pool = hashing_pool(workers) if workers > 1 else contextlib.nullcontext()
+            with pool as pool:
+                while True:
+                    chunk = list(islice(rows, options["batch_size"]))
+                    if not chunk:
+                        break
+                    self.import_chunk(chunk, pool)
+                    elapsed = time.monotonic() - started
+                    self.stdout.write(
+                        f"Imported {self.imported} user(s), skipped {self.skipped} "
+                        f"({elapsed:.1f} s)..."
+                    )
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {self.imported} user(s), skipped {self.skipped}."
+        ))
+
+    @contextlib.contextmanager
+    def open_roster(self):
+        path = self.options["path"]
+        kind = self.options["format"]
+        if kind is None:
+            kind = "jsonl" if path.endswith((".jsonl", ".ndjson")) else "csv"
+        if path == "-":
+            handle = contextlib.nullcontext(
+                io.TextIOWrapper(sys.stdin.buffer, encoding="utf-8-sig", newline="")
+            )
+        else:
+            try:
+                handle = open(path, encoding="utf-8-sig", newline="")
+            except OSError as exc:
+                raise CommandError(f"Cannot read {path}: {exc}")
+        with handle as stream:
+            yield self.read_jsonl(stream) if kind == "jsonl" else self.read_csv(stream)
+
+    def read_csv(self, stream):
+        # line 1 is the header
+        for line, row in enumerate(csv.DictReader(stream), start=2):
+            yield line, row
+
+    def read_jsonl(self, stream):
+        for line, text in enumerate(stream, start=1):
+            if not text.strip():
+                continue
+            try:
+                row = json.loads(text)
+            except ValueError:
+                row = None
+            yield line, row if isinstance(row, dict) else None
+
+    def skip(self, line, reason):
+        self.skipped += 1
+        self.stderr.write(f"line {line}: {reason}")
+
+    def parse(self, line, row):
+        """The user fields, password and full name of a row, or None if it is skipped."""
+        if row is None:
+            return self.skip(line, "not a JSON object")
+        row = {
+            key.strip().lower(): "" if value is None else str(value).strip()
+            for key, value in row.items() if key
+        }
+        email = User.objects.normalize_email(row.get("email", ""))
+        try:
+            validate_email(email)
+        except ValidationError:
+            return self.skip(line, f"invalid email {email!r}")
+        if email in self.seen:
+            return self.skip(line, f"{email} appears more than once")
+        self.seen.add(email)
+
+        role = row.get("role") or self.options["role"]
+        if role not in ROLES:
+            return self.skip(line, f"unknown role {role!r}")
+        user = User(email=email, username=row.get("username") or email.split("@")[0], role=role)
+        # field limits are checked here: a database error would abort the whole import
+        try:
+            user.clean_fields(exclude=["password", "handle"])
+        except ValidationError as exc:
+            return self.skip(line, "; ".join(
+                f"{field}: {' '.join(messages)}" for field, messages in exc.message_dict.items()
+            ))
+        full_name = row.get("full_name", "")
+        if len(full_name) > FULL_NAME_MAX_LENGTH:
+            return self.skip(line, f"full_name is longer than {FULL_NAME_MAX_LENGTH} characters")
+        password = row.get("password") or None
+        if password and not self.options["skip_password_validation"]:
+            try:
+                validate_password(password, user)
+            except ValidationError as exc:
+                return self.skip(line, f"password rejected: {' '.join(exc.messages)}")
+        return line, user, password, full_name
+
+    def import_chunk(self, chunk, pool):
+        parsed = [item for item in (self.parse(line, row) for line, row in chunk) if item]
+        registered = set(
+            User.objects.filter(email__in=[user.email for _, user, _, _ in parsed])
+            .values_list("email", flat=True)
+        )
+        entries = []
+        for line, user, password, full_name in parsed:
+            if user.email in registered:
+                self.skip(line, f"{user.email} is already registered")
+            else:
+                entries.append((user, password, full_name))
+        if not entries:
+            return
+
+        hashes = hash_passwords([password for _, password, _ in entries], pool)
+        users = [user for user, _, _ in entries]
+        for user, password in zip(users, hashes):
+            user.password = password
+        for attempt in range(HANDLE_SAVE_ATTEMPTS):
+            # handles are allocated last, so a conflicting signup only costs a retry
+            for user, handle in zip(users, allocate_handles([u.username for u in users])):
+                user.handle = handle
+            try:
+                with transaction.atomic():
+                    User.objects.bulk_create(users)
+                    Profile.objects.bulk_create(
+                        [Profile(user=user, full_name=name) for user, _, name in entries]
+                    )
+                break
+            except IntegrityError as exc:
+                for user in users:
+                    user.pk = None
+                if attempt == HANDLE_SAVE_ATTEMPTS - 1:
+                    raise CommandError(f"Could not insert a batch: {exc}")
+        self.imported += len(users)
@@ -1,4 +1,8 @@
-from django.db import models
+import re
+
+from django.db import IntegrityError, models, transaction
+from django.db.models import Q
+from django.db.models.functions import Length
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 from django.contrib.auth.models import AbstractUser
@@ -50,17 +54,91 @@ class User(AbstractUser):
     def __str__(self):
         return self.email
 
+    # Hashing runs in the password hashing pool when it is enabled (accounts.hashing,
+    # imported here because it loads DRF, which needs this model)
+    def set_password(self, raw_password):
+        from .hashing import make_password
+
+        self.password = make_password(raw_password)
+        self._password = raw_password
+
+    def check_password(self, raw_password):
+        from .hashing import check_password
+
+        def setter(raw_password):
+            self.set_password(raw_password)
+            self._password = None
+            self.save(update_fields=["password"])
+
+        return check_password(raw_password, self.password, setter)
+
     def save(self, *args, **kwargs):
-        # Auto-generate unique handle (@username)
-        if not self.handle:
-            base = slugify(self.username)
-            counter = 1
-            unique_handle = f"@{base}"
-            while User.objects.filter(handle=unique_handle).exists():
-                unique_handle = f"@{base}{counter}"
-                counter += 1
-            self.handle = unique_handle
-        super().save(*args, **kwargs)
+        if self.handle:
+            return super().save(*args, **kwargs)
+        # Auto-generate unique handle (@username): take the first free one and let the
+        # unique constraint settle races, retrying with a fresh handle if one is lost
+        for attempt in range(HANDLE_SAVE_ATTEMPTS):
+            self.handle = allocate_handles([self.username])[0]
+            try:
+                with transaction.atomic():
+                    return super().save(*args, **kwargs)
+            except IntegrityError:
+                taken = User.objects.filter(handle=self.handle).exists()
+                self.handle = ""
+                if not taken or attempt == HANDLE_SAVE_ATTEMPTS - 1:
+                    raise
+
+
+# ------------------------------------------------------
+# HANDLES
+# ------------------------------------------------------
+
+HANDLE_SAVE_ATTEMPTS = 5
+
+
+def _taken_numbers(prefix):
+    """
+    Numbers taken after `prefix` (0 for the prefix itself), from one query on the handle
+    index.
+    """
+    handles = (
+        User.objects.filter(handle__startswith=prefix)
+        .filter(Q(handle=prefix) | Q(handle__regex=rf"^{re.escape(prefix)}[1-9][0-9]*$"))
+        .values_list("handle", flat=True)
+    )
+    return {int(handle[len(prefix):] or 0) for handle in handles}
+
+
+def allocate_handles(usernames):
+    """
+    Free handles for `usernames`, in order: the first of "@base", "@base1", "@base2", ...
+    not taken yet, where base is the slugified username cut to fit the column. A stray
+    "@base2024" does not push later handles past it. One query per distinct base;
+    handles are not reserved, so concurrent writers can still collide and inserts should
+    retry on IntegrityError (as User.save does).
+    """
+    groups = {}
+    for index, username in enumerate(usernames):
+        groups.setdefault(slugify(username), []).append(index)
+
+    max_length = User._meta.get_field("handle").max_length
+    handles = [None] * len(usernames)
+    for base, indexes in groups.items():
+        suffix_chars = 0
+        while True:
+            prefix = "@" + base[:max_length - 1 - suffix_chars]
+            taken = _taken_numbers(prefix)
+            # at most len(taken) of the first len(taken) + len(indexes) numbers are taken
+            numbers = [
+                number for number in range(len(taken) + len(indexes)) if number not in taken
+            ][:len(indexes)]
+            # cut the base shorter when the numbers no longer fit
+            suffix_chars = len(str(numbers[-1] or ""))
+            if len(prefix) + suffix_chars <= max_length:
+                break
+        for index, number in zip(indexes, numbers):
+            handles[index] = f"{prefix}{number}" if number else prefix
+    return handles
 
 
 # ------------------------------------------------------
@@ -5,11 +5,12 @@ from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 from rest_framework.exceptions import ValidationError
 from django.utils.translation import gettext_lazy as _
 
+from .authentication import AUTH_VERSION_CLAIM, user_auth_version
+from .google_auth import GoogleCertsUnavailable, verify_google_id_token
 from .models import Profile
 
-from google.auth.transport import requests as google_requests
-from google.oauth2 import id_token
 from django.conf import settings
+from edunova.exceptions import ServiceUnavailable
 
 
 User = get_user_model()
@@ -37,6 +38,8 @@ class MyTokenObtainPairSerializer(TokenObtainPairSerializer):
         token['role'] = user.role
         token['is_active'] = user.is_active
         token['email_verified'] = user.email_verified
+        # lets ClaimsJWTAuthentication trust these claims while they are current
+        token[AUTH_VERSION_CLAIM] = user_auth_version(user)
 
         # Attach basic profile info if it exists
         profile = getattr(user, 'profile', None)
@@ -86,15 +89,11 @@ class GoogleSocialAuthSerializer(serializers.Serializer):
 
     def validate_token(self, value):
         try:
-            # Validate Google token
-            audience = getattr(settings, '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', None)
+            # Validate Google token (signing keys are cached, see accounts.google_auth)
+            audience = settings.GOOGLE_CLIENT_ID
             if not audience:
                 raise serializers.ValidationError("Google Sign-In not configured on server.")
-            idinfo = id_token.verify_oauth2_token(
-                value,
-                google_requests.Request(),
-                audience=audience
-            )
+            idinfo = verify_google_id_token(value, audience)
 
             email = idinfo.get('email')
             User = get_user_model()
@@ -111,6 +110,8 @@ class GoogleSocialAuthSerializer(serializers.Serializer):
 
         except ValueError:
             raise serializers.ValidationError("Invalid or expired token.")
+        except GoogleCertsUnavailable:
+            raise ServiceUnavailable("Google Sign-In is temporarily unavailable.")
 
     def create(self, validated_data):
         return self.context['user']
@@ -1,12 +1,34 @@
 """
 Unit tests for accounts app.
 """
-from django.test import TestCase
-from django.contrib.auth import get_user_model
+import io
+import json
+import os
+import tempfile
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone as dt_timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+import jwt
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from cryptography.x509.oid import NameOID
+
+from django.db import IntegrityError, connection
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth import get_user_model, hashers
 from django.urls import reverse
 from rest_framework.test import APIClient
 from rest_framework import status
-from .models import Profile
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+from . import authentication, google_auth, hashing
+from .models import Profile, allocate_handles
 
 User = get_user_model()
 
@@ -38,6 +60,365 @@ class UserModelTestCase(TestCase):
         self.assertIsNotNone(self.user.profile)
 
 
+class HandleAllocationTestCase(TestCase):
+    """Test cases for @handle allocation."""
+
+    def create(self, username, email=None):
+        return User.objects.create_user(
+            username=username,
+            email=email or f'{uuid.uuid4().hex}@example.com',
+            password='testpass123'
+        )
+
+    def test_handles_take_the_first_free_suffix(self):
+        """Test repeated usernames get @base, @base1, @base2 from one query each."""
+        handles = [self.create('Sam Lee').handle for _ in range(3)]
+        self.assertEqual(handles, ['@sam-lee', '@sam-lee1', '@sam-lee2'])
+        self.create('sam-lee2024')
+        with self.assertNumQueries(1):
+            self.assertEqual(allocate_handles(['sam lee']), ['@sam-lee3'])
+
+    def test_large_suffixes_do_not_push_later_handles(self):
+        """Test a taken @base<big number> leaves @base and small numbers in use."""
+        self.create('john1990')
+        self.create('mary' + '9' * 20)
+        self.assertEqual(self.create('john').handle, '@john')
+        self.assertEqual(allocate_handles(['mary', 'mary']), ['@mary', '@mary1'])
+        User.objects.filter(handle='@john').delete()
+        self.create('john1')
+        self.assertEqual(allocate_handles(['john', 'john']), ['@john', '@john2'])
+
+    def test_bulk_allocation(self):
+        """Test a batch gets distinct handles with one query per distinct base."""
+        self.create('sam')
+        with self.assertNumQueries(2):
+            handles = allocate_handles(['sam', 'Ana', 'SAM', 'ana'])
+        self.assertEqual(handles, ['@sam1', '@ana', '@sam2', '@ana1'])
+
+    def test_long_usernames_fit_the_column(self):
+        """Test the base is cut so a handle and its number fit max_length."""
+        name = 'a' * 40
+        handles = [self.create(name).handle for _ in range(3)]
+        self.assertEqual(handles, ['@' + 'a' * 29, '@' + 'a' * 28, '@' + 'a' * 28 + '1'])
+        handles = allocate_handles(['b' * 40] * 11)
+        self.assertEqual(len(set(handles)), 11)
+        self.assertEqual(handles[-1], '@' + 'b' * 27 + '10')
+
+    def test_save_retries_a_lost_handle(self):
+        """Test a handle taken between allocation and insert is replaced, once."""
+        self.create('sam')
+        with mock.patch(
+            'accounts.models.allocate_handles', side_effect=[['@sam'], ['@sam1']]
+        ) as allocate:
+            self.assertEqual(self.create('sam').handle, '@sam1')
+        self.assertEqual(allocate.call_count, 2)
+
+        # other constraint violations are not retried
+        with mock.patch('accounts.models.allocate_handles', wraps=allocate_handles) as allocate:
+            with self.assertRaises(IntegrityError):
+                self.create('sam', email=User.objects.first().email)
+        self.assertEqual(allocate.call_count, 1)
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class ImportUsersTestCase(TestCase):
+    """Test cases for the import_users roster command."""
+
+    def setUp(self):
+        self.existing = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def run_import(self, name, text, *args):
+        path = os.path.join(self.directory.name, name)
+        with open(path, 'w', encoding='utf-8') as roster:
+            roster.write(text)
+        out, err = io.StringIO(), io.StringIO()
+        call_command('import_users', path, *args, stdout=out, stderr=err)
+        return out.getvalue(), err.getvalue()
+
+    @override_settings(AUTH_PASSWORD_VALIDATORS=[
+        {'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator'},
+    ])
+    def test_csv_roster(self):
+        """Test a CSV roster creates users and profiles, skipping and reporting bad rows."""
+        out, err = self.run_import('roster.csv', (
+            'email,username,password,full_name,role\n'
+            'ana@example.com,Ana,Kestrel-Orbit-92,Ana Rahman,\n'
+            'ben@example.com,Ben,,Ben Das,teacher\n'
+            'ANA@example.com,Ana,Kestrel-Orbit-92,,\n'
+            'cy@example.com,Ana,Kestrel-Orbit-92,,\n'
+            'test@example.com,Dup,Kestrel-Orbit-92,,\n'
+            'dee@example.com,Dee,Kestrel-Orbit-92,,wizard\n'
+            'eve@example.com,Eve,123,,\n'
+            'not-an-email,Fay,,,\n'
+        ), '--batch-size', '3', '--workers', '2')
+        self.assertIn('Imported 4 user(s), skipped 4.', out)
+        self.assertIn('line 6: test@example.com is already registered', err)
+        self.assertIn("line 7: unknown role 'wizard'", err)
+        self.assertIn('line 8: password rejected', err)
+        self.assertIn("line 9: invalid email 'not-an-email'", err)
+
+        ana = User.objects.get(email='ana@example.com')
+        self.assertTrue(ana.check_password('Kestrel-Orbit-92'))
+        self.assertEqual(
+            (ana.role, ana.handle, ana.profile.full_name), ('student', '@ana', 'Ana Rahman')
+        )
+        self.assertEqual(User.objects.get(email='ANA@example.com').handle, '@ana1')
+        self.assertEqual(User.objects.get(email='cy@example.com').handle, '@ana2')
+        ben = User.objects.get(email='ben@example.com')
+        self.assertEqual(ben.role, 'teacher')
+        self.assertFalse(ben.has_usable_password())
+        self.assertEqual(Profile.objects.count(), 5)
+
+    def test_jsonl_roster(self):
+        """Test JSON Lines input hashed in this process, with a default role and field limits."""
+        out, err = self.run_import('roster.jsonl', (
+            '{"email": "ana@example.com", "password": "Kestrel-Orbit-92"}\n'
+            '\n'
+            '["not", "an", "object"]\n'
+            '{"email": "ben@example.com", "username": "ben", "role": "teacher"}\n'
+            '{"email": "cy@example.com", "username": "%s"}\n'
+            '{"email": "dee@example.com", "full_name": "%s"}\n'
+        ) % ('c' * 101, 'D' * 256), '--workers', '0', '--role', 'teacher')
+        self.assertIn('Imported 2 user(s), skipped 3.', out)
+        self.assertIn('line 3: not a JSON object', err)
+        self.assertIn('line 5: username: Ensure this value has at most 100 characters', err)
+        self.assertIn('line 6: full_name is longer than 255 characters', err)
+        ana = User.objects.get(email='ana@example.com')
+        self.assertEqual((ana.username, ana.role), ('ana', 'teacher'))
+        self.assertTrue(ana.check_password('Kestrel-Orbit-92'))
+
+
+class KeyServer(ThreadingHTTPServer):
+    """A stand-in for Google's certificate endpoint, counting the requests it serves."""
+
+    def __init__(self):
+        self.certs, self.max_age, self.requests = {}, 300, 0
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server.requests += 1
+                body = json.dumps(server.certs).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Cache-Control', f'public, max-age={server.max_age}')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        super().__init__(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self.server_port}/certs'
+
+    def add_key(self, kid):
+        key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, kid)])
+        now = datetime.now(dt_timezone.utc)
+        cert = (
+            x509.CertificateBuilder().subject_name(name).issuer_name(name)
+            .public_key(key.public_key()).serial_number(x509.random_serial_number())
+            .not_valid_before(now - timedelta(days=1)).not_valid_after(now + timedelta(days=1))
+            .sign(key, hashes.SHA256())
+        )
+        self.certs[kid] = cert.public_bytes(serialization.Encoding.PEM).decode()
+        return key
+
+
+@override_settings(GOOGLE_CLIENT_ID='client-id.apps.googleusercontent.com')
+class GoogleIdTokenTestCase(TestCase):
+    """Test cases for Google ID token verification with cached certificates."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = KeyServer()
+        cls.key = cls.server.add_key('key-1')
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        self.server.requests = 0
+        self.server.max_age = 300
+        override = override_settings(GOOGLE_CERTS_URL=self.server.url)
+        override.enable()
+        self.addCleanup(override.disable)
+        google_auth.clear_key_cache()
+        self.addCleanup(google_auth.clear_key_cache)
+
+    def id_token(self, key=None, kid='key-1', **claims):
+        now = int(time.time())
+        payload = {
+            'iss': 'https://accounts.google.com', 'aud': 'client-id.apps.googleusercontent.com',
+            'sub': '1234', 'email': 'google.user@example.com', 'iat': now, 'exp': now + 600,
+            **claims,
+        }
+        return jwt.encode(payload, key or self.key, algorithm='RS256', headers={'kid': kid})
+
+    def verify(self, token):
+        return google_auth.verify_google_id_token(token, 'client-id.apps.googleusercontent.com')
+
+    def test_certificates_are_fetched_once(self):
+        """Test repeated logins verify locally, and new processes use the shared cache."""
+        for _ in range(3):
+            self.assertEqual(self.verify(self.id_token())['sub'], '1234')
+        self.assertEqual(self.server.requests, 1)
+
+        google_auth._keys, google_auth._expires = {}, 0.0
+        self.verify(self.id_token())
+        self.assertEqual(self.server.requests, 1)
+
+    def test_certificates_expire_with_max_age(self):
+        """Test certificates are fetched again once their max-age has passed."""
+        self.server.max_age = 0
+        self.verify(self.id_token())
+        self.verify(self.id_token())
+        self.assertEqual(self.server.requests, 2)
+
+    def test_rotated_keys_are_fetched_early(self):
+        """Test an unknown key id refetches the certificates, but not on every token."""
+        self.verify(self.id_token())
+        new_key = self.server.add_key('key-2')
+        self.addCleanup(self.server.certs.pop, 'key-2')
+        with mock.patch.object(google_auth, 'REFETCH_INTERVAL', 0):
+            self.assertEqual(self.verify(self.id_token(new_key, kid='key-2'))['sub'], '1234')
+        self.assertEqual(self.server.requests, 2)
+        with self.assertRaisesMessage(ValueError, 'unknown key'):
+            self.verify(self.id_token(new_key, kid='key-3'))
+        self.assertEqual(self.server.requests, 2)
+
+    def test_invalid_tokens_are_rejected(self):
+        """Test forged, expired, foreign and malformed tokens raise ValueError."""
+        forged = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        tokens = [
+            self.id_token(forged),
+            self.id_token(exp=int(time.time()) - 60),
+            self.id_token(aud='someone-else'),
+            self.id_token(iss='https://evil.example.com'),
+            'not-a-token',
+        ]
+        for token in tokens:
+            with self.assertRaises(ValueError):
+                self.verify(token)
+
+    def test_google_login(self):
+        """Test the Google login endpoint verifies the token and issues JWTs."""
+        client = APIClient()
+        url = reverse('google_login')
+        response = client.post(url, {'token': self.id_token()}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['user']['email'], 'google.user@example.com')
+        self.assertIn('access', response.data)
+
+        response = client.post(url, {'token': self.id_token(aud='x')}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        google_auth.clear_key_cache()
+        with override_settings(GOOGLE_CERTS_URL='http://127.0.0.1:1/certs'):
+            response = client.post(url, {'token': self.id_token()}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+
+
+class PasswordHashingTestCase(TestCase):
+    """Test cases for offloaded password hashing."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.addCleanup(hashing._shared.shutdown)
+
+    def login(self, password='testpass123'):
+        return self.client.post(reverse('token_obtain_pair'), {
+            'email': 'test@example.com', 'password': password,
+        }, format='json')
+
+    @override_settings(PASSWORD_HASH_WORKERS=1)
+    def test_hashing_runs_in_the_pool(self):
+        """Test registration and login hash in a worker process."""
+        with mock.patch.object(
+            hashing._shared, 'run', wraps=hashing._shared.run
+        ) as run:
+            response = self.client.post(reverse('auth_register'), {
+                'username': 'newuser', 'email': 'newuser@example.com',
+                'password': 'newpass123', 'password2': 'newpass123',
+            }, format='json')
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            self.assertEqual(self.login().status_code, status.HTTP_200_OK)
+            self.assertEqual(self.login('wrong').status_code, status.HTTP_401_UNAUTHORIZED)
+        # the failed login is checked by both ModelBackend and the allauth backend
+        self.assertEqual(run.call_count, 4)
+        self.assertTrue(User.objects.get(email='newuser@example.com').check_password('newpass123'))
+        self.assertEqual(hashing.stats(), {
+            'enabled': True, 'workers': 1, 'capacity': 4, 'pending': 0, 'rejected': 0,
+        })
+
+    def test_detailed_health_reports_the_pool(self):
+        """Test the detailed health check says whether hashing is offloaded."""
+        url = reverse('health-check-detailed')
+        with override_settings(PASSWORD_HASH_WORKERS=0):
+            pool = self.client.get(url).data['checks']['password_hashing']
+        self.assertFalse(pool['enabled'])
+        with override_settings(PASSWORD_HASH_WORKERS=1):
+            pool = self.client.get(url).data['checks']['password_hashing']
+        self.assertTrue(pool['enabled'])
+
+    @override_settings(
+        PASSWORD_HASH_WORKERS=1, PASSWORD_HASH_MAX_PENDING=1, PASSWORD_HASH_QUEUE_TIMEOUT=0
+    )
+    def test_full_queue_is_rejected(self):
+        """Test logins beyond the queue bound get a 503 instead of waiting."""
+        _, slots = hashing._shared.start()
+        slots.acquire()
+        try:
+            response = self.login()
+        finally:
+            slots.release()
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(hashing.stats()['rejected'], 1)
+
+    def test_unusable_passwords_take_a_full_hash(self):
+        """Test checks against unusable passwords hash anyway, so timing reveals nothing."""
+        self.user.set_unusable_password()
+        with mock.patch(
+            'django.contrib.auth.hashers.make_password', wraps=hashers.make_password
+        ) as make_password:
+            self.assertFalse(self.user.check_password('testpass123'))
+            self.assertFalse(hashing.check_password(None, self.user.password))
+        self.assertEqual(make_password.call_count, 2)
+
+        with override_settings(PASSWORD_HASH_WORKERS=1):
+            with mock.patch.object(hashing._shared, 'run', wraps=hashing._shared.run) as run:
+                self.assertFalse(self.user.check_password('testpass123'))
+            self.assertEqual(run.call_count, 1)
+
+    def test_outdated_hashes_are_upgraded(self):
+        """Test a correct password stored with an older hasher is rehashed."""
+        with override_settings(
+            PASSWORD_HASHERS=['django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher']
+        ):
+            self.user.set_password('oldpass123')
+            self.user.save()
+        self.assertTrue(self.user.password.startswith('pbkdf2_sha1$'))
+        self.assertFalse(self.user.check_password('wrong'))
+        self.assertTrue(self.user.check_password('oldpass123'))
+        self.assertTrue(User.objects.get(pk=self.user.pk).password.startswith('pbkdf2_sha256$'))
+
+
 class AuthAPITestCase(TestCase):
     """Test cases for authentication API endpoints."""
     
@@ -108,3 +489,73 @@ class AuthAPITestCase(TestCase):
         url = reverse('user_profile', kwargs={'username': 'testuser'})
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+class ClaimsJWTAuthenticationTestCase(TestCase):
+    """Test cases for serving read-only requests from access token claims."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        authentication._versions.clear()
+        self.url = reverse('test')
+
+    def login(self):
+        response = self.client.post(reverse('token_obtain_pair'), {
+            'email': 'test@example.com', 'password': 'testpass123',
+        }, format='json')
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['access']}")
+
+    def user_queries(self, method='get'):
+        with CaptureQueriesContext(connection) as queries:
+            response = getattr(self.client, method)(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [q['sql'] for q in queries if 'FROM "accounts_user"' in q['sql']]
+
+    def test_safe_requests_skip_the_user_query(self):
+        """Test a read is served from claims, checking the version once per TTL."""
+        self.login()
+        self.assertEqual(len(self.user_queries()), 1)
+        self.assertEqual(self.user_queries(), [])
+        response = self.client.get(self.url)
+        self.assertIn('testuser', response.data['response'])
+
+        # writes still load the user
+        self.assertEqual(len(self.user_queries('post')), 1)
+        with override_settings(JWT_CLAIMS_USER_TTL=0):
+            self.assertEqual(len(self.user_queries()), 1)
+
+    def test_token_user_loads_other_fields_lazily(self):
+        """Test fields that are not claims are read from the database on access."""
+        self.login()
+        self.client.get(self.url)
+        token = AccessToken(self.client._credentials['HTTP_AUTHORIZATION'].split()[1])
+        user = authentication.ClaimsJWTAuthentication().get_claims_user(token)
+        self.assertEqual((user.pk, user.email, user.role), (self.user.pk, self.user.email, 'user'))
+        with self.assertNumQueries(1):
+            self.assertEqual(user.handle, self.user.handle)
+
+    def test_stale_claims_fall_back_to_the_database(self):
+        """Test tokens issued before a password or activation change are not trusted."""
+        self.login()
+        self.user_queries()
+        self.user.set_password('newpass456')
+        self.user.save()
+        # the version is re-read, no longer matches, and the full lookup runs
+        self.assertEqual(len(self.user_queries()), 2)
+
+        self.user.is_active = False
+        self.user.save()
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_tokens_without_version_use_the_database(self):
+        """Test plain simplejwt tokens keep the per-request lookup."""
+        token = RefreshToken.for_user(self.user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        self.assertEqual(len(self.user_queries()), 1)
+        self.assertEqual(len(self.user_queries()), 1)
@@ -0,0 +1,115 @@
+"""
+Benchmark for Google ID token verification: google-auth's verify_token (downloads the
+certificates on every call) vs. accounts.google_auth.verify_google_id_token (cached
+keys, local signature check), in ms per verification.
+
+The certificates are served by a local stand-in for Google, so the google-auth figure
+is a lower bound: against the real endpoint each call also pays a network round trip.
+
+    python benchmarks/google_id_tokens.py [--repeat 200]
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "edunova.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+import jwt  # noqa: E402
+from cryptography import x509  # noqa: E402
+from cryptography.hazmat.primitives import hashes, serialization  # noqa: E402
+from cryptography.hazmat.primitives.asymmetric import rsa  # noqa: E402
+from cryptography.x509.oid import NameOID  # noqa: E402
+from django.test import override_settings  # noqa: E402
+from google.auth.transport import requests as google_requests  # noqa: E402
+from google.oauth2 import id_token  # noqa: E402
+
+from accounts import google_auth  # noqa: E402
+
+AUDIENCE = "client-id.apps.googleusercontent.com"
+
+
+def signing_key():
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "bench")])
+    now = datetime.now(timezone.utc)
+    cert = (
+        x509.CertificateBuilder().subject_name(name).issuer_name(name)
+        .public_key(key.public_key()).serial_number(x509.random_serial_number())
+        .not_valid_before(now - timedelta(days=1)).not_valid_after(now + timedelta(days=1))
+        .sign(key, hashes.SHA256())
+    )
+    return key, cert.public_bytes(serialization.Encoding.PEM).decode()
+
+
+def serve(certs):
+    body = json.dumps(certs).encode()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Cache-Control", "public, max-age=3600")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}/certs"
+
+
+def timed(func, repeat):
+    func()
+    started = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - started) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    key, cert = signing_key()
+    server, url = serve({"bench": cert})
+    now = int(time.time())
+    token = jwt.encode(
+        {"iss": "https://accounts.google.com", "aud": AUDIENCE, "sub": "1",
+         "iat": now, "exp": now + 3600},
+        key, algorithm="RS256", headers={"kid": "bench"},
+    )
+    request = google_requests.Request()
+    try:
+        with override_settings(GOOGLE_CERTS_URL=url):
+            google_auth.clear_key_cache()
+            fetching = timed(
+                lambda: id_token.verify_token(token, request, AUDIENCE, certs_url=url),
+                args.repeat,
+            )
+            cached = timed(
+                lambda: google_auth.verify_google_id_token(token, AUDIENCE), args.repeat
+            )
+            google_auth.clear_key_cache()
+    finally:
+        server.shutdown()
+        server.server_close()
+    print(f"google-auth verify_token  {fetching:8.3f} ms per token (local cert server)")
+    print(f"verify_google_id_token    {cached:8.3f} ms per token ({fetching / cached:.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Benchmark for roster imports: RegisterSerializer.create row by row vs. the
+`import_users` command (users per second). Runs against a throwaway test database.
+
+Password hashing (PBKDF2) dominates whenever rows carry passwords, so those runs use
+fewer rows; the command's gain there scales with --workers (CPU cores).
+
+    python benchmarks/import_users.py [--users 10000] [--password-users 200] [--workers N]
+"""
+import argparse
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "edunova.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.core.management import call_command  # noqa: E402
+from django.test.utils import get_runner  # noqa: E402
+
+from accounts.models import User  # noqa: E402
+from accounts.serializers import RegisterSerializer  # noqa: E402
+
+PASSWORD = "Kestrel-Orbit-92"
+
+
+def roster(path, label, count, password):
+    with open(path, "w", encoding="utf-8") as out:
+        out.write("email,username,password\n")
+        for i in range(count):
+            out.write(f"{label}{i}@example.com,student,{password}\n")
+
+
+def report(label, count, elapsed):
+    print(f"{label:<28} {count:6} users in {elapsed:8.2f} s ({count / elapsed:8.0f}/s)")
+
+
+def serializer_import(count):
+    started = time.perf_counter()
+    for i in range(count):
+        serializer = RegisterSerializer(data={
+            "email": f"serial{i}@example.com", "username": "student",
+            "password": PASSWORD, "password2": PASSWORD,
+        })
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+    report("RegisterSerializer", count, time.perf_counter() - started)
+
+
+def command_import(directory, label, count, password, workers):
+    path = os.path.join(directory, f"{label}.csv")
+    roster(path, label, count, password)
+    started = time.perf_counter()
+    call_command(
+        "import_users", path, "--workers", str(workers), stdout=io.StringIO(),
+    )
+    report(f"import_users ({label})", count, time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--password-users", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    runner = get_runner(settings)(verbosity=0)
+    runner.setup_test_environment()
+    old_config = runner.setup_databases()
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            print(f"{args.workers} hashing worker(s)")
+            serializer_import(args.password_users)
+            command_import(
+                directory, "passwords", args.password_users, PASSWORD, args.workers
+            )
+            command_import(directory, "no-passwords", args.users, "", args.workers)
+        print(f"{User.objects.count()} users in the database")
+    finally:
+        runner.teardown_databases(old_config)
+        runner.teardown_test_environment()
+
+
+if __name__ == "__main__":
+    main()
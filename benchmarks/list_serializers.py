@@ -0,0 +1,115 @@
+"""
+Benchmark for list-page rendering: NoteSerializer/PDFSerializer over model instances vs.
+the compiled `.values()` row serializers used by the list views (ms per page).
+
+"fetch+render" includes the page query and building the rows; "render" is the
+serialization step alone. Also reports the size of a notes page in the default summary
+mode vs. `?mode=full`. Runs against a throwaway test database.
+
+    python benchmarks/list_serializers.py [--rows 50] [--repeat 200] [--content-chars 5000]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "edunova.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.contrib.auth import get_user_model  # noqa: E402
+from django.test import RequestFactory  # noqa: E402
+from django.test.utils import get_runner  # noqa: E402
+from rest_framework.renderers import JSONRenderer  # noqa: E402
+
+from notebook.models import Note, Notebook  # noqa: E402
+from notebook.serializers import NoteSerializer  # noqa: E402
+from notebook.views import NoteListCreateView  # noqa: E402
+from PDFs.models import PDF  # noqa: E402
+from PDFs.serializers import PDFSerializer  # noqa: E402
+from PDFs.views import PDFListView  # noqa: E402
+
+
+def timed(func, repeat):
+    func()
+    started = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - started) / repeat * 1000
+
+
+def compare(label, serializer_class, rows, queryset, context, repeat):
+    instances = list(queryset)
+    values = list(rows.values(queryset))
+    full = timed(
+        lambda: serializer_class(list(queryset), many=True, context=context).data, repeat
+    )
+    fast = timed(lambda: rows.render(list(rows.values(queryset)), context), repeat)
+    print(f"{label:<6} fetch+render {full:7.2f} ms -> {fast:6.2f} ms ({full / fast:4.1f}x)")
+
+    full = timed(lambda: serializer_class(instances, many=True, context=context).data, repeat)
+    fast = timed(lambda: rows.render(values, context), repeat)
+    print(f"{label:<6} render       {full:7.2f} ms -> {fast:6.2f} ms ({full / fast:4.1f}x)")
+
+
+def payload(queryset, context):
+    view = NoteListCreateView()
+    rows = view.row_serializer
+    for mode in ("full", "summary"):
+        fields = view.row_modes[mode]
+        started = time.perf_counter()
+        data = rows.render(list(rows.values(queryset, fields)), context, fields)
+        elapsed = (time.perf_counter() - started) * 1000
+        size = len(JSONRenderer().render(data))
+        print(f"notes  mode={mode:<8} {size / 1024:9.1f} KiB per page, {elapsed:6.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--content-chars", type=int, default=5000)
+    args = parser.parse_args()
+
+    runner = get_runner(settings)(verbosity=0)
+    runner.setup_test_environment()
+    old_config = runner.setup_databases()
+    try:
+        user = get_user_model().objects.create_user(
+            username="bench", email="bench@example.com", password="benchpass123"
+        )
+        notebook = Notebook.objects.create(name="Bench", owner=user)
+        for i in range(args.rows):
+            note = Note.objects.create(
+                notebook=notebook, title=f"Note {i}", owner=user,
+                content=("body " * args.content_chars)[:args.content_chars],
+            )
+            PDF.objects.create(
+                file_name=f"{i}.pdf", title=f"PDF {i}", file=f"pdfs/{i}.pdf",
+                uploaded_by=user, linked_note=note,
+            )
+        context = {"request": RequestFactory().get("/")}
+
+        print(f"{args.rows} rows per page, {args.repeat} runs")
+        compare(
+            "notes", NoteSerializer, NoteListCreateView.row_serializer,
+            Note.objects.select_related("owner", "notebook").order_by("-updated_at"),
+            context, args.repeat,
+        )
+        compare(
+            "pdfs", PDFSerializer, PDFListView.row_serializer,
+            PDF.objects.select_related("linked_note", "uploaded_by").order_by("-created_at"),
+            context, args.repeat,
+        )
+        payload(Note.objects.order_by("-updated_at"), context)
+    finally:
+        runner.teardown_databases(old_config)
+        runner.teardown_test_environment()
+
+
+if __name__ == "__main__":
+    main()
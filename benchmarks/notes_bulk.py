@@ -0,0 +1,97 @@
+"""
+Benchmark for importing notes: one POST /api/notes/ per note vs. POST /api/notes/bulk/
+batches (notes/sec), run through the API against a throwaway test database.
+
+    python benchmarks/notes_bulk.py [--notes 2000] [--batch 500]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "edunova.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.contrib.auth import get_user_model  # noqa: E402
+from django.test.utils import get_runner  # noqa: E402
+from django.urls import reverse  # noqa: E402
+from rest_framework.test import APIClient  # noqa: E402
+
+from notebook.models import Note, Notebook  # noqa: E402
+
+
+def note_data(notebook, i):
+    return {
+        "title": f"Imported note {i}",
+        "content": f"Body of imported note {i}. " * 20,
+        "notebook": str(notebook.pk),
+    }
+
+
+def per_item(client, notebook, count):
+    url = reverse("note-list-create")
+    for i in range(count):
+        response = client.post(url, note_data(notebook, i), format="json")
+        assert response.status_code == 201, response.content
+
+
+def batched(client, notebook, count, batch):
+    url = reverse("note-bulk")
+    for start in range(0, count, batch):
+        operations = [
+            {"op": "create", "data": note_data(notebook, i)}
+            for i in range(start, min(start + batch, count))
+        ]
+        response = client.post(url, {"operations": operations}, format="json")
+        assert response.status_code == 200, response.content
+
+
+def measure(label, func, notebook, count):
+    started = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - started
+    notebook.refresh_from_db()
+    assert notebook.notes_count == count
+    print(f"{label:<22} {elapsed:8.2f}s {count / elapsed:10.0f} notes/sec")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--notes", type=int, default=2000)
+    parser.add_argument("--batch", type=int, default=settings.NOTE_BULK_MAX_OPERATIONS)
+    args = parser.parse_args()
+    settings.NOTE_BULK_MAX_OPERATIONS = max(args.batch, settings.NOTE_BULK_MAX_OPERATIONS)
+
+    runner = get_runner(settings)(verbosity=0)
+    runner.setup_test_environment()
+    old_config = runner.setup_databases()
+    try:
+        user = get_user_model().objects.create_user(
+            username="bench", email="bench@example.com", password="benchpass123"
+        )
+        client = APIClient()
+        client.force_authenticate(user=user)
+
+        single = Notebook.objects.create(name="Per item", owner=user)
+        bulk = Notebook.objects.create(name="Bulk", owner=user)
+        print(f"{args.notes} notes, bulk batches of {args.batch}")
+        slow = measure(
+            "per-item POST", lambda: per_item(client, single, args.notes), single, args.notes
+        )
+        fast = measure(
+            "bulk POST", lambda: batched(client, bulk, args.notes, args.batch), bulk, args.notes
+        )
+        print(f"speedup: {slow / fast:.1f}x ({Note.objects.count()} notes written)")
+    finally:
+        runner.teardown_databases(old_config)
+        runner.teardown_test_environment()
+
+
+if __name__ == "__main__":
+    main()
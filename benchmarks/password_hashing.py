@@ -0,0 +1,101 @@
+"""
+Benchmark for offloaded password hashing: a login storm (threads hashing passwords, as
+gthread workers would) next to a cheap request (a short pure-Python task), with hashing
+on the request threads vs. in accounts.hashing's process pool.
+
+Reports hashes per second, logins shed by admission control, and the cheap task's
+latency. PBKDF2 (hashlib) releases the GIL, so the difference between the two modes is
+mostly bounded concurrency: on the request threads every thread can hash at once, in
+the pool at most PASSWORD_HASH_MAX_PENDING hashes run or wait and the rest get a 503.
+Hashing throughput scales with --workers up to the CPU count.
+
+    python benchmarks/password_hashing.py [--threads 8] [--workers N] [--seconds 5]
+"""
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "edunova.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.test import override_settings  # noqa: E402
+
+from accounts import hashing  # noqa: E402
+
+
+def cheap_request():
+    return sum(i * i for i in range(2000))
+
+
+def storm(threads, seconds):
+    stop = threading.Event()
+    hashed = []
+    rejected = []
+
+    def login():
+        while not stop.is_set():
+            try:
+                hashing.make_password("Kestrel-Orbit-92")
+                hashed.append(1)
+            except hashing.HashingOverloaded:
+                rejected.append(1)
+                time.sleep(0.01)
+
+    workers = [threading.Thread(target=login) for _ in range(threads)]
+    for worker in workers:
+        worker.start()
+    latencies = []
+    started = time.perf_counter()
+    while time.perf_counter() - started < seconds:
+        t = time.perf_counter()
+        cheap_request()
+        latencies.append((time.perf_counter() - t) * 1000)
+        time.sleep(0.005)
+    stop.set()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return (
+        len(hashed) / elapsed, len(rejected), statistics.median(latencies),
+        latencies[int(len(latencies) * 0.99)],
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--seconds", type=float, default=5)
+    args = parser.parse_args()
+
+    idle = sorted(timed_cheap() for _ in range(200))
+    print(f"cheap request alone: p50 {statistics.median(idle):6.2f} ms")
+    runs = [("request threads", 0), (f"pool ({args.workers} worker(s))", args.workers)]
+    for label, workers in runs:
+        with override_settings(PASSWORD_HASH_WORKERS=workers):
+            if workers:
+                hashing.make_password("warm-up")  # start the workers outside the timing
+            rate, rejected, p50, p99 = storm(args.threads, args.seconds)
+            hashing._shared.shutdown()
+        print(
+            f"{label:<22} {rate:7.1f} hashes/s ({rejected} rejected), "
+            f"cheap request p50 {p50:6.2f} ms, p99 {p99:6.2f} ms"
+        )
+
+
+def timed_cheap():
+    t = time.perf_counter()
+    cheap_request()
+    return (time.perf_counter() - t) * 1000
+
+
+if __name__ == "__main__":
+    main()
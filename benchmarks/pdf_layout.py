@@ -0,0 +1,164 @@
+"""
+Micro-benchmark for note -> PDF generation throughput (pages/sec).
+
+Compares the previous word-by-word `canvas.stringWidth` wrapping with the cached,
+incremental layout engine in PDFs.utils.layout, on large synthetic notes, and reports
+peak Python memory of in-memory vs. streaming-to-file generation.
+
+    python benchmarks/pdf_layout.py [--paragraphs 400] [--words 300] [--repeat 3]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from io import BytesIO
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from reportlab.lib import colors  # noqa: E402
+from reportlab.lib.pagesizes import A4  # noqa: E402
+from reportlab.lib.units import cm  # noqa: E402
+from reportlab.pdfgen import canvas  # noqa: E402
+
+from PDFs.utils.generator import generate_pdf_from_text, generate_pdf_to_file  # noqa: E402
+from PDFs.utils.layout import layout_document  # noqa: E402
+
+
+def legacy_generate(title, content):
+    """The generator as it was before the layout engine (rendering included)."""
+    buffer = BytesIO()
+    c = canvas.Canvas(buffer, pagesize=A4)
+    width, height = A4
+    c.setFillColor(colors.HexColor("#222222"))
+    c.setFont("Helvetica-Bold", 16)
+    c.drawString(2 * cm, height - 2 * cm, title[:100] if title else "Note")
+    c.setFillColor(colors.black)
+    c.setFont("Helvetica", 11)
+    left_margin = 2 * cm
+    top = height - 3 * cm
+    max_width = width - 4 * cm
+
+    def wrap_text(text, line_width):
+        words = (text or "").split()
+        lines = []
+        line = ""
+        for w in words:
+            test = (line + " " + w).strip()
+            if c.stringWidth(test, "Helvetica", 11) <= line_width:
+                line = test
+            else:
+                lines.append(line)
+                line = w
+        if line:
+            lines.append(line)
+        return lines
+
+    y = top
+    for paragraph in (content or "").split("\n\n"):
+        for ln in wrap_text(paragraph, max_width):
+            if y < 2 * cm:
+                c.showPage()
+                y = height - 2 * cm
+                c.setFont("Helvetica", 11)
+            c.drawString(left_margin, y, ln)
+            y -= 14
+        y -= 10
+    pages = c.getPageNumber()
+    c.showPage()
+    c.save()
+    return pages
+
+
+def legacy_layout_only(content):
+    """Legacy wrapping without drawing, to isolate layout cost."""
+    c = canvas.Canvas(BytesIO(), pagesize=A4)
+    max_width = A4[0] - 4 * cm
+    lines = 0
+    for paragraph in content.split("\n\n"):
+        line = ""
+        for w in paragraph.split():
+            test = (line + " " + w).strip()
+            if c.stringWidth(test, "Helvetica", 11) <= max_width:
+                line = test
+            else:
+                lines += 1
+                line = w
+        lines += 1 if line else 0
+    return lines
+
+
+def synthetic_note(paragraphs, words, seed=7):
+    rng = random.Random(seed)
+    vocabulary = [
+        "".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(rng.randint(2, 11)))
+        for _ in range(3000)
+    ]
+    blocks = []
+    for i in range(paragraphs):
+        if i % 20 == 0:
+            blocks.append(f"# Section {i // 20}")
+        blocks.append(" ".join(rng.choice(vocabulary) for _ in range(words)))
+    return "\n\n".join(blocks)
+
+
+def best_of(repeat, fn):
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--paragraphs", type=int, default=400)
+    parser.add_argument("--words", type=int, default=300)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    content = synthetic_note(args.paragraphs, args.words)
+    print(f"note: {len(content):,} chars, {args.paragraphs} paragraphs x {args.words} words")
+
+    pages = len(list(layout_document("Benchmark", content)))
+    t_old, old_pages = best_of(args.repeat, lambda: legacy_generate("Benchmark", content))
+    t_new, _ = best_of(args.repeat, lambda: generate_pdf_from_text("Benchmark", content))
+    print(f"render  before: {old_pages / t_old:8.1f} pages/s ({t_old:.3f}s, {old_pages} pages)")
+    print(f"render  after:  {pages / t_new:8.1f} pages/s ({t_new:.3f}s, {pages} pages)")
+    print(f"render  speedup: {t_old / t_new:.1f}x")
+
+    t_old, _ = best_of(args.repeat, lambda: legacy_layout_only(content))
+    t_new, _ = best_of(args.repeat, lambda: sum(1 for _ in layout_document("Benchmark", content)))
+    print(f"layout  before: {old_pages / t_old:8.1f} pages/s ({t_old:.3f}s)")
+    print(f"layout  after:  {pages / t_new:8.1f} pages/s ({t_new:.3f}s)")
+    print(f"layout  speedup: {t_old / t_new:.1f}x")
+
+    def peak(fn):
+        tracemalloc.start()
+        fn()
+        _, top = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return top
+
+    with tempfile.TemporaryFile() as fh:
+        streamed = peak(lambda: generate_pdf_to_file("Benchmark", content, fh))
+        size = fh.tell()
+    buffered = peak(lambda: generate_pdf_from_text("Benchmark", content).getvalue())
+    print(f"memory  in-memory: {buffered / 2**20:6.1f} MiB peak ({size / 2**20:.1f} MiB PDF)")
+    print(f"memory  streamed:  {streamed / 2**20:6.1f} MiB peak")
+    assert streamed_pages(content) == pages
+
+
+def streamed_pages(content):
+    """The streaming writer must emit the same page count as the layout."""
+    with tempfile.TemporaryFile() as fh:
+        return generate_pdf_to_file("Benchmark", content, fh)
+
+
+if __name__ == "__main__":
+    main()
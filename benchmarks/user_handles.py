@@ -0,0 +1,99 @@
+"""
+Benchmark for @handle allocation: registering many users with the same username through
+User.save, with the previous exists()-per-candidate loop vs. the single-query
+allocator, plus allocate_handles() for a whole batch. Runs against a throwaway test
+database.
+
+    python benchmarks/user_handles.py [--users 2000] [--legacy-users 500] [--username student]
+
+The legacy loop is quadratic, so it registers fewer users by default.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "edunova.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test.utils import get_runner  # noqa: E402
+from django.utils.text import slugify  # noqa: E402
+
+from accounts.models import User, allocate_handles  # noqa: E402
+
+
+def legacy_handle(username):
+    """The loop User.save used before: one exists() query per taken candidate."""
+    base = slugify(username)
+    counter = 1
+    handle = f"@{base}"
+    while User.objects.filter(handle=handle).exists():
+        handle = f"@{base}{counter}"
+        counter += 1
+    return handle
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def register(label, users, username, handle_for=None):
+    queries = QueryCounter()
+    with connection.execute_wrapper(queries):
+        started = time.perf_counter()
+        for i in range(users):
+            user = User(username=username, email=f"{label}-{i}@example.com")
+            if handle_for is not None:
+                user.handle = handle_for(username)
+            user.set_unusable_password()
+            user.save()
+        elapsed = time.perf_counter() - started
+    print(
+        f"{label:<10} {users} users in {elapsed:7.2f} s ({users / elapsed:7.0f}/s), "
+        f"{queries.count} queries"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--legacy-users", type=int, default=500)
+    parser.add_argument("--username", default="student")
+    args = parser.parse_args()
+
+    runner = get_runner(settings)(verbosity=0)
+    runner.setup_test_environment()
+    old_config = runner.setup_databases()
+    try:
+        register("legacy", args.legacy_users, args.username, handle_for=legacy_handle)
+        User.objects.all().delete()
+        register("allocator", args.users, args.username)
+
+        # the next batch of the same name, allocated at once (as an import would)
+        queries = QueryCounter()
+        with connection.execute_wrapper(queries):
+            started = time.perf_counter()
+            handles = allocate_handles([args.username] * args.users)
+            elapsed = (time.perf_counter() - started) * 1000
+        print(
+            f"{'bulk':<10} {len(handles)} handles in {elapsed:7.2f} ms, "
+            f"{queries.count} queries ({handles[0]} .. {handles[-1]})"
+        )
+    finally:
+        runner.teardown_databases(old_config)
+        runner.teardown_test_environment()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,22 @@
+"""
+Celery application for background jobs (see `celery -A edunova worker` in the Procfile).
+
+Without CELERY_BROKER_URL tasks only run, eagerly in-process, under DEBUG and in the test
+suite (CELERY_TASK_ALWAYS_EAGER); check background_jobs_available() before queueing.
+"""
+import os
+
+from celery import Celery
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'edunova.settings')
+
+app = Celery('edunova')
+app.config_from_object('django.conf:settings', namespace='CELERY')
+app.autodiscover_tasks()
+
+
+def background_jobs_available():
+    """Whether queued tasks will run: on a worker through the broker, or eagerly."""
+    from django.conf import settings
+
+    return bool(settings.CELERY_BROKER_URL) or settings.CELERY_TASK_ALWAYS_EAGER
@@ -5,12 +5,20 @@ Provides consistent JSON error responses.
 import logging
 from rest_framework.views import exception_handler
 from rest_framework import status
+from rest_framework.exceptions import APIException
 from rest_framework.response import Response
 from django.core.exceptions import ValidationError as DjangoValidationError
 
 logger = logging.getLogger(__name__)
 
 
+class ServiceUnavailable(APIException):
+    """A dependency of the request (an upstream service, a worker pool) is not available."""
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'Service temporarily unavailable, try again later.'
+    default_code = 'service_unavailable'
+
+
 def custom_exception_handler(exc, context):
     """
     Custom exception handler that provides consistent JSON error responses.
@@ -0,0 +1,108 @@
+"""
+Model fields shared by the apps.
+"""
+import base64
+import zlib
+
+from django.conf import settings
+from django.db import models
+from django.db.models import F
+from django.db.models.functions import Substr
+from django.db.models.query_utils import DeferredAttribute
+
+# Stored values starting with this are compressed: marker + base64(zlib(utf-8)). Plain
+# values that happen to start with it are always stored compressed, so the marker is
+# never ambiguous in the database.
+COMPRESSED_PREFIX = "\x01zlib:"
+COMPRESSION_LEVEL = 6
+
+
+class CompressedText(str):
+    """A value read from a CompressedTextField column, still in its stored form."""
+
+
+def is_compressed(value):
+    return isinstance(value, str) and value.startswith(COMPRESSED_PREFIX)
+
+
+def compress_text(value, min_chars):
+    """The stored form of `value`: compressed when it is long enough and it pays off."""
+    if value is None or isinstance(value, CompressedText):
+        return value
+    escape = value.startswith(COMPRESSED_PREFIX)
+    if len(value) < min_chars and not escape:
+        return value
+    packed = zlib.compress(value.encode("utf-8"), COMPRESSION_LEVEL)
+    stored = COMPRESSED_PREFIX + base64.b64encode(packed).decode("ascii")
+    return stored if escape or len(stored) < len(value) else value
+
+
+def decompress_text(value):
+    """Plain text of a stored value (plain values are returned unchanged)."""
+    if not is_compressed(value):
+        return value
+    packed = base64.b64decode(value[len(COMPRESSED_PREFIX):])
+    return zlib.decompress(packed).decode("utf-8")
+
+
+class CompressedTextDescriptor(DeferredAttribute):
+    """Decompresses the loaded value on first access and keeps the plain text."""
+
+    def __get__(self, instance, cls=None):
+        if instance is None:
+            return self
+        value = super().__get__(instance, cls)
+        if isinstance(value, CompressedText):
+            value = instance.__dict__[self.field.attname] = decompress_text(value)
+        return value
+
+    def __set__(self, instance, value):
+        instance.__dict__[self.field.attname] = value
+
+
+class CompressedTextField(models.TextField):
+    """
+    TextField stored compressed (zlib) once a value reaches COMPRESSED_TEXT_MIN_CHARS.
+
+    Reads are lazy: rows load the stored form and only the first access to the
+    attribute decompresses it, so queries that never touch the text pay nothing.
+    The column stays a text column, and SQL sees the stored form: lookups such as
+    `icontains` and database functions do not match inside compressed values. Use
+    decompress_text() on raw values (`.values()`, cursors).
+    """
+    descriptor_class = CompressedTextDescriptor
+
+    def from_db_value(self, value, expression, connection):
+        if is_compressed(value):
+            return CompressedText(value)
+        return value
+
+    def pre_save(self, model_instance, add):
+        # a loaded value that was never read is written back in its stored form
+        if self.attname in model_instance.__dict__:
+            return model_instance.__dict__[self.attname]
+        return super().pre_save(model_instance, add)
+
+    def get_prep_value(self, value):
+        value = super().get_prep_value(value)
+        return compress_text(value, settings.COMPRESSED_TEXT_MIN_CHARS)
+
+
+def text_preview(field_name, length):
+    """
+    `(expression, convert)` for the first `length` characters of a CompressedTextField:
+    plain values are cut in the database; compressed ones are read whole (compressed)
+    and cut after decompressing.
+    """
+    expression = models.Case(
+        models.When(
+            **{f"{field_name}__startswith": COMPRESSED_PREFIX}, then=F(field_name)
+        ),
+        default=Substr(field_name, 1, length),
+        output_field=models.TextField(),
+    )
+
+    def convert(value):
+        return decompress_text(value)[:length] if is_compressed(value) else value
+    return expression, convert
+
@@ -6,6 +6,7 @@ from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 from django.db import connection
 from django.core.cache import cache
+from accounts.hashing import stats as hashing_stats
 import logging
 
 logger = logging.getLogger(__name__)
@@ -28,7 +29,8 @@ def health_check(request):
 @permission_classes([AllowAny])
 def health_check_detailed(request):
     """
-    Detailed health check including database and cache status.
+    Detailed health check including database and cache status, and the password
+    hashing queue.
     """
     health_status = {
         'status': 'OK',
@@ -58,6 +60,10 @@ def health_check_detailed(request):
         health_status['checks']['cache'] = 'FAILED'
         health_status['status'] = 'DEGRADED'
     
+    # Password hashing pool queue depth (not a failure: a full queue sheds logins itself);
+    # `enabled` is false where hashing runs on the request threads (PASSWORD_HASH_WORKERS=0)
+    health_status['checks']['password_hashing'] = hashing_stats()
+
     status_code = 200 if health_status['status'] == 'OK' else 503
     return Response(health_status, status=status_code)
 
@@ -0,0 +1,103 @@
+"""
+Shared pagination classes.
+"""
+import base64
+import json
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+def encode_position(position):
+    """Opaque, URL-safe token for a `(datetime, pk)` keyset position."""
+    value, pk = position
+    raw = json.dumps([value.isoformat(), str(pk)]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_position(encoded):
+    """Inverse of encode_position; raises ValueError for anything it did not produce."""
+    try:
+        padded = encoded + '=' * (-len(encoded) % 4)
+        value, pk = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        value = parse_datetime(value)
+    except (TypeError, ValueError):
+        raise ValueError('invalid position')
+    if value is None:
+        raise ValueError('invalid position')
+    return value, pk
+
+
+class KeysetPageNumberPagination(PageNumberPagination):
+    """
+    Page-number pagination with an opt-in keyset (cursor) mode.
+
+    Passing `?cursor=` (empty for the first page) switches to ordering on
+    `(keyset_field, id)` descending and filtering past the last row seen, so every page
+    costs the same index range scan regardless of depth and no COUNT(*) is issued.
+    The response is `{"next": ..., "results": [...]}`; follow `next` to continue.
+    """
+    keyset_field = 'created_at'
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset_mode = self.cursor_query_param in request.query_params
+        if not self.keyset_mode:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.request = request
+        page_size = self.get_page_size(request)
+        field = self.keyset_field
+        queryset = queryset.order_by(f'-{field}', '-id')
+
+        position = self.decode_cursor(request.query_params[self.cursor_query_param])
+        if position is not None:
+            value, pk = position
+            queryset = queryset.filter(
+                Q(**{f'{field}__lt': value}) | Q(**{field: value, 'id__lt': pk})
+            )
+
+        rows = list(queryset[:page_size + 1])
+        self.next_position = None
+        if len(rows) > page_size:
+            rows = rows[:page_size]
+            last = rows[-1]
+            if isinstance(last, dict):
+                # .values() rows (see edunova.serializers.CompiledListMixin)
+                self.next_position = (last[field], last['id'])
+            else:
+                self.next_position = (getattr(last, field), last.pk)
+        return rows
+
+    def decode_cursor(self, encoded):
+        if not encoded:
+            return None
+        try:
+            return decode_position(encoded)
+        except ValueError:
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, position):
+        return encode_position(position)
+
+    def get_next_link(self):
+        if not self.keyset_mode:
+            return super().get_next_link()
+        if self.next_position is None:
+            return None
+        url = remove_query_param(self.request.build_absolute_uri(), self.page_query_param)
+        cursor = self.encode_cursor(self.next_position)
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def get_paginated_response(self, data):
+        if not self.keyset_mode:
+            return super().get_paginated_response(data)
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
@@ -0,0 +1,82 @@
+"""
+Full-text search helpers shared by the apps' search indexes.
+
+Each index is a side table maintained incrementally on writes: an FTS5 virtual table on
+SQLite, a `tsvector` column with a GIN index on PostgreSQL. Other database backends
+report `search_supported() == False` and callers fall back to plain filtering.
+"""
+import html
+import re
+
+from django.db import connection
+from rest_framework.exceptions import ParseError
+from rest_framework.utils.urls import replace_query_param
+
+TERM_RE = re.compile(r"\w+", re.UNICODE)
+MAX_TERMS = 16
+# Private-use code points mark highlights inside snippets until the text is HTML-escaped.
+MARK_START = "\ue000"
+MARK_END = "\ue001"
+# PostgreSQL text search configuration: no stemming or stop words, like FTS5's unicode61
+PG_CONFIG = "simple"
+
+
+def vendor(using=None) -> str:
+    return (using or connection).vendor
+
+
+def search_supported(using=None) -> bool:
+    return vendor(using) in ("sqlite", "postgresql")
+
+
+def query_terms(text: str):
+    """Words of a user query, lowercased, de-duplicated and capped at MAX_TERMS."""
+    terms = []
+    for term in TERM_RE.findall((text or "").lower()):
+        if term not in terms:
+            terms.append(term)
+    return terms[:MAX_TERMS]
+
+
+def match_expression(terms, using=None) -> str:
+    """
+    Backend query string requiring every term, each matched as a prefix
+    (`"alg"*` for FTS5, `alg:*` for to_tsquery). Terms are \\w+ only, so nothing
+    the user typed can reach the query syntax.
+    """
+    if vendor(using) == "postgresql":
+        return " & ".join(f"{term}:*" for term in terms)
+    return " ".join(f'"{term}"*' for term in terms)
+
+
+def render_snippet(snippet: str) -> str:
+    """HTML-escape a snippet and turn the highlight markers into <mark> tags."""
+    escaped = html.escape(snippet or "")
+    return escaped.replace(MARK_START, "<mark>").replace(MARK_END, "</mark>")
+
+
+def pg_headline_options(words: int = 24) -> str:
+    return (
+        f"StartSel={MARK_START}, StopSel={MARK_END}, MaxWords={words}, MinWords={words // 2}, "
+        f"MaxFragments=2, FragmentDelimiter=…"
+    )
+
+
+def page_window(request, page_size, max_page_size):
+    """
+    `(page, page_size, offset)` from `?page=` / `?page_size=`. Search pages are fetched
+    with LIMIT/OFFSET and no COUNT(*); see next_page_link.
+    """
+    try:
+        page = max(int(request.query_params.get("page", 1)), 1)
+        size = int(request.query_params.get("page_size", page_size))
+    except ValueError:
+        raise ParseError("Invalid page.")
+    size = min(max(size, 1), max_page_size)
+    return page, size, (page - 1) * size
+
+
+def next_page_link(request, page, has_next):
+    if not has_next:
+        return None
+    return replace_query_param(request.build_absolute_uri(), "page", page + 1)
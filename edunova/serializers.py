@@ -0,0 +1,219 @@
+"""
+Read-path rendering of `.values()` rows.
+
+CompiledRowSerializer turns a ModelSerializer class into a flat plan, once: for each
+readable field, the `.values()` column it reads (`notebook.name` -> `notebook__name`)
+and how to convert the value. List pages then select only those columns and render
+plain dicts without building model instances or walking DRF fields per row, with the
+same JSON as the serializer it was compiled from.
+"""
+from uuid import UUID
+
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import ISO_8601, serializers
+from rest_framework.exceptions import ParseError
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+from .fields import CompressedTextField, decompress_text
+
+
+def _datetime_converter(request, field):
+    # DateTimeField.to_representation with the output timezone looked up once per page
+    # instead of once per value
+    output_format = getattr(field, 'format', api_settings.DATETIME_FORMAT)
+    field_timezone = field.timezone if hasattr(field, 'timezone') else field.default_timezone()
+    if output_format is None or output_format.lower() != ISO_8601 or field_timezone is None:
+        return field.to_representation
+
+    def convert(value):
+        if isinstance(value, str) or value.tzinfo is None:
+            return field.to_representation(value)
+        value = value.astimezone(field_timezone).isoformat()
+        if value.endswith('+00:00'):
+            value = value[:-6] + 'Z'
+        return value
+    return convert
+
+
+def _file_converter(request, storage, use_url):
+    def convert(name):
+        # FileField.to_representation on the stored name
+        if not name:
+            return None
+        if not use_url:
+            return name
+        url = storage.url(name)
+        return request.build_absolute_uri(url) if request is not None else url
+    return convert
+
+
+def _model_field(model, field):
+    """The model field a serializer field reads directly, if any."""
+    if len(field.source_attrs) != 1:
+        return None
+    try:
+        return model._meta.get_field(field.source)
+    except FieldDoesNotExist:
+        return None
+
+
+class CompiledRowSerializer:
+    """
+    Render `.values()` rows like `serializer_class(instances, many=True).data`.
+
+    Supports the field types the list serializers use: model fields, dotted sources
+    through relations, primary-key related fields and file fields; anything else raises
+    TypeError when the plan is compiled. `annotations` adds fields computed in the
+    database: `{name: expression}`, rendered as returned, or `{name: (expression,
+    convert)}`. CompressedTextField columns are decompressed.
+    """
+
+    def __init__(self, serializer_class, annotations=None):
+        self.serializer_class = serializer_class
+        self.annotations = annotations or {}
+        self._plan = None
+
+    @property
+    def plan(self):
+        # compiled on first use (the serializer's fields need the app registry)
+        if self._plan is None:
+            self._plan = self.compile()
+        return self._plan
+
+    @property
+    def field_names(self):
+        return [key for key, _, _, _ in self.plan]
+
+    def compile(self):
+        serializer = self.serializer_class()
+        model = serializer.Meta.model
+        plan = []
+        for field in serializer._readable_fields:
+            column = '__'.join(field.source_attrs)
+            plan.append((field.field_name, column) + self._converter(field, model))
+        for name, annotation in self.annotations.items():
+            convert = annotation[1] if isinstance(annotation, tuple) else None
+            plan.append((name, name, convert, None))
+        return plan
+
+    def _converter(self, field, model):
+        """
+        `(convert, factory)`: convert is None when the column value is already the output.
+        With a factory, convert holds its arguments; `factory(request, *convert)` builds
+        the converter once per render.
+        """
+        if isinstance(field, serializers.FileField):
+            if _model_field(model, field) is None:
+                raise TypeError(f'{field.field_name}: file fields must be model fields')
+            storage = _model_field(model, field).storage
+            use_url = getattr(field, 'use_url', api_settings.UPLOADED_FILES_USE_URL)
+            return (storage, use_url), _file_converter
+        if isinstance(field, serializers.DateTimeField):
+            return (field,), _datetime_converter
+        if isinstance(field, serializers.PrimaryKeyRelatedField) and field.pk_field is None:
+            # .values('fk') yields the related primary key
+            return None, None
+        if isinstance(field, serializers.RelatedField) or not isinstance(
+            field, (serializers.CharField, serializers.BooleanField, serializers.IntegerField,
+                    serializers.UUIDField, serializers.DateTimeField, serializers.DateField)
+        ):
+            raise TypeError(f'{field.field_name}: {type(field).__name__} cannot be compiled')
+        if isinstance(_model_field(model, field), CompressedTextField):
+            # .values() returns the stored form
+            return decompress_text, None
+        if type(field) in (serializers.CharField, serializers.BooleanField,
+                           serializers.IntegerField):
+            return None, None
+        if isinstance(field, serializers.UUIDField) and field.uuid_format == 'hex_verbose':
+            return UUID.__str__, None
+        return field.to_representation, None
+
+    def values(self, queryset, fields=None, extra=()):
+        """
+        The queryset reduced to the columns that `fields` (default: all) read, plus the
+        `extra` columns (e.g. what pagination needs). Other columns are never loaded.
+        """
+        columns, expressions = list(extra), {}
+        for key, column, _, _ in self.plan:
+            if fields is not None and key not in fields:
+                continue
+            if key in self.annotations:
+                annotation = self.annotations[key]
+                expressions[key] = annotation[0] if isinstance(annotation, tuple) else annotation
+            elif column not in columns:
+                columns.append(column)
+        return queryset.values(*columns, **expressions)
+
+    def render(self, rows, context=None, fields=None):
+        request = (context or {}).get('request')
+        plan = [
+            (key, column, factory(request, *convert) if factory else convert)
+            for key, column, convert, factory in self.plan
+            if fields is None or key in fields
+        ]
+        data = []
+        for row in rows:
+            item = {}
+            for key, column, convert in plan:
+                value = row[column]
+                if value is not None and convert is not None:
+                    value = convert(value)
+                item[key] = value
+            data.append(item)
+        return data
+
+
+class CompiledListMixin:
+    """
+    list() for generic views that pages `.values()` rows and renders them with
+    `row_serializer` (a CompiledRowSerializer of the view's serializer_class).
+    Everything else, writes included, keeps using serializer_class.
+
+    `?fields=a,b` renders only the named fields and `?omit=a,b` leaves fields out; the
+    columns of unrendered fields are not selected. `row_modes` optionally names field
+    sets chosen with `?mode=` (`default_row_mode` when absent); `fields` overrides the
+    mode's set.
+    """
+    row_serializer = None
+    row_modes = None
+    default_row_mode = None
+
+    def list(self, request, *args, **kwargs):
+        fields = self.get_row_fields(request)
+        # pagination reads the keyset position from the rows
+        keyset_field = getattr(self.paginator, 'keyset_field', None)
+        extra = ['id', keyset_field] if keyset_field else ['id']
+        queryset = self.filter_queryset(self.get_queryset())
+        rows = self.row_serializer.values(queryset, fields, extra)
+        context = self.get_serializer_context()
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(
+                self.row_serializer.render(page, context, fields)
+            )
+        return Response(self.row_serializer.render(rows, context, fields))
+
+    def get_row_fields(self, request):
+        """The field names to render, in serializer order."""
+        available = self.row_serializer.field_names
+        if self.row_modes:
+            mode = request.query_params.get('mode') or self.default_row_mode
+            if mode not in self.row_modes:
+                raise ParseError(f'Unknown mode. Use one of: {", ".join(self.row_modes)}.')
+            fields = set(self.row_modes[mode])
+        else:
+            fields = set(available)
+        requested = self._field_param(request, 'fields', available)
+        if requested:
+            fields = requested
+        fields -= self._field_param(request, 'omit', available)
+        return [name for name in available if name in fields]
+
+    def _field_param(self, request, param, available):
+        names = {name.strip() for name in request.query_params.get(param, '').split(',')}
+        names.discard('')
+        unknown = sorted(names.difference(available))
+        if unknown:
+            raise ParseError(f'Unknown field(s) in "{param}": {", ".join(unknown)}.')
+        return names
@@ -1,5 +1,6 @@
 from pathlib import Path
 import os
+import sys
 from datetime import timedelta
 from dotenv import dotenv_values
 
@@ -148,6 +149,8 @@ else:
 
     
 GOOGLE_CLIENT_ID = env_vars.get("GOOGLE_CLIENT_ID", "")
+# Where Google's ID token signing certificates are fetched from (cached per max-age)
+GOOGLE_CERTS_URL = env_vars.get("GOOGLE_CERTS_URL", "https://www.googleapis.com/oauth2/v1/certs")
 
 # ======================================================
 # AUTHENTICATION
@@ -180,7 +183,7 @@ SOCIALACCOUNT_PROVIDERS = {
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'accounts.authentication.ClaimsJWTAuthentication',
     ),
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
     'DEFAULT_FILTER_BACKENDS': [
@@ -193,6 +196,10 @@ REST_FRAMEWORK = {
     'EXCEPTION_HANDLER': 'edunova.exceptions.custom_exception_handler',
 }
 
+# Most operations accepted by one notes/bulk/ request (the body is also capped by
+# DATA_UPLOAD_MAX_MEMORY_SIZE)
+NOTE_BULK_MAX_OPERATIONS = int(env_vars.get("NOTE_BULK_MAX_OPERATIONS", "500"))
+
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=5),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=50),
@@ -203,6 +210,19 @@ SIMPLE_JWT = {
     'AUTH_HEADER_NAME': 'HTTP_AUTHORIZATION',
 }
 
+# Password hashing (accounts.hashing): PBKDF2 runs in this many worker processes per web
+# process (0 = on the request thread). At most MAX_PENDING hashes run or wait at once
+# (0 = 4 per worker); a request that gets no slot within QUEUE_TIMEOUT seconds is
+# answered 503
+PASSWORD_HASH_WORKERS = int(env_vars.get("PASSWORD_HASH_WORKERS", "0"))
+PASSWORD_HASH_MAX_PENDING = int(env_vars.get("PASSWORD_HASH_MAX_PENDING", "0"))
+PASSWORD_HASH_QUEUE_TIMEOUT = float(env_vars.get("PASSWORD_HASH_QUEUE_TIMEOUT", "0.5"))
+
+# Read-only requests take request.user from the access token's claims while its
+# auth_version matches; each process re-checks a user's version at most this often
+# (seconds, 0 = always load the user from the database)
+JWT_CLAIMS_USER_TTL = int(env_vars.get("JWT_CLAIMS_USER_TTL", "30"))
+
 # ======================================================
 # API DOCUMENTATION
 # ======================================================
@@ -246,6 +266,30 @@ MEDIA_ROOT = os.path.join(BASE_DIR, "media")
 TEMP_UPLOAD_DIR = os.path.join(MEDIA_ROOT, "temp")
 os.makedirs(TEMP_UPLOAD_DIR, exist_ok=True)
 
+# PDF downloads: "django" streams through the worker, "x-accel-redirect" (nginx) and
+# "x-sendfile" (Apache/lighttpd) hand the transfer to the front proxy after the permission check.
+PDF_DOWNLOAD_MODE = env_vars.get("PDF_DOWNLOAD_MODE", "django")
+# Internal proxy location that maps onto MEDIA_ROOT (see deploy/nginx.conf)
+PDF_X_ACCEL_LOCATION = env_vars.get("PDF_X_ACCEL_LOCATION", "/protected-media/")
+
+# Resumable (chunked) PDF uploads: total size limit and the largest single chunk accepted
+PDF_RESUMABLE_MAX_MB = int(env_vars.get("PDF_RESUMABLE_MAX_MB", "100"))
+PDF_UPLOAD_CHUNK_MAX_BYTES = int(env_vars.get("PDF_UPLOAD_CHUNK_MAX_BYTES", str(8 * 1024 * 1024)))
+# `expire_pdf_uploads` drops resumable uploads not resumed within this many hours
+PDF_UPLOAD_SESSION_TTL_HOURS = float(env_vars.get("PDF_UPLOAD_SESSION_TTL_HOURS", "24"))
+# `collect_pdf_blobs` only deletes unreferenced files not saved within this many seconds
+PDF_BLOB_GC_GRACE_SECONDS = int(env_vars.get("PDF_BLOB_GC_GRACE_SECONDS", "3600"))
+
+# Text in CompressedTextFields (note content) is stored zlib-compressed from this length
+COMPRESSED_TEXT_MIN_CHARS = int(env_vars.get("COMPRESSED_TEXT_MIN_CHARS", "4096"))
+
+# Note revision history (notebook.revisions): a full snapshot at least every N revisions,
+# the newest KEEP revisions per note (0 = no limit), and an age limit applied by
+# `prune_note_revisions` (0 days = none)
+NOTE_REVISION_SNAPSHOT_EVERY = int(env_vars.get("NOTE_REVISION_SNAPSHOT_EVERY", "20"))
+NOTE_REVISION_KEEP = int(env_vars.get("NOTE_REVISION_KEEP", "50"))
+NOTE_REVISION_MAX_AGE_DAYS = int(env_vars.get("NOTE_REVISION_MAX_AGE_DAYS", "0"))
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # ======================================================
@@ -301,8 +345,50 @@ if not CORS_ALLOW_ALL_ORIGINS:
 CACHES = {
     'default': {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-    }
+    },
+    # Rendered note PDFs for hot notes, bounded in entries (and per entry below)
+    'pdf_renders': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'pdf-renders',
+        'TIMEOUT': 60 * 60,
+        'OPTIONS': {'MAX_ENTRIES': 64},
+    },
 }
+PDF_RENDER_CACHE_MAX_BYTES = 2 * 1024 * 1024
+
+# ======================================================
+# BACKGROUND JOBS (CELERY)
+# ======================================================
+
+CELERY_BROKER_URL = env_vars.get("CELERY_BROKER_URL", "")
+# Run tasks in-process instead of on a worker. Only the default for development (DEBUG) and
+# the test suite without a broker; deployments set CELERY_BROKER_URL (docker-compose runs
+# Redis), and without either background work is refused or skipped with an error logged.
+TESTING = sys.argv[1:2] == ["test"]
+CELERY_TASK_ALWAYS_EAGER = env_vars.get(
+    "CELERY_TASK_ALWAYS_EAGER", str((DEBUG or TESTING) and not CELERY_BROKER_URL)
+) == "True"
+CELERY_TASK_IGNORE_RESULT = True
+# Periodic tasks, run by `celery -A edunova beat` (Procfile, docker-compose)
+CELERY_BEAT_SCHEDULE = {
+    "collect-pdf-blobs": {
+        "task": "PDFs.tasks.collect_pdf_blobs",
+        "schedule": float(env_vars.get("PDF_BLOB_GC_INTERVAL_SECONDS", "3600")),
+    },
+    "expire-pdf-uploads": {
+        "task": "PDFs.tasks.expire_pdf_uploads",
+        "schedule": 3600.0,
+    },
+}
+
+# Note -> PDF generation runs as a background job by default when True;
+# clients can override per request with ?async=true / ?async=false
+PDF_GENERATION_ASYNC = env_vars.get("PDF_GENERATION_ASYNC", "False") == "True"
+
+# Extract and index the text of stored PDFs in the background (see PDFs.tasks)
+PDF_TEXT_EXTRACTION = env_vars.get("PDF_TEXT_EXTRACTION", "True") == "True"
+# Pages longer than this are truncated before indexing
+PDF_TEXT_MAX_PAGE_CHARS = int(env_vars.get("PDF_TEXT_MAX_PAGE_CHARS", "20000"))
 
 # ======================================================
 # LOGGING
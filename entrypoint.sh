@@ -12,4 +12,4 @@ python manage.py collectstatic --noinput
 
 # Start Gunicorn
 echo "Starting Gunicorn..."
-exec gunicorn edunova.wsgi:application --bind 0.0.0.0:8000 --workers 3
+exec gunicorn edunova.wsgi:application --config gunicorn_config.py --bind 0.0.0.0:8000 --workers 3
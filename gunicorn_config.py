@@ -10,8 +10,16 @@ backlog = 2048
 
 # Worker processes
 workers = int(os.environ.get("GUNICORN_WORKERS", multiprocessing.cpu_count() * 2 + 1))
-worker_class = "sync"
+# Threaded workers: a worker keeps serving cheap requests while some of its threads wait
+# on password hashing, which runs in a separate process per worker with a bounded queue
+# (accounts.hashing). Every thread holds its own database connection, so peak connections
+# are workers x threads; the default of 4 threads keeps 3 workers at 12 (see DEPLOYMENT.md).
+# GUNICORN_WORKER_CLASS=sync turns both threads and the hashing pool off.
+worker_class = os.environ.get("GUNICORN_WORKER_CLASS", "gthread")
+threads = int(os.environ.get("GUNICORN_THREADS", "4" if worker_class == "gthread" else "1"))
 worker_connections = 1000
+if worker_class == "gthread":
+    os.environ.setdefault("PASSWORD_HASH_WORKERS", "1")
 timeout = 30
 keepalive = 2
 
@@ -1,27 +1,49 @@
 from django.contrib import admin
-from .models import Notebook, Note
+from .models import Notebook, Note, NoteRevision, PDFGenerationJob
 
 
 @admin.register(Notebook)
 class NotebookAdmin(admin.ModelAdmin):
-    list_display = ('name', 'owner', 'notes_count', 'created_at', 'updated_at')
+    list_display = (
+        'name', 'owner', 'notes_count', 'pdf_count', 'last_note_updated_at', 'created_at',
+        'updated_at',
+    )
     list_filter = ('created_at', 'updated_at')
     search_fields = ('name', 'description', 'owner__username', 'owner__email')
-    readonly_fields = ('created_at', 'updated_at')
+    readonly_fields = (
+        'notes_count', 'pdf_count', 'last_note_updated_at', 'created_at', 'updated_at'
+    )
     raw_id_fields = ('owner',)
     date_hierarchy = 'created_at'
-    
-    def notes_count(self, obj):
-        return obj.notes.count()
-    notes_count.short_description = 'Notes Count'
+    list_select_related = ('owner',)
 
 
 @admin.register(Note)
 class NoteAdmin(admin.ModelAdmin):
     list_display = ('title', 'owner', 'notebook', 'is_public', 'is_deleted', 'created_at', 'updated_at')
     list_filter = ('is_public', 'is_deleted', 'created_at', 'updated_at', 'notebook')
-    search_fields = ('title', 'content', 'owner__username', 'owner__email', 'notebook__name')
+    # not 'content': it is stored compressed (see edunova.fields), so LIKE would miss
+    # long notes; use the note search API for bodies
+    search_fields = ('title', 'owner__username', 'owner__email', 'notebook__name')
     readonly_fields = ('created_at', 'updated_at')
     raw_id_fields = ('owner', 'notebook')
     date_hierarchy = 'created_at'
     list_editable = ('is_public', 'is_deleted')
+
+
+@admin.register(PDFGenerationJob)
+class PDFGenerationJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'note', 'owner', 'status', 'progress', 'pdf', 'created_at', 'updated_at')
+    list_filter = ('status', 'created_at')
+    readonly_fields = ('created_at', 'updated_at')
+    raw_id_fields = ('note', 'owner', 'pdf')
+    date_hierarchy = 'created_at'
+
+
+@admin.register(NoteRevision)
+class NoteRevisionAdmin(admin.ModelAdmin):
+    list_display = ('note', 'number', 'kind', 'title', 'author', 'created_at')
+    list_filter = ('kind', 'created_at')
+    readonly_fields = ('note', 'number', 'kind', 'title', 'data', 'author', 'created_at')
+    raw_id_fields = ('note', 'author')
+    list_select_related = ('note', 'author')
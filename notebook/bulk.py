@@ -0,0 +1,150 @@
+"""
+Batched note writes for notes/bulk/.
+
+Every operation is validated first, with NoteSerializer's rules, against the user's
+notebooks and notes loaded in one query each; if any operation is invalid nothing is
+written. A valid batch is applied with bulk_create/bulk_update in one transaction, and
+the notebook summaries and search documents, which those bypass Note.save() for, are
+refreshed once for the whole batch.
+"""
+import uuid
+from collections import namedtuple
+
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+from rest_framework.serializers import as_serializer_error
+
+from .models import Note, Notebook, rebuild_notebook_summary
+from .revisions import record_initial_revisions, record_revisions
+from .search import index_notes
+from .serializers import BulkNoteSerializer, NoteOperationSerializer
+
+# Note ids per statement when refreshing the search index (bound-parameter limits)
+INDEX_CHUNK = 500
+SEARCHED_FIELDS = {'title', 'content', 'is_deleted'}
+
+NoteOperation = namedtuple('NoteOperation', 'index op ref note attrs')
+
+
+def _uuid(value):
+    try:
+        return uuid.UUID(str(value))
+    except ValueError:
+        return None
+
+
+def validate_note_operations(user, raw_operations):
+    """
+    Validate a list of raw operations for `user`.
+    Returns `(operations, errors)`: NoteOperation tuples, and `{"index", "errors"}` for
+    each operation that failed (an empty list when the batch can be applied).
+    """
+    # One serializer per kind, reused for every item: building a ModelSerializer's
+    # fields costs far more than validating one note.
+    parser = NoteOperationSerializer()
+    parsed, errors = [], []
+    for index, raw in enumerate(raw_operations):
+        try:
+            parsed.append((index, parser.run_validation(raw)))
+        except ValidationError as exc:
+            errors.append({'index': index, 'errors': as_serializer_error(exc)})
+
+    notebook_ids = {
+        _uuid(attrs['data']['notebook'])
+        for _, attrs in parsed if 'notebook' in attrs.get('data', {})
+    }
+    notebook_ids.discard(None)
+    notebooks = Notebook.objects.filter(owner=user).in_bulk(notebook_ids)
+    # notes of other users look missing, the same as notes that do not exist
+    notes = (
+        Note.objects.select_related('notebook')
+        .filter(owner=user, is_deleted=False)
+        .in_bulk([attrs['id'] for _, attrs in parsed if 'id' in attrs])
+    )
+
+    operations, seen = [], set()
+    context = {'notebooks': notebooks}
+    creating = BulkNoteSerializer(context=context)
+    updating = BulkNoteSerializer(context=context, partial=True)
+    for index, attrs in parsed:
+        op, note = attrs['op'], None
+        if op != NoteOperationSerializer.OP_CREATE:
+            note = notes.get(attrs['id'])
+            if note is None:
+                errors.append({'index': index, 'errors': {'id': ['Note not found.']}})
+                continue
+            if note.pk in seen:
+                errors.append(
+                    {'index': index, 'errors': {'id': ['More than one operation for this note.']}}
+                )
+                continue
+            seen.add(note.pk)
+
+        validated = {}
+        if op != NoteOperationSerializer.OP_DELETE:
+            serializer = creating if note is None else updating
+            serializer.instance = note
+            try:
+                validated = serializer.run_validation(attrs['data'])
+            except ValidationError as exc:
+                errors.append({'index': index, 'errors': as_serializer_error(exc)})
+                continue
+        operations.append(NoteOperation(index, op, attrs.get('ref'), note, validated))
+
+    errors.sort(key=lambda error: error['index'])
+    return operations, errors
+
+
+def apply_note_operations(user, operations):
+    """
+    Write validated operations in one transaction. "delete" moves the note to the trash
+    (is_deleted), like the rest of the app. Returns the notes in operation order.
+    """
+    now = timezone.now()
+    created, changed, fields = [], [], {'updated_at'}
+    notebook_ids, reindex, revised = set(), [], []
+    results = []
+    for operation in operations:
+        if operation.op == NoteOperationSerializer.OP_CREATE:
+            note = Note(owner=user, **operation.attrs)
+            created.append(note)
+            reindex.append(note.pk)
+            revised.append(note)
+        else:
+            note = operation.note
+            notebook_ids.add(note.notebook_id)
+            if operation.op == NoteOperationSerializer.OP_DELETE:
+                note.is_deleted = True
+                fields.add('is_deleted')
+                reindex.append(note.pk)
+            else:
+                for name, value in operation.attrs.items():
+                    setattr(note, name, value)
+                fields.update(operation.attrs)
+                if SEARCHED_FIELDS & set(operation.attrs):
+                    reindex.append(note.pk)
+                if {'title', 'content'} & set(operation.attrs):
+                    revised.append(note)
+            # bulk_update() does not apply auto_now
+            note.updated_at = now
+            changed.append(note)
+        notebook_ids.add(note.notebook_id)
+        results.append(note)
+
+    with transaction.atomic():
+        # before anything is written: notes edited for the first time keep their old version
+        record_initial_revisions([note.pk for note in revised])
+        if created:
+            Note.objects.bulk_create(created)
+        if changed:
+            Note.objects.bulk_update(changed, sorted(fields))
+        # one UPDATE recomputes every touched notebook (including moves between notebooks)
+        rebuild_notebook_summary(notebook_ids)
+        for start in range(0, len(reindex), INDEX_CHUNK):
+            index_notes(reindex[start:start + INDEX_CHUNK])
+        record_revisions(revised, author=user)
+
+    for note in results:
+        note._remember_counter_state()
+    return results
@@ -0,0 +1,168 @@
+"""
+Whole-notebook exports, produced as byte generators for StreamingHttpResponse.
+
+Notes are read with `.iterator()` and output is handed to the client as it is written,
+so memory stays flat however many notes or PDFs a notebook holds.
+"""
+import posixpath
+import zipfile
+
+from django.db.models import Q
+
+from PDFs.models import PDF
+from PDFs.utils.layout import (
+    BOTTOM_MARGIN, CONTINUATION_TOP, LEFT_MARGIN, MAX_WIDTH, STYLES, TextRun, layout_document,
+    metrics_for,
+)
+from PDFs.utils.pdfstream import StreamingPDFWriter
+
+NOTES_CHUNK = 200
+ZIP_READ_SIZE = 64 * 1024
+TOC_TOP = CONTINUATION_TOP - 30
+TOC_LINES_PER_PAGE = int((TOC_TOP - BOTTOM_MARGIN) // STYLES["body"].leading) + 1
+
+
+class StreamBuffer:
+    """
+    Write-only file object whose contents are drained by the generator feeding the response.
+    """
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+def export_notes(notebook):
+    return notebook.notes.filter(is_deleted=False).order_by("created_at", "id")
+
+
+def _toc_pages(entries):
+    """
+    Lay out the table of contents: one line per (title, page) entry, page numbers
+    right-aligned. Titles are clipped to a single line so the page count is known upfront.
+    """
+    style = STYLES["body"]
+    metrics = metrics_for(style)
+    right = LEFT_MARGIN + MAX_WIDTH
+    page = [TextRun(LEFT_MARGIN, CONTINUATION_TOP, "Contents", STYLES["title"])]
+    y = TOC_TOP
+    for index, (title, number) in enumerate(entries):
+        if index and index % TOC_LINES_PER_PAGE == 0:
+            yield page
+            page = []
+            y = TOC_TOP
+        label = str(number)
+        width = metrics.word(label)
+        clipped = metrics.split_word(title or "Untitled", MAX_WIDTH - width - 20)[0]
+        page.append(TextRun(LEFT_MARGIN, y, clipped, style))
+        page.append(TextRun(right - width, y, label, style))
+        y -= style.leading
+    yield page
+
+
+def notebook_pdf_stream(notebook):
+    """
+    One PDF for the whole notebook: a table of contents, then one section per note
+    (each starting on a new page), with a bookmark per note.
+
+    A first pass lays out every note only to count its pages; nothing but the note
+    ids and page counts is kept between the passes.
+    """
+    sections = []
+    for note in export_notes(notebook).only("id", "title", "content").iterator(NOTES_CHUNK):
+        pages = sum(1 for _ in layout_document(note.title, note.content))
+        sections.append((note.pk, pages))
+
+    toc_count = max(1, -(-len(sections) // TOC_LINES_PER_PAGE))
+    buffer = StreamBuffer()
+    writer = StreamingPDFWriter(buffer, title=notebook.name)
+
+    def numbered():
+        number = toc_count + 1
+        for pk, pages in sections:
+            yield pk, number
+            number += pages
+
+    starts = dict(numbered())
+    titles = (
+        (note.title, starts[note.pk])
+        for note in export_notes(notebook).only("id", "title").iterator(NOTES_CHUNK)
+        if note.pk in starts
+    )
+    for page in _toc_pages(titles):
+        writer.add_page(page)
+    yield buffer.drain()
+
+    for offset in range(0, len(sections), NOTES_CHUNK):
+        ids = [pk for pk, _ in sections[offset:offset + NOTES_CHUNK]]
+        notes = export_notes(notebook).filter(pk__in=ids).only("id", "title", "content")
+        for note in notes:
+            for index, page in enumerate(layout_document(note.title, note.content)):
+                page_id = writer.add_page(page)
+                if index == 0:
+                    writer.add_outline(note.title or "Untitled", page_id, CONTINUATION_TOP + 20)
+                yield buffer.drain()
+    writer.close()
+    yield buffer.drain()
+
+
+def notebook_pdfs(notebook, user):
+    """
+    Stored PDFs linked to the notebook's notes that `user` may download.
+    """
+    return (
+        PDF.objects.filter(linked_note__notebook=notebook, linked_note__is_deleted=False)
+        .filter(Q(uploaded_by=user) | Q(is_public=True))
+        .exclude(file="")
+        .exclude(file__isnull=True)
+        .select_related("linked_note")
+        .order_by("linked_note__created_at", "created_at", "id")
+    )
+
+
+def _archive_name(pdf, used):
+    folder = (pdf.linked_note.title or "Untitled").replace("/", "_").strip() or "Untitled"
+    stem, ext = posixpath.splitext((pdf.file_name or "document.pdf").replace("/", "_"))
+    name = f"{folder}/{stem}{ext or '.pdf'}"
+    counter = 1
+    while name in used:
+        counter += 1
+        name = f"{folder}/{stem} ({counter}){ext or '.pdf'}"
+    used.add(name)
+    return name
+
+
+def notebook_zip_stream(notebook, user):
+    """
+    ZIP of the notebook's stored PDFs, one folder per note. PDFs are already compressed,
+    so entries are stored rather than deflated; the archive is written to a non-seekable
+    stream, so zipfile emits data descriptors instead of seeking back.
+    """
+    buffer = StreamBuffer()
+    used = set()
+    with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_STORED, allowZip64=True) as archive:
+        for pdf in notebook_pdfs(notebook, user).iterator(NOTES_CHUNK):
+            try:
+                source = pdf.file.open("rb")
+            except FileNotFoundError:
+                continue
+            info = zipfile.ZipInfo(
+                _archive_name(pdf, used), date_time=pdf.updated_at.timetuple()[:6]
+            )
+            with source, archive.open(info, "w", force_zip64=True) as entry:
+                for chunk in iter(lambda: source.read(ZIP_READ_SIZE), b""):
+                    entry.write(chunk)
+                    yield buffer.drain()
+            yield buffer.drain()
+    yield buffer.drain()
@@ -0,0 +1,40 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models.functions import Length
+
+from edunova.fields import COMPRESSED_PREFIX
+from notebook.models import Note
+
+
+class Command(BaseCommand):
+    help = (
+        "Rewrite note contents stored before compression was enabled (or below a higher "
+        "threshold) in compressed form, in batches."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=200)
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        candidates = (
+            Note.objects.annotate(content_length=Length("content"))
+            .filter(content_length__gte=settings.COMPRESSED_TEXT_MIN_CHARS)
+            .exclude(content__startswith=COMPRESSED_PREFIX)
+            .order_by("pk")
+        )
+        rewritten = 0
+        last_pk = None
+        while True:
+            batch = candidates if last_pk is None else candidates.filter(pk__gt=last_pk)
+            # updated_at is left alone: the text itself does not change
+            notes = list(batch.only("id", "content")[:batch_size])
+            if not notes:
+                break
+            with transaction.atomic():
+                Note.objects.bulk_update(notes, ["content"])
+            rewritten += len(notes)
+            last_pk = notes[-1].pk
+            self.stdout.write(f"Compressed {rewritten} note(s)...")
+        self.stdout.write(self.style.SUCCESS(f"Compressed {rewritten} note(s)."))
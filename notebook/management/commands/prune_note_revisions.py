@@ -0,0 +1,33 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from notebook.revisions import prune_revisions
+
+
+class Command(BaseCommand):
+    help = (
+        "Apply the note revision retention policy: keep the newest NOTE_REVISION_KEEP "
+        "revisions of each note and drop revisions older than --days."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days", type=int, default=settings.NOTE_REVISION_MAX_AGE_DAYS,
+            help="Drop revisions older than this many days (0 disables the age limit).",
+        )
+        parser.add_argument(
+            "--keep", type=int, default=settings.NOTE_REVISION_KEEP,
+            help="Revisions kept per note (0 keeps any number).",
+        )
+
+    def handle(self, *args, **options):
+        older_than = None
+        if options["days"] > 0:
+            older_than = timezone.now() - timedelta(days=options["days"])
+        with transaction.atomic():
+            deleted = prune_revisions(keep=options["keep"], older_than=older_than)
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} note revision(s)."))
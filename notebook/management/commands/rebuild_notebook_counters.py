@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from notebook.models import rebuild_notebook_summary
+
+
+class Command(BaseCommand):
+    help = "Recompute the per-notebook summary columns (note/PDF counts, last note update)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "notebook_ids", nargs="*", help="Only rebuild these notebooks (default: all)."
+        )
+
+    def handle(self, *args, **options):
+        updated = rebuild_notebook_summary(options["notebook_ids"] or None)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt counters for {updated} notebook(s)."))
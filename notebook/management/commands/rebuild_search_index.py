@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from notebook.search import rebuild_index
+
+
+class Command(BaseCommand):
+    help = "Rebuild the full-text search documents of all active notes."
+
+    def handle(self, *args, **options):
+        rebuild_index()
+        self.stdout.write(self.style.SUCCESS("Note search index rebuilt."))
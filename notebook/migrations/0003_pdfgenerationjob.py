@@ -0,0 +1,35 @@
+# Generated by Django 4.2.30 on 2026-10-18 03:18
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('PDFs', '0005_pdfuploadsession'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('notebook', '0002_note_notebook_no_owner_i_959e24_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PDFGenerationJob',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('succeeded', 'Succeeded'), ('failed', 'Failed')], default='pending', max_length=20)),
+                ('progress', models.PositiveSmallIntegerField(default=0)),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('note', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pdf_jobs', to='notebook.note')),
+                ('owner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pdf_jobs', to=settings.AUTH_USER_MODEL)),
+                ('pdf', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='PDFs.pdf')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['owner', 'created_at'], name='notebook_pd_owner_i_31031f_idx'), models.Index(fields=['status'], name='notebook_pd_status_7a2abf_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 4.2.30 on 2026-10-18 03:26
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_notes_count(apps, schema_editor):
+    Notebook = apps.get_model('notebook', 'Notebook')
+    Note = apps.get_model('notebook', 'Note')
+    active = (
+        Note.objects.filter(notebook=OuterRef('pk'), is_deleted=False)
+        .order_by()
+        .values('notebook')
+        .annotate(total=Count('pk'))
+        .values('total')
+    )
+    Notebook.objects.update(notes_count=Coalesce(Subquery(active), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notebook', '0003_pdfgenerationjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notebook',
+            name='notes_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_notes_count, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 4.2.30 on 2026-10-18 03:28
+
+from django.db import migrations, models
+from django.db.models import Count, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_summary(apps, schema_editor):
+    Notebook = apps.get_model('notebook', 'Notebook')
+    Note = apps.get_model('notebook', 'Note')
+    PDF = apps.get_model('PDFs', 'PDF')
+    latest = (
+        Note.objects.filter(notebook=OuterRef('pk'))
+        .order_by()
+        .values('notebook')
+        .annotate(latest=Max('updated_at'))
+        .values('latest')
+    )
+    pdfs = (
+        PDF.objects.filter(linked_note__notebook=OuterRef('pk'))
+        .order_by()
+        .values('linked_note__notebook')
+        .annotate(total=Count('pk'))
+        .values('total')
+    )
+    Notebook.objects.update(
+        last_note_updated_at=Subquery(latest), pdf_count=Coalesce(Subquery(pdfs), 0)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('PDFs', '0006_pdf_source_hash'),
+        ('notebook', '0004_notebook_notes_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notebook',
+            name='last_note_updated_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='notebook',
+            name='pdf_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_summary, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,91 @@
+from django.db import migrations
+
+from edunova.fields import decompress_text
+
+# The index as of this migration; notebook.search keeps it current afterwards. FTS5 rows
+# are keyed through notebook_note_search_key, not the note's rowid, which SQLite
+# renumbers whenever it rebuilds notebook_note.
+CREATE_SQL = {
+    "sqlite": [
+        "CREATE TABLE IF NOT EXISTS notebook_note_search_key ("
+        "id integer PRIMARY KEY, note_id char(32) NOT NULL UNIQUE)",
+        "CREATE VIRTUAL TABLE IF NOT EXISTS notebook_note_search USING fts5("
+        "title, content, tokenize='unicode61 remove_diacritics 2')",
+    ],
+    "postgresql": [
+        "CREATE TABLE IF NOT EXISTS notebook_note_search ("
+        "note_id uuid PRIMARY KEY REFERENCES notebook_note (id) "
+        "ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED, "
+        "document tsvector NOT NULL)",
+        "CREATE INDEX IF NOT EXISTS notebook_note_search_document_gin "
+        "ON notebook_note_search USING GIN (document)",
+    ],
+}
+DROP_SQL = {
+    "sqlite": [
+        "DROP TABLE IF EXISTS notebook_note_search",
+        "DROP TABLE IF EXISTS notebook_note_search_key",
+    ],
+    "postgresql": ["DROP TABLE IF EXISTS notebook_note_search"],
+}
+BATCH = 100
+
+
+def populate_search_index(connection):
+    """Index every active note; contents are decompressed here, so SQL never sees them."""
+    with connection.cursor() as cursor:
+        if connection.vendor == "sqlite":
+            cursor.execute(
+                "INSERT OR IGNORE INTO notebook_note_search_key (note_id) "
+                "SELECT id FROM notebook_note WHERE NOT is_deleted"
+            )
+            cursor.execute(
+                "SELECT k.id, n.title, n.content FROM notebook_note n "
+                "JOIN notebook_note_search_key k ON k.note_id = n.id WHERE NOT n.is_deleted"
+            )
+            insert = "INSERT INTO notebook_note_search (rowid, title, content) VALUES (%s, %s, %s)"
+        elif connection.vendor == "postgresql":
+            cursor.execute(
+                "SELECT id, title, content FROM notebook_note WHERE NOT is_deleted"
+            )
+            insert = (
+                "INSERT INTO notebook_note_search (note_id, document) VALUES (%s, "
+                "setweight(to_tsvector('simple', coalesce(%s, '')), 'A') || "
+                "setweight(to_tsvector('simple', coalesce(%s, '')), 'B'))"
+            )
+        else:
+            return
+        while True:
+            rows = cursor.fetchmany(BATCH)
+            if not rows:
+                break
+            with connection.cursor() as writer:
+                writer.executemany(
+                    insert,
+                    [(key, title, decompress_text(content)) for key, title, content in rows],
+                )
+
+
+def create_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    with connection.cursor() as cursor:
+        for statement in CREATE_SQL.get(connection.vendor, []):
+            cursor.execute(statement)
+    populate_search_index(connection)
+
+
+def drop_search_index(apps, schema_editor):
+    with schema_editor.connection.cursor() as cursor:
+        for statement in DROP_SQL.get(schema_editor.connection.vendor, []):
+            cursor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notebook', '0005_notebook_summary'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 4.2.30 on 2026-10-18 03:52
+
+from django.db import migrations
+import edunova.fields
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notebook', '0006_note_search_index'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='note',
+            name='content',
+            field=edunova.fields.CompressedTextField(),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 4.2.30 on 2026-10-18 03:56
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import edunova.fields
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('notebook', '0007_note_content_compressed'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NoteRevision',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('number', models.PositiveIntegerField()),
+                ('kind', models.CharField(choices=[('snapshot', 'Snapshot'), ('delta', 'Delta')], max_length=10)),
+                ('title', models.CharField(max_length=255)),
+                ('data', edunova.fields.CompressedTextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('author', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='note_revisions', to=settings.AUTH_USER_MODEL)),
+                ('note', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='revisions', to='notebook.note')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['note', 'kind', 'number'], name='notebook_no_note_id_349386_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='noterevision',
+            constraint=models.UniqueConstraint(fields=('note', 'number'), name='unique_note_revision_number'),
+        ),
+    ]
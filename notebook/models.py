@@ -1,6 +1,12 @@
 import uuid
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Count, F, Max, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+from django.db.models.signals import post_delete, pre_delete
+from django.dispatch import receiver
 from accounts.models import User
+from edunova.fields import CompressedTextField
+from .search import index_notes, unindex_notes
 
 
 class Notebook(models.Model):
@@ -12,6 +18,14 @@ class Notebook(models.Model):
     name = models.CharField(max_length=255)
     description = models.TextField(blank=True)
     owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name='notebooks')
+    # Summary maintained incrementally by Note.save(), PDF.save() and their delete handlers
+    # (see adjust_notebook_summary); rebuild_notebook_counters recomputes it.
+    # Active (not soft-deleted) notes
+    notes_count = models.IntegerField(default=0, editable=False)
+    # Most recent create/update/soft-delete of any note in the notebook
+    last_note_updated_at = models.DateTimeField(null=True, blank=True, editable=False)
+    # PDFs linked to the notebook's notes
+    pdf_count = models.IntegerField(default=0, editable=False)
     
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -34,7 +48,8 @@ class Note(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     notebook = models.ForeignKey(Notebook, on_delete=models.CASCADE, related_name='notes')
     title = models.CharField(max_length=255)
-    content = models.TextField()
+    # stored compressed above COMPRESSED_TEXT_MIN_CHARS, decompressed on first access
+    content = CompressedTextField()
     image = models.ImageField(upload_to='notes/', null=True, blank=True)
     is_public = models.BooleanField(default=False)
     is_deleted = models.BooleanField(default=False)
@@ -57,3 +72,208 @@ class Note(models.Model):
 
     def __str__(self):
         return f"{self.title} ({self.owner.username})"
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._remember_counter_state()
+        return instance
+
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        self._remember_counter_state()
+
+    def _remember_counter_state(self):
+        # deferred fields (.only()/.defer()) leave the stored state unknown
+        if 'notebook_id' in self.__dict__ and 'is_deleted' in self.__dict__:
+            self._counted = self._counter_state()
+        else:
+            self.__dict__.pop('_counted', None)
+
+    def _counter_state(self):
+        """(notebook_id, counted) as this note contributes to the notebook summary."""
+        return self.notebook_id, not self.is_deleted
+
+    def save(self, *args, **kwargs):
+        adding = self._state.adding
+        old = getattr(self, '_counted', None)
+        new = self._counter_state()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            update_fields = set(update_fields)
+        if old and update_fields is not None:
+            # fields left out of update_fields keep their stored value
+            new = (
+                new[0] if update_fields & {'notebook', 'notebook_id'} else old[0],
+                new[1] if 'is_deleted' in update_fields else old[1],
+            )
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
+            if adding or old is not None:
+                if old is not None and old[0] != new[0]:
+                    # the note and its linked PDFs leave the old notebook
+                    pdfs = self.pdf_set.count()
+                    adjust_notebook_summary(old[0], notes=-int(old[1]), pdfs=-pdfs)
+                    notes = int(new[1])
+                else:
+                    pdfs = 0
+                    notes = int(new[1]) - int(bool(old and old[1]))
+                adjust_notebook_summary(
+                    new[0], notes=notes, pdfs=pdfs, touched_at=self.updated_at
+                )
+            else:
+                # updated through an instance that was never loaded: previous state unknown
+                rebuild_notebook_summary([self.notebook_id])
+            if update_fields is None or update_fields & {'title', 'content', 'is_deleted'}:
+                index_notes([self.pk])
+        self._counted = new
+
+
+class PDFGenerationJob(models.Model):
+    """
+    Tracks a background note -> PDF generation requested through GeneratePDFFromNoteView.
+    """
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_SUCCEEDED = 'succeeded'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_SUCCEEDED, 'Succeeded'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    note = models.ForeignKey(Note, on_delete=models.CASCADE, related_name='pdf_jobs')
+    owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name='pdf_jobs')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    progress = models.PositiveSmallIntegerField(default=0)
+    pdf = models.ForeignKey('PDFs.PDF', on_delete=models.SET_NULL, null=True, blank=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['owner', 'created_at']),
+            models.Index(fields=['status']),
+        ]
+
+    def __str__(self):
+        return f"PDF job {self.id} ({self.status})"
+
+
+class NoteRevision(models.Model):
+    """
+    One saved version (title + content) of a note; see notebook.revisions.
+
+    A snapshot stores the full content; a delta stores the edit from the previous
+    revision's content, so rebuilding a version reads at most
+    NOTE_REVISION_SNAPSHOT_EVERY rows.
+    """
+    KIND_SNAPSHOT = 'snapshot'
+    KIND_DELTA = 'delta'
+    KIND_CHOICES = [
+        (KIND_SNAPSHOT, 'Snapshot'),
+        (KIND_DELTA, 'Delta'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    note = models.ForeignKey(Note, on_delete=models.CASCADE, related_name='revisions')
+    # 1, 2, ... per note, in save order
+    number = models.PositiveIntegerField()
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    title = models.CharField(max_length=255)
+    # full content (snapshot) or encoded delta against revision number - 1
+    data = CompressedTextField(blank=True)
+    author = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, blank=True, related_name='note_revisions'
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['note', 'number'], name='unique_note_revision_number'),
+        ]
+        indexes = [
+            models.Index(fields=['note', 'kind', 'number']),
+        ]
+
+    def __str__(self):
+        return f"{self.note_id} r{self.number} ({self.kind})"
+
+
+# ------------------------------------------------------
+# COUNTERS
+# ------------------------------------------------------
+
+def adjust_notebook_summary(notebook_id, notes=0, pdfs=0, touched_at=None):
+    """
+    Apply counter deltas (and a note activity timestamp) to one notebook in one UPDATE.
+    Call it after writes that bypass Note.save()/PDF.save() and their delete handlers, such as
+    bulk_create or QuerySet.update(is_deleted=...), in the same transaction.
+    """
+    changes = {}
+    if notes:
+        changes['notes_count'] = F('notes_count') + notes
+    if pdfs:
+        changes['pdf_count'] = F('pdf_count') + pdfs
+    if touched_at is not None:
+        touched = Value(touched_at)
+        changes['last_note_updated_at'] = Greatest(
+            Coalesce('last_note_updated_at', touched), touched
+        )
+    if changes and notebook_id is not None:
+        Notebook.objects.filter(pk=notebook_id).update(**changes)
+
+
+def _linked_pdf_count():
+    from PDFs.models import PDF
+
+    return Coalesce(
+        Subquery(
+            PDF.objects.filter(linked_note__notebook=OuterRef('pk'))
+            .order_by()
+            .values('linked_note__notebook')
+            .annotate(total=Count('pk'))
+            .values('total')
+        ),
+        0,
+    )
+
+
+def rebuild_notebook_summary(notebook_ids=None):
+    """
+    Recompute the notebook summary columns from the notes and PDFs tables
+    (all notebooks by default). Returns the number of notebooks updated.
+    """
+    notes = Note.objects.filter(notebook=OuterRef('pk')).order_by().values('notebook')
+    active = notes.filter(is_deleted=False).annotate(total=Count('pk')).values('total')
+    latest = notes.annotate(latest=Max('updated_at')).values('latest')
+    notebooks = Notebook.objects.all()
+    if notebook_ids is not None:
+        notebooks = notebooks.filter(pk__in=notebook_ids)
+    return notebooks.update(
+        notes_count=Coalesce(Subquery(active), 0),
+        last_note_updated_at=Subquery(latest),
+        pdf_count=_linked_pdf_count(),
+    )
+
+
+@receiver(pre_delete, sender=Note)
+def unindex_deleted_note(sender, instance, **kwargs):
+    unindex_notes([instance.pk])
+
+
+@receiver(post_delete, sender=Note)
+def release_note_count(sender, instance, origin=None, **kwargs):
+    if isinstance(origin, Notebook) or getattr(origin, 'model', None) is Notebook:
+        # the notebook itself is being deleted
+        return
+    notebook_id, counted = getattr(instance, '_counted', instance._counter_state())
+    # linked PDFs were already unlinked (SET_NULL) by the time post_delete runs
+    changes = {'pdf_count': _linked_pdf_count()}
+    if counted:
+        changes['notes_count'] = F('notes_count') - 1
+    Notebook.objects.filter(pk=notebook_id).update(**changes)
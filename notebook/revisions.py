@@ -0,0 +1,187 @@
+"""
+Note revision history.
+
+Saving a note's title or content through the API records a NoteRevision; a note edited
+before it has any (written before revisions existed, or outside the API) first gets its
+stored version as revision 1. Revisions are
+forward line deltas against the previous revision, with a full snapshot at least every
+NOTE_REVISION_SNAPSHOT_EVERY revisions (and whenever a delta would not be much smaller
+than the content), so any version is rebuilt from one snapshot plus fewer than
+SNAPSHOT_EVERY deltas.
+
+Retention keeps the newest NOTE_REVISION_KEEP revisions of each note and, through
+prune_note_revisions, drops revisions older than NOTE_REVISION_MAX_AGE_DAYS. The oldest
+revision kept is rewritten as a snapshot, so what remains can always be rebuilt.
+"""
+import difflib
+import json
+from collections import defaultdict
+
+from django.conf import settings
+from django.db.models import Count, Exists, Max, Min, OuterRef, Q, Subquery
+
+from edunova.fields import decompress_text
+from .models import Note, NoteRevision
+
+SNAPSHOT = NoteRevision.KIND_SNAPSHOT
+DELTA = NoteRevision.KIND_DELTA
+
+
+def make_delta(old, new):
+    """
+    Encode `new` as edits of `old`, by line: a JSON list whose items are either
+    `[start, end]` (copy those lines of `old`) or a string (insert it).
+    """
+    old_lines = old.splitlines(keepends=True)
+    new_lines = new.splitlines(keepends=True)
+    ops = []
+    matcher = difflib.SequenceMatcher(None, old_lines, new_lines)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'equal':
+            ops.append([i1, i2])
+        elif j2 > j1:
+            ops.append(''.join(new_lines[j1:j2]))
+    return json.dumps(ops, ensure_ascii=False, separators=(',', ':'))
+
+
+def apply_delta(old, delta):
+    old_lines = old.splitlines(keepends=True)
+    parts = []
+    for op in json.loads(delta):
+        if isinstance(op, str):
+            parts.append(op)
+        else:
+            parts.extend(old_lines[op[0]:op[1]])
+    return ''.join(parts)
+
+
+def _rebuild(chain):
+    """Content of the last revision of `chain` (a snapshot followed by its deltas)."""
+    content = chain[0].data
+    for revision in chain[1:]:
+        content = apply_delta(content, revision.data)
+    return content
+
+
+def _latest_snapshot(number=None):
+    snapshots = NoteRevision.objects.filter(note=OuterRef('note'), kind=SNAPSHOT)
+    if number is not None:
+        snapshots = snapshots.filter(number__lte=number)
+    return Subquery(snapshots.order_by('-number').values('number')[:1])
+
+
+def revision_content(revision):
+    """The content of `revision`, rebuilt from the nearest snapshot at or before it."""
+    if revision.kind == SNAPSHOT:
+        return revision.data
+    chain = list(
+        NoteRevision.objects.filter(
+            note_id=revision.note_id,
+            number__gte=_latest_snapshot(revision.number),
+            number__lte=revision.number,
+        ).order_by('number')
+    )
+    return _rebuild(chain)
+
+
+def record_initial_revisions(note_ids):
+    """
+    Snapshot the stored title and content of the notes that have no revision yet as
+    their revision 1, so the version an edit overwrites is kept. Call it in the
+    transaction that edits the notes, before saving them; it locks those notes' rows.
+    """
+    stored = (
+        Note.objects.select_for_update()
+        .filter(pk__in=note_ids)
+        .exclude(Exists(NoteRevision.objects.filter(note=OuterRef('pk'))))
+        .values_list('pk', 'title', 'content')
+    )
+    revisions = [
+        NoteRevision(
+            note_id=pk, number=1, kind=SNAPSHOT, title=title, data=decompress_text(content),
+        )
+        for pk, title, content in stored
+    ]
+    NoteRevision.objects.bulk_create(revisions)
+    return revisions
+
+
+def record_revisions(notes, author=None):
+    """
+    Record the current title and content of each note as its next revision, skipping
+    notes identical to their latest revision, then apply the per-note retention limit.
+    Call it in the transaction that saved the notes: their row locks keep concurrent
+    saves of one note from taking the same revision number.
+    """
+    notes = [note for note in notes if note.pk is not None]
+    if not notes:
+        return []
+    chains = defaultdict(list)
+    # every note's chain since its latest snapshot, in one query
+    latest = NoteRevision.objects.filter(
+        note__in=[note.pk for note in notes], number__gte=_latest_snapshot()
+    )
+    for revision in latest.order_by('note', 'number'):
+        chains[revision.note_id].append(revision)
+
+    every = settings.NOTE_REVISION_SNAPSHOT_EVERY
+    revisions = []
+    for note in notes:
+        chain, content = chains.get(note.pk), note.content
+        number, kind, data = 1, SNAPSHOT, content
+        if chain:
+            previous = _rebuild(chain)
+            if chain[-1].title == note.title and previous == content:
+                continue
+            number = chain[-1].number + 1
+            if len(chain) < every:
+                delta = make_delta(previous, content)
+                if len(delta) < len(content) // 2:
+                    kind, data = DELTA, delta
+        revisions.append(NoteRevision(
+            note=note, number=number, kind=kind, title=note.title, data=data, author=author,
+        ))
+    NoteRevision.objects.bulk_create(revisions)
+    prune_revisions([revision.note_id for revision in revisions])
+    return revisions
+
+
+def prune_revisions(note_ids=None, keep=None, older_than=None):
+    """
+    Apply the retention policy to the given notes (all by default): keep the newest
+    `keep` revisions of each (default NOTE_REVISION_KEEP; 0 keeps any number) and drop
+    revisions created before `older_than`. A note's newest revision is always kept.
+    Returns the number of revisions deleted.
+    """
+    keep = settings.NOTE_REVISION_KEEP if keep is None else keep
+    revisions = NoteRevision.objects.all()
+    if note_ids is not None:
+        revisions = revisions.filter(note__in=note_ids)
+    stats = revisions.values('note').annotate(
+        first=Min('number'), latest=Max('number'), total=Count('pk'),
+    )
+    if older_than is not None:
+        stats = stats.annotate(first_recent=Min('number', filter=Q(created_at__gte=older_than)))
+    else:
+        stats = stats.filter(total__gt=keep) if keep else stats.none()
+
+    deleted = 0
+    for row in stats:
+        cutoff = row['first']
+        if keep and row['total'] > keep:
+            cutoff = row['latest'] - keep + 1
+        if older_than is not None:
+            cutoff = max(cutoff, row['first_recent'] or row['latest'])
+        if cutoff > row['first']:
+            deleted += _drop_before(row['note'], cutoff)
+    return deleted
+
+
+def _drop_before(note_id, number):
+    oldest_kept = NoteRevision.objects.get(note_id=note_id, number=number)
+    if oldest_kept.kind == DELTA:
+        oldest_kept.data = revision_content(oldest_kept)
+        oldest_kept.kind = SNAPSHOT
+        oldest_kept.save(update_fields=['kind', 'data'])
+    deleted, _ = NoteRevision.objects.filter(note_id=note_id, number__lt=number).delete()
+    return deleted
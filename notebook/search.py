@@ -0,0 +1,229 @@
+"""
+Full-text index over notes (see edunova.search).
+
+`notebook_note_search` holds one search document per active note: an FTS5 table on
+SQLite, a weighted `tsvector` keyed by note id (GIN indexed) on PostgreSQL. FTS5 rows
+are keyed by integers, so `notebook_note_search_key` gives each note a permanent one
+(never the note row's own rowid, which SQLite renumbers when the table is rebuilt).
+Note.save() and delete() keep it current; soft-deleted notes are removed from it.
+Documents hold the plain text: compressed contents are decompressed before indexing.
+"""
+from django.db import connection
+
+from edunova.fields import COMPRESSED_PREFIX, decompress_text
+from edunova.search import (
+    MARK_END, MARK_START, PG_CONFIG, match_expression, pg_headline_options, query_terms,
+    render_snippet, search_supported, vendor,
+)
+
+TABLE = "notebook_note_search"
+KEY_TABLE = "notebook_note_search_key"
+NOTE_TABLE = "notebook_note"
+# Title matches outweigh body matches (bm25 column weights / tsvector weights A and B).
+TITLE_WEIGHT = 10.0
+SNIPPET_TOKENS = 24
+# Compressed notes (see edunova.fields) are indexed from Python, this many rows at a time;
+# PLAIN selects the rows SQL can index directly.
+COMPRESSED_BATCH = 100
+PLAIN = "substr(content, 1, %s) <> %s"
+PLAIN_PARAMS = [len(COMPRESSED_PREFIX), COMPRESSED_PREFIX]
+
+
+def _pg_document(alias="n"):
+    return (
+        f"setweight(to_tsvector('{PG_CONFIG}', coalesce({alias}.title, '')), 'A') || "
+        f"setweight(to_tsvector('{PG_CONFIG}', coalesce({alias}.content, '')), 'B')"
+    )
+
+
+def _db_ids(note_ids):
+    from .models import Note
+
+    pk = Note._meta.pk
+    return [pk.get_db_prep_value(note_id, connection) for note_id in note_ids]
+
+
+def index_notes(note_ids):
+    """
+    (Re)build the search documents of the given notes from their current rows.
+    Soft-deleted or missing notes end up with no document.
+    """
+    if not note_ids or not search_supported():
+        return
+    ids = _db_ids(note_ids)
+    marks = ", ".join(["%s"] * len(ids))
+    with connection.cursor() as cursor:
+        if vendor() == "sqlite":
+            cursor.execute(
+                f"DELETE FROM {TABLE} WHERE rowid IN "
+                f"(SELECT id FROM {KEY_TABLE} WHERE note_id IN ({marks}))",
+                ids,
+            )
+            cursor.execute(
+                f"INSERT OR IGNORE INTO {KEY_TABLE} (note_id) "
+                f"SELECT id FROM {NOTE_TABLE} WHERE id IN ({marks}) AND NOT is_deleted",
+                ids,
+            )
+            cursor.execute(
+                f"INSERT INTO {TABLE} (rowid, title, content) "
+                f"SELECT k.id, n.title, n.content FROM {NOTE_TABLE} n "
+                f"JOIN {KEY_TABLE} k ON k.note_id = n.id "
+                f"WHERE n.id IN ({marks}) AND NOT n.is_deleted AND {PLAIN}",
+                ids + PLAIN_PARAMS,
+            )
+        else:
+            cursor.execute(f"DELETE FROM {TABLE} WHERE note_id IN ({marks})", ids)
+            cursor.execute(
+                f"INSERT INTO {TABLE} (note_id, document) "
+                f"SELECT n.id, {_pg_document()} FROM {NOTE_TABLE} n "
+                f"WHERE n.id IN ({marks}) AND NOT n.is_deleted AND {PLAIN}",
+                ids + PLAIN_PARAMS,
+            )
+        _index_compressed(cursor, f"n.id IN ({marks})", ids)
+
+
+def _index_compressed(cursor, where, params):
+    """
+    Add the documents of compressed notes matching `where`: SQL only sees their stored
+    form, so they are decompressed here and inserted as text.
+    """
+    if vendor() == "sqlite":
+        source = (
+            f"SELECT k.id, n.title, n.content FROM {NOTE_TABLE} n "
+            f"JOIN {KEY_TABLE} k ON k.note_id = n.id"
+        )
+    else:
+        source = f"SELECT n.id, n.title, n.content FROM {NOTE_TABLE} n"
+    cursor.execute(
+        f"{source} WHERE {where} AND NOT n.is_deleted AND NOT {PLAIN}",
+        params + PLAIN_PARAMS,
+    )
+    while True:
+        rows = cursor.fetchmany(COMPRESSED_BATCH)
+        if not rows:
+            break
+        rows = [(key, title, decompress_text(content)) for key, title, content in rows]
+        with connection.cursor() as insert:
+            if vendor() == "sqlite":
+                insert.executemany(
+                    f"INSERT INTO {TABLE} (rowid, title, content) VALUES (%s, %s, %s)", rows
+                )
+            else:
+                insert.executemany(
+                    f"INSERT INTO {TABLE} (note_id, document) VALUES (%s, "
+                    f"setweight(to_tsvector('{PG_CONFIG}', coalesce(%s, '')), 'A') || "
+                    f"setweight(to_tsvector('{PG_CONFIG}', coalesce(%s, '')), 'B'))",
+                    rows,
+                )
+
+
+def unindex_notes(note_ids):
+    """
+    Drop the search documents (and SQLite keys) of notes being hard-deleted.
+    """
+    if not note_ids or not search_supported():
+        return
+    ids = _db_ids(note_ids)
+    marks = ", ".join(["%s"] * len(ids))
+    with connection.cursor() as cursor:
+        if vendor() == "sqlite":
+            cursor.execute(
+                f"DELETE FROM {TABLE} WHERE rowid IN "
+                f"(SELECT id FROM {KEY_TABLE} WHERE note_id IN ({marks}))",
+                ids,
+            )
+            cursor.execute(f"DELETE FROM {KEY_TABLE} WHERE note_id IN ({marks})", ids)
+        else:
+            cursor.execute(f"DELETE FROM {TABLE} WHERE note_id IN ({marks})", ids)
+
+
+def rebuild_index():
+    """Re-create every search document from the notes table."""
+    if not search_supported():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {TABLE}")
+        if vendor() == "sqlite":
+            cursor.execute(
+                f"DELETE FROM {KEY_TABLE} WHERE note_id NOT IN (SELECT id FROM {NOTE_TABLE})"
+            )
+            cursor.execute(
+                f"INSERT OR IGNORE INTO {KEY_TABLE} (note_id) "
+                f"SELECT id FROM {NOTE_TABLE} WHERE NOT is_deleted"
+            )
+            cursor.execute(
+                f"INSERT INTO {TABLE} (rowid, title, content) "
+                f"SELECT k.id, n.title, n.content FROM {NOTE_TABLE} n "
+                f"JOIN {KEY_TABLE} k ON k.note_id = n.id "
+                f"WHERE NOT n.is_deleted AND {PLAIN}",
+                PLAIN_PARAMS,
+            )
+        else:
+            cursor.execute(
+                f"INSERT INTO {TABLE} (note_id, document) "
+                f"SELECT n.id, {_pg_document()} FROM {NOTE_TABLE} n "
+                f"WHERE NOT n.is_deleted AND {PLAIN}",
+                PLAIN_PARAMS,
+            )
+        _index_compressed(cursor, "1 = 1", [])
+
+
+def search_notes(text, user, limit, offset=0):
+    """
+    Ranked search over the notes `user` may read (their own or public, not deleted).
+
+    Returns a list of `(note_id, rank, snippet_html)`, best match first. Every query
+    term must match, each as a prefix. Ranking is bm25 on SQLite and ts_rank_cd on
+    PostgreSQL, with title matches weighted above content matches.
+    """
+    terms = query_terms(text)
+    if not terms or not search_supported():
+        return []
+    expression = match_expression(terms)
+    owner = user.pk if user.is_authenticated else None
+    with connection.cursor() as cursor:
+        if vendor() == "sqlite":
+            cursor.execute(
+                f"SELECT n.id, -bm25({TABLE}, %s, 1.0) AS rank, "
+                f"snippet({TABLE}, 1, %s, %s, '…', %s) "
+                f"FROM {TABLE} JOIN {KEY_TABLE} k ON k.id = {TABLE}.rowid "
+                f"JOIN {NOTE_TABLE} n ON n.id = k.note_id "
+                f"WHERE {TABLE} MATCH %s AND NOT n.is_deleted "
+                f"AND (n.owner_id = %s OR n.is_public) "
+                f"ORDER BY bm25({TABLE}, %s, 1.0) LIMIT %s OFFSET %s",
+                [TITLE_WEIGHT, MARK_START, MARK_END, SNIPPET_TOKENS, expression, owner,
+                 TITLE_WEIGHT, limit, offset],
+            )
+            rows = cursor.fetchall()
+        else:
+            # ts_headline re-parses the content, so it only runs on the page of hits;
+            # compressed contents come back as stored and are highlighted below
+            options = pg_headline_options(SNIPPET_TOKENS)
+            cursor.execute(
+                f"SELECT hit.id, hit.rank, "
+                f"CASE WHEN {PLAIN} THEN ts_headline('{PG_CONFIG}', n.content, hit.q, %s) END, "
+                f"CASE WHEN NOT {PLAIN} THEN n.content END "
+                f"FROM (SELECT n.id, q, ts_rank_cd(s.document, q) AS rank "
+                f"      FROM {TABLE} s JOIN {NOTE_TABLE} n ON n.id = s.note_id, "
+                f"      to_tsquery('{PG_CONFIG}', %s) q "
+                f"      WHERE s.document @@ q AND NOT n.is_deleted "
+                f"      AND (n.owner_id = %s OR n.is_public) "
+                f"      ORDER BY rank DESC, n.id LIMIT %s OFFSET %s) hit "
+                f"JOIN {NOTE_TABLE} n ON n.id = hit.id ORDER BY hit.rank DESC, hit.id",
+                PLAIN_PARAMS + [options] + PLAIN_PARAMS + [expression, owner, limit, offset],
+            )
+            rows = []
+            for note_id, rank, snippet, stored in cursor.fetchall():
+                if stored is not None:
+                    cursor.execute(
+                        f"SELECT ts_headline('{PG_CONFIG}', %s, "
+                        f"to_tsquery('{PG_CONFIG}', %s), %s)",
+                        [decompress_text(stored), expression, options],
+                    )
+                    snippet = cursor.fetchone()[0]
+                rows.append((note_id, rank, snippet))
+
+    from .models import Note
+
+    to_python = Note._meta.pk.to_python
+    return [(to_python(note_id), rank, render_snippet(snippet)) for note_id, rank, snippet in rows]
@@ -1,14 +1,20 @@
+import uuid
+
 from rest_framework import serializers
-from .models import Notebook, Note
+from .models import Notebook, Note, NoteRevision, PDFGenerationJob
 
 
 class NotebookSerializer(serializers.ModelSerializer):
-    notes_count = serializers.IntegerField(source='notes.count', read_only=True)
-
     class Meta:
         model = Notebook
-        fields = ['id', 'name', 'description', 'owner', 'created_at', 'updated_at', 'notes_count']
-        read_only_fields = ['owner', 'created_at', 'updated_at', 'notes_count']
+        fields = [
+            'id', 'name', 'description', 'owner', 'created_at', 'updated_at',
+            'notes_count', 'last_note_updated_at', 'pdf_count',
+        ]
+        read_only_fields = [
+            'owner', 'created_at', 'updated_at',
+            'notes_count', 'last_note_updated_at', 'pdf_count',
+        ]
 
 
 class NoteSerializer(serializers.ModelSerializer):
@@ -23,3 +29,77 @@ class NoteSerializer(serializers.ModelSerializer):
             'created_at', 'updated_at'
         ]
         read_only_fields = ['owner', 'created_at', 'updated_at']
+
+
+class PreloadedNotebookField(serializers.PrimaryKeyRelatedField):
+    """
+    Notebook reference resolved from `context['notebooks']` (the caller's own notebooks,
+    loaded once per batch) instead of one query per value.
+    """
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault('queryset', Notebook.objects.none())
+        super().__init__(**kwargs)
+
+    def to_internal_value(self, data):
+        try:
+            pk = uuid.UUID(str(data))
+        except ValueError:
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        notebook = self.context['notebooks'].get(pk)
+        if notebook is None:
+            self.fail('does_not_exist', pk_value=data)
+        return notebook
+
+
+class BulkNoteSerializer(NoteSerializer):
+    """NoteSerializer for notes/bulk/: only the user's own notebooks are accepted."""
+    notebook = PreloadedNotebookField()
+
+
+class NoteOperationSerializer(serializers.Serializer):
+    """One entry of a notes/bulk/ request."""
+    OP_CREATE = 'create'
+    OP_UPDATE = 'update'
+    OP_DELETE = 'delete'
+
+    op = serializers.ChoiceField(choices=[OP_CREATE, OP_UPDATE, OP_DELETE])
+    id = serializers.UUIDField(required=False)
+    # client-side reference echoed back in the result (e.g. a local id for creates)
+    ref = serializers.CharField(required=False, max_length=255)
+    data = serializers.DictField(required=False)
+
+    def validate(self, attrs):
+        op = attrs['op']
+        if op == self.OP_CREATE and 'id' in attrs:
+            raise serializers.ValidationError({'id': 'Not allowed when creating a note.'})
+        if op != self.OP_CREATE and 'id' not in attrs:
+            raise serializers.ValidationError({'id': 'This field is required.'})
+        if op != self.OP_DELETE and 'data' not in attrs:
+            raise serializers.ValidationError({'data': 'This field is required.'})
+        return attrs
+
+
+class NoteTombstoneSerializer(serializers.ModelSerializer):
+    """What delta sync reports for a soft-deleted note."""
+
+    class Meta:
+        model = Note
+        fields = ['id', 'notebook', 'is_deleted', 'updated_at']
+        read_only_fields = fields
+
+
+class NoteRevisionSerializer(serializers.ModelSerializer):
+    """A revision in a note's history; the detail endpoint adds `content`."""
+
+    class Meta:
+        model = NoteRevision
+        fields = ['number', 'kind', 'title', 'author', 'created_at']
+        read_only_fields = fields
+
+
+class PDFGenerationJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = PDFGenerationJob
+        fields = ['id', 'note', 'status', 'progress', 'pdf', 'error', 'created_at', 'updated_at']
+        read_only_fields = fields
@@ -0,0 +1,76 @@
+import os
+import tempfile
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.files.base import ContentFile
+
+from PDFs.models import PDF
+from PDFs.storage import LocalTempFile
+from PDFs.utils.generator import generate_pdf_to_file, render_key
+
+
+def save_note_pdf(note, pdf_instance):
+    """
+    Render the note into `pdf_instance.file` and save the row.
+
+    The PDF is written page by page to a temporary file in TEMP_UPLOAD_DIR, which the
+    storage then moves into place, so memory use does not depend on the note's size.
+    Renders small enough for the `pdf_renders` cache are memoized for hot notes.
+    """
+    key = render_key(note.title, note.content)
+    cache = caches['pdf_renders']
+    pdf_bytes = cache.get(key)
+    if pdf_bytes is not None:
+        pdf_instance.file.save(pdf_instance.file_name, ContentFile(pdf_bytes), save=True)
+        return
+
+    fh = tempfile.NamedTemporaryFile(suffix='.part', dir=settings.TEMP_UPLOAD_DIR, delete=False)
+    try:
+        with fh:
+            generate_pdf_to_file(note.title, note.content, fh)
+            size = fh.tell()
+            if size <= settings.PDF_RENDER_CACHE_MAX_BYTES:
+                fh.seek(0)
+                cache.set(key, fh.read())
+            fh.seek(0)
+            pdf_instance.file.save(pdf_instance.file_name, LocalTempFile(fh), save=True)
+    finally:
+        # the storage keeps the temp file in place when an identical blob already exists
+        if os.path.exists(fh.name):
+            os.remove(fh.name)
+
+
+def generate_pdf_for_note(note, user, progress=None):
+    """
+    Return `(pdf, created)`: the PDF already generated for the note's current content,
+    or a freshly rendered one owned by `user`.
+    `progress`, if given, is called with a percentage as rendering advances.
+    """
+    source_hash = render_key(note.title, note.content)
+    existing = (
+        PDF.objects.filter(linked_note=note, uploaded_by=user, source_hash=source_hash)
+        .exclude(file='')
+        .order_by('-created_at')
+        .first()
+    )
+    if existing is not None:
+        return existing, False
+
+    if progress:
+        progress(10)
+    file_name = f"{note.title or 'note'}".replace(' ', '_') + ".pdf"
+
+    pdf_instance = PDF(
+        file_name=file_name,
+        title=note.title,
+        description=f"Generated from note {note.id}",
+        linked_note=note,
+        uploaded_by=user,
+        is_public=False,
+        source_hash=source_hash,
+    )
+    save_note_pdf(note, pdf_instance)
+    if progress:
+        progress(90)
+    return pdf_instance, True
@@ -0,0 +1,40 @@
+import logging
+
+from celery import shared_task
+
+from .models import PDFGenerationJob
+from .services import generate_pdf_for_note
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def run_pdf_generation_job(job_id):
+    """
+    Generate the PDF for a queued PDFGenerationJob and record the outcome on the job.
+    """
+    try:
+        job = PDFGenerationJob.objects.select_related('note', 'owner').get(pk=job_id)
+    except PDFGenerationJob.DoesNotExist:
+        logger.warning(f"PDF generation job {job_id} vanished before it ran")
+        return
+
+    jobs = PDFGenerationJob.objects.filter(pk=job.pk)
+    jobs.update(status=PDFGenerationJob.STATUS_RUNNING, progress=5)
+
+    def report(percent):
+        jobs.update(progress=percent)
+
+    try:
+        pdf, _ = generate_pdf_for_note(job.note, job.owner, progress=report)
+    except Exception as exc:
+        logger.error(f"PDF generation job {job.pk} failed: {exc}", exc_info=True)
+        job.status = PDFGenerationJob.STATUS_FAILED
+        job.error = str(exc)
+        job.save(update_fields=['status', 'error', 'updated_at'])
+        return
+
+    job.status = PDFGenerationJob.STATUS_SUCCEEDED
+    job.progress = 100
+    job.pdf = pdf
+    job.save(update_fields=['status', 'progress', 'pdf', 'updated_at'])
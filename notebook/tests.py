@@ -1,12 +1,38 @@
 """
 Unit tests for notebook app.
 """
-from django.test import TestCase
+import io
+import json
+import os
+import re
+import tempfile
+import uuid
+import zipfile
+from datetime import timedelta
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.contrib.auth import get_user_model
 from django.urls import reverse
+from django.utils import timezone
 from rest_framework.test import APIClient
-from rest_framework import status
-from .models import Notebook, Note
+from rest_framework import serializers, status
+from rest_framework.renderers import JSONRenderer
+from .models import Notebook, Note, NoteRevision, PDFGenerationJob
+from .revisions import revision_content
+from .serializers import NoteSerializer
+from .views import NOTE_PREVIEW_CHARS
+from edunova.fields import COMPRESSED_PREFIX, CompressedText, is_compressed
+from edunova.serializers import CompiledRowSerializer
+from PDFs.models import PDF
+from PDFs.utils.generator import generate_pdf_to_file
+from PDFs.utils.layout import layout_document
 
 User = get_user_model()
 
@@ -121,3 +147,1113 @@ class NotebookAPITestCase(TestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.note.refresh_from_db()
         self.assertEqual(self.note.title, 'Updated Note')
+
+
+class NoteCursorPaginationTestCase(TestCase):
+    """Test cases for the opt-in keyset pagination of the note list."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.notebook = Notebook.objects.create(name='Test Notebook', owner=self.user)
+        for i in range(25):
+            Note.objects.create(
+                notebook=self.notebook, title=f'Note {i}', content='Content', owner=self.user
+            )
+        self.client.force_authenticate(user=self.user)
+
+    def test_cursor_walks_all_notes_once(self):
+        """Test following next links visits every note exactly once, newest first."""
+        url = reverse('note-list-create') + '?cursor=&page_size=10'
+        seen = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertNotIn('count', response.data)
+            seen.extend(response.data['results'])
+            url = response.data['next']
+        self.assertEqual(len(seen), 25)
+        self.assertEqual(len({note['id'] for note in seen}), 25)
+        stamps = [note['updated_at'] for note in seen]
+        self.assertEqual(stamps, sorted(stamps, reverse=True))
+
+    def test_cursor_breaks_timestamp_ties_on_id(self):
+        """Test notes sharing a timestamp are neither skipped nor repeated."""
+        Note.objects.update(updated_at=timezone.now())
+        url = reverse('note-list-create') + '?cursor=&page_size=7'
+        ids = []
+        while url:
+            response = self.client.get(url)
+            ids.extend(note['id'] for note in response.data['results'])
+            url = response.data['next']
+        expected = [str(pk) for pk in Note.objects.values_list('id', flat=True)]
+        self.assertEqual(sorted(ids), sorted(expected))
+
+    def test_invalid_cursor(self):
+        """Test a malformed cursor returns 404."""
+        response = self.client.get(reverse('note-list-create') + '?cursor=garbage')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_page_number_mode_unchanged(self):
+        """Test requests without a cursor keep page-number pagination."""
+        response = self.client.get(reverse('note-list-create'))
+        self.assertEqual(response.data['count'], 25)
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class PDFGenerationJobTestCase(TestCase):
+    """Test cases for background note -> PDF generation."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.notebook = Notebook.objects.create(name='Test Notebook', owner=self.user)
+        self.note = Note.objects.create(
+            notebook=self.notebook, title='Test Note', content='Test Content', owner=self.user
+        )
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('note-generate-pdf', kwargs={'pk': self.note.id})
+
+    def test_sync_generation(self):
+        """Test generation without async returns the PDF directly."""
+        response = self.client.post(self.url)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(PDF.objects.filter(pk=response.data['id'], linked_note=self.note).exists())
+
+    def test_async_generation_reports_job(self):
+        """Test async generation returns 202 and the job reports the resulting PDF."""
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(self.url + '?async=true')
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.data['status'], PDFGenerationJob.STATUS_PENDING)
+
+        job = self.client.get(response.data['status_url']).data
+        self.assertEqual(job['status'], PDFGenerationJob.STATUS_SUCCEEDED)
+        self.assertEqual(job['progress'], 100)
+        self.assertTrue(PDF.objects.filter(pk=job['pdf'], linked_note=self.note).exists())
+
+    @override_settings(CELERY_BROKER_URL='', CELERY_TASK_ALWAYS_EAGER=False)
+    def test_async_generation_needs_a_broker(self):
+        """Test async generation without a broker is refused instead of run in the request."""
+        with self.assertLogs('notebook.views', 'ERROR'):
+            response = self.client.post(self.url + '?async=true')
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertFalse(PDFGenerationJob.objects.exists())
+        with override_settings(PDF_GENERATION_ASYNC=True), self.assertLogs('notebook.views'):
+            response = self.client.post(self.url)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def test_unchanged_note_reuses_pdf(self):
+        """Test regenerating an unchanged note returns the existing PDF."""
+        first = self.client.post(self.url)
+        second = self.client.post(self.url)
+        self.assertEqual(second.status_code, status.HTTP_200_OK)
+        self.assertEqual(first.data['id'], second.data['id'])
+
+        self.note.content = 'Changed Content'
+        self.note.save()
+        third = self.client.post(self.url)
+        self.assertEqual(third.status_code, status.HTTP_201_CREATED)
+        self.assertNotEqual(third.data['id'], first.data['id'])
+
+    def test_rendered_bytes_are_cached(self):
+        """Test a note is rendered once even if its PDF row is removed."""
+        caches['pdf_renders'].clear()
+        with mock.patch(
+            'notebook.services.generate_pdf_to_file', wraps=generate_pdf_to_file
+        ) as render:
+            self.client.post(self.url)
+            PDF.objects.all().delete()
+            response = self.client.post(self.url)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(render.call_count, 1)
+
+    @override_settings(PDF_RENDER_CACHE_MAX_BYTES=0)
+    def test_large_render_is_spooled_to_disk(self):
+        """Test renders are moved into storage from disk and leave no temp files behind."""
+        caches['pdf_renders'].clear()
+        before = set(os.listdir(settings.TEMP_UPLOAD_DIR))
+        self.note.content = 'lorem ipsum ' * 20000
+        self.note.save()
+        response = self.client.post(self.url)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        pdf = PDF.objects.get(pk=response.data['id'])
+        with pdf.file.open('rb') as fh:
+            self.assertTrue(fh.read(5) == b'%PDF-')
+        self.assertEqual(set(os.listdir(settings.TEMP_UPLOAD_DIR)), before)
+
+        # identical content maps onto the existing blob; the spooled copy is discarded
+        PDF.objects.all().delete()
+        self.client.post(self.url)
+        self.assertEqual(set(os.listdir(settings.TEMP_UPLOAD_DIR)), before)
+
+    def test_job_hidden_from_other_users(self):
+        """Test a job cannot be polled by another user."""
+        job = PDFGenerationJob.objects.create(note=self.note, owner=self.user)
+        other = User.objects.create_user(
+            username='otheruser',
+            email='other@example.com',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=other)
+        response = self.client.get(reverse('pdf-generation-job', kwargs={'pk': job.pk}))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class NotebookExportTestCase(TestCase):
+    """Test cases for streaming whole-notebook exports."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.notebook = Notebook.objects.create(name='Term Notes', owner=self.user)
+        self.notes = [
+            Note.objects.create(
+                notebook=self.notebook, title=f'Lecture {i}',
+                content='lorem ipsum ' * (400 * (i + 1)), owner=self.user
+            )
+            for i in range(3)
+        ]
+        Note.objects.create(
+            notebook=self.notebook, title='Deleted', content='x', owner=self.user, is_deleted=True
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def export(self, kind):
+        url = reverse('notebook-export', kwargs={'pk': self.notebook.id, 'kind': kind})
+        return self.client.get(url)
+
+    def test_pdf_export_has_contents_and_sections(self):
+        """Test the merged PDF holds a contents page and every active note's pages."""
+        response = self.export('pdf')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        data = b''.join(response.streaming_content)
+        self.assertTrue(data.startswith(b'%PDF-'))
+        self.assertTrue(data.endswith(b'%%EOF\n'))
+
+        note_pages = sum(
+            len(list(layout_document(note.title, note.content))) for note in self.notes
+        )
+        self.assertIn(b'/Type /Pages /Kids', data)
+        self.assertIn(b'/Count %d >>' % (note_pages + 1), data)
+        self.assertEqual(data.count(b'/Dest ['), 3)
+        self.assertIn(b'/Outlines', data)
+
+    def test_zip_export_contains_linked_pdfs(self):
+        """Test the ZIP holds each visible linked PDF exactly, one folder per note."""
+        for note in self.notes[:2]:
+            pdf = PDF(
+                file_name='notes.pdf', linked_note=note, uploaded_by=self.user, title=note.title
+            )
+            pdf.file.save('notes.pdf', ContentFile(b'%PDF-1.4 ' + note.title.encode()), save=True)
+        other = User.objects.create_user(
+            username='otheruser',
+            email='other@example.com',
+            password='testpass123'
+        )
+        private = PDF(file_name='secret.pdf', linked_note=self.notes[2], uploaded_by=other)
+        private.file.save('secret.pdf', ContentFile(b'%PDF-1.4 secret'), save=True)
+
+        response = self.export('zip')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        archive = zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content)))
+        self.assertEqual(
+            sorted(archive.namelist()), ['Lecture 0/notes.pdf', 'Lecture 1/notes.pdf']
+        )
+        self.assertEqual(archive.read('Lecture 1/notes.pdf'), b'%PDF-1.4 Lecture 1')
+
+    def test_export_owner_only(self):
+        """Test other users cannot export the notebook and unknown formats 404."""
+        self.assertEqual(self.export('docx').status_code, status.HTTP_404_NOT_FOUND)
+        other = User.objects.create_user(
+            username='otheruser',
+            email='other@example.com',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=other)
+        self.assertEqual(self.export('pdf').status_code, status.HTTP_403_FORBIDDEN)
+
+
+class NotebookNotesCountTestCase(TestCase):
+    """Test cases for the denormalized Notebook.notes_count counter."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.notebook = Notebook.objects.create(name='Test Notebook', owner=self.user)
+        self.other = Notebook.objects.create(name='Other Notebook', owner=self.user)
+
+    def count(self, notebook=None):
+        notebook = notebook or self.notebook
+        return Notebook.objects.get(pk=notebook.pk).notes_count
+
+    def add_note(self, **kwargs):
+        return Note.objects.create(
+            notebook=self.notebook, title='Note', content='Content', owner=self.user, **kwargs
+        )
+
+    def test_counter_follows_note_lifecycle(self):
+        """Test create, soft-delete, restore, move and hard delete keep the count exact."""
+        note = self.add_note()
+        self.add_note()
+        self.add_note(is_deleted=True)
+        self.assertEqual(self.count(), 2)
+
+        note.is_deleted = True
+        note.save()
+        self.assertEqual(self.count(), 1)
+        note.is_deleted = False
+        note.save(update_fields=['is_deleted'])
+        self.assertEqual(self.count(), 2)
+
+        note = Note.objects.get(pk=note.pk)
+        note.notebook = self.other
+        note.save()
+        self.assertEqual((self.count(), self.count(self.other)), (1, 1))
+
+        note.delete()
+        Note.objects.filter(notebook=self.notebook).delete()
+        self.assertEqual((self.count(), self.count(self.other)), (0, 0))
+
+    def test_unsaved_fields_do_not_count(self):
+        """Test a change left out of update_fields does not move the counter."""
+        note = self.add_note()
+        note.is_deleted = True
+        note.save(update_fields=['title'])
+        self.assertEqual(self.count(), 1)
+
+    def test_rebuild_command(self):
+        """Test the rebuild command repairs counters after bulk writes."""
+        self.add_note()
+        Note.objects.bulk_create([
+            Note(notebook=self.notebook, title='Bulk', content='x', owner=self.user)
+            for _ in range(3)
+        ])
+        self.assertEqual(self.count(), 1)
+        call_command('rebuild_notebook_counters', stdout=io.StringIO())
+        self.assertEqual(self.count(), 4)
+
+    def test_summary_tracks_notes_and_pdfs(self):
+        """Test last note activity and linked PDF count follow notes and PDFs."""
+        note = self.add_note()
+        self.assertEqual(
+            Notebook.objects.get(pk=self.notebook.pk).last_note_updated_at, note.updated_at
+        )
+        pdf = PDF.objects.create(file_name='a.pdf', linked_note=note, uploaded_by=self.user)
+        PDF.objects.create(file_name='b.pdf', linked_note=note, uploaded_by=self.user)
+        self.assertEqual(Notebook.objects.get(pk=self.notebook.pk).pdf_count, 2)
+
+        pdf = PDF.objects.get(pk=pdf.pk)
+        pdf.linked_note = None
+        pdf.save()
+        self.assertEqual(Notebook.objects.get(pk=self.notebook.pk).pdf_count, 1)
+
+        note.notebook = self.other
+        note.save()
+        moved = Notebook.objects.get(pk=self.other.pk)
+        self.assertEqual((moved.pdf_count, moved.last_note_updated_at), (1, note.updated_at))
+        self.assertEqual(Notebook.objects.get(pk=self.notebook.pk).pdf_count, 0)
+
+        note.delete()
+        self.assertEqual(Notebook.objects.get(pk=self.other.pk).pdf_count, 0)
+
+        Notebook.objects.update(notes_count=9, pdf_count=9, last_note_updated_at=None)
+        call_command('rebuild_notebook_counters', stdout=io.StringIO())
+        rebuilt = Notebook.objects.get(pk=self.notebook.pk)
+        self.assertEqual((rebuilt.notes_count, rebuilt.pdf_count), (0, 0))
+
+    def test_list_scoped_to_owner(self):
+        """Test users only list their own notebooks."""
+        other = User.objects.create_user(
+            username='otheruser',
+            email='other@example.com',
+            password='testpass123'
+        )
+        Notebook.objects.create(name='Not mine', owner=other)
+        self.client.force_authenticate(user=self.user)
+        response = self.client.get(reverse('notebook-list-create'))
+        self.assertEqual(response.data['count'], 2)
+        self.assertNotIn('Not mine', [nb['name'] for nb in response.data['results']])
+
+    def test_notebook_list_is_one_query(self):
+        """Test listing notebooks does not query notes per notebook."""
+        for _ in range(5):
+            notebook = Notebook.objects.create(name='Extra', owner=self.user)
+            Note.objects.create(notebook=notebook, title='N', content='x', owner=self.user)
+        self.client.force_authenticate(user=self.user)
+        url = reverse('notebook-list-create')
+        self.client.get(url)
+        with self.assertNumQueries(2):  # count + page
+            response = self.client.get(url)
+        self.assertEqual(sorted(nb['notes_count'] for nb in response.data['results']),
+                         [0, 0, 1, 1, 1, 1, 1])
+
+
+class NoteSearchTestCase(TestCase):
+    """Test cases for ranked full-text search over notes."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.other = User.objects.create_user(
+            username='otheruser',
+            email='other@example.com',
+            password='testpass123'
+        )
+        self.notebook = Notebook.objects.create(name='Maths', owner=self.user)
+        other_notebook = Notebook.objects.create(name='Other', owner=self.other)
+        self.title_hit = self.add(self.notebook, self.user, 'Linear algebra', 'Vectors and spaces')
+        self.body_hit = self.add(
+            self.notebook, self.user, 'Week 3', 'Today: <b>algebra</b> of matrices and more'
+        )
+        self.public = self.add(other_notebook, self.other, 'Shared', 'algebra notes', True)
+        self.private = self.add(other_notebook, self.other, 'Private', 'algebra secrets')
+        self.client.force_authenticate(user=self.user)
+
+    def add(self, notebook, owner, title, content, is_public=False):
+        return Note.objects.create(
+            notebook=notebook, owner=owner, title=title, content=content, is_public=is_public
+        )
+
+    def search(self, query, **params):
+        params['q'] = query
+        response = self.client.get(reverse('note-search'), params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def ids(self, data):
+        return [result['id'] for result in data['results']]
+
+    def test_ranked_prefix_search_respects_visibility(self):
+        """Test prefix matches are ranked title-first and private notes stay hidden."""
+        data = self.search('alg')
+        ids = self.ids(data)
+        self.assertEqual(ids[0], str(self.title_hit.id))
+        self.assertEqual(
+            sorted(ids), sorted(str(n.id) for n in (self.title_hit, self.body_hit, self.public))
+        )
+        self.assertNotIn(str(self.private.id), ids)
+
+    def test_snippets_are_escaped_and_highlighted(self):
+        """Test snippets mark matches and escape note markup."""
+        data = self.search('matrices')
+        snippet = data['results'][0]['snippet']
+        self.assertIn('<mark>matrices</mark>', snippet)
+        self.assertIn('&lt;b&gt;', snippet)
+
+    def test_index_follows_updates_and_deletes(self):
+        """Test edits, soft-deletes, restores and hard deletes update the index."""
+        self.body_hit.content = 'Now about calculus'
+        self.body_hit.save()
+        self.assertNotIn(str(self.body_hit.id), self.ids(self.search('algebra')))
+        self.assertIn(str(self.body_hit.id), self.ids(self.search('calculus')))
+
+        self.title_hit.is_deleted = True
+        self.title_hit.save(update_fields=['is_deleted'])
+        self.assertNotIn(str(self.title_hit.id), self.ids(self.search('linear')))
+        self.title_hit.is_deleted = False
+        self.title_hit.save()
+        self.assertIn(str(self.title_hit.id), self.ids(self.search('linear')))
+
+        self.title_hit.delete()
+        self.assertEqual(self.ids(self.search('linear')), [])
+
+    def test_index_survives_renumbered_note_rows(self):
+        """Test documents stay with their notes when SQLite renumbers the note rowids."""
+        if connection.vendor != 'sqlite':
+            self.skipTest('rowids are SQLite-specific')
+        # what a table rebuild (AlterField) or VACUUM may do to the implicit rowids
+        public, private = (
+            Note._meta.pk.get_db_prep_value(n.id, connection) for n in (self.public, self.private)
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT id, rowid FROM notebook_note WHERE id IN (%s, %s)", [public, private]
+            )
+            rowids = dict(cursor.fetchall())
+            cursor.execute("UPDATE notebook_note SET rowid = -1 WHERE id = %s", [public])
+            cursor.execute(
+                "UPDATE notebook_note SET rowid = %s WHERE id = %s", [rowids[public], private]
+            )
+            cursor.execute(
+                "UPDATE notebook_note SET rowid = %s WHERE id = %s", [rowids[private], public]
+            )
+
+        self.assertEqual(self.ids(self.search('secrets')), [])
+        data = self.search('notes')
+        self.assertEqual(self.ids(data), [str(self.public.id)])
+        self.assertNotIn('secrets', data['results'][0]['snippet'])
+
+    def test_every_term_must_match_and_pages(self):
+        """Test multi-word queries are conjunctive and results page with next links."""
+        self.assertEqual(self.ids(self.search('algebra matrices')), [str(self.body_hit.id)])
+        first = self.search('algebra', page_size=2)
+        self.assertEqual(len(first['results']), 2)
+        self.assertIsNotNone(first['next'])
+        second = self.client.get(first['next']).data
+        self.assertEqual(len(second['results']), 1)
+        self.assertIsNone(second['next'])
+
+    def test_query_syntax_is_not_interpreted(self):
+        """Test search operators in user input are treated as plain words."""
+        self.assertEqual(self.ids(self.search('"algebra OR NEAR(*')), [])
+        response = self.client.get(reverse('note-search'), {'q': '  *  '})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_fallback_search_matches_compressed_notes(self):
+        """Test the search without a backend also finds words inside compressed notes."""
+        with override_settings(COMPRESSED_TEXT_MIN_CHARS=10):
+            packed = self.add(self.notebook, self.user, 'Week 4', 'eigenvalues ' * 50)
+        self.assertTrue(is_compressed(
+            Note.objects.filter(pk=packed.pk).values_list('content', flat=True).get()
+        ))
+        with mock.patch('notebook.views.search_supported', return_value=False):
+            self.assertEqual(self.ids(self.search('eigen')), [str(packed.id)])
+            self.assertEqual(self.ids(self.search('eigen week')), [str(packed.id)])
+            self.assertEqual(self.ids(self.search('eigen linear')), [])
+            ids = self.ids(self.search('alg'))
+        self.assertEqual(
+            sorted(ids), sorted(str(n.id) for n in (self.title_hit, self.body_hit, self.public))
+        )
+
+
+class NoteChangesTestCase(TestCase):
+    """Test cases for the delta sync endpoint."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.notebook = Notebook.objects.create(name='Sync', owner=self.user)
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('note-changes')
+
+    def add(self, title, **kwargs):
+        return Note.objects.create(
+            notebook=self.notebook, title=title, content='x', owner=self.user, **kwargs
+        )
+
+    def age(self, *notes, seconds=60):
+        # move notes out of the sync lag window, as if written a while ago
+        Note.objects.filter(pk__in=[n.pk for n in notes]).update(
+            updated_at=timezone.now() - timedelta(seconds=seconds)
+        )
+
+    def sync(self, since=None, **params):
+        if since:
+            params['since'] = since
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.json()
+
+    def test_full_then_incremental_sync(self):
+        """Test a sync returns everything once, then only what changed since the token."""
+        first, second = self.add('First'), self.add('Second')
+        other = User.objects.create_user(
+            username='otheruser',
+            email='other@example.com',
+            password='testpass123'
+        )
+        Note.objects.create(
+            notebook=Notebook.objects.create(name='Theirs', owner=other),
+            title='Not mine', content='x', owner=other, is_public=True,
+        )
+        self.age(first, seconds=60)
+        self.age(second, seconds=50)
+        data = self.sync()
+        self.assertEqual([c['title'] for c in data['changes']], ['First', 'Second'])
+        self.assertFalse(data['has_more'])
+        self.assertEqual(self.sync(data['next'])['changes'], [])
+
+        second.title = 'Second, edited'
+        second.save()
+        first.is_deleted = True
+        first.save()
+        self.age(first, seconds=30)
+        self.age(second, seconds=20)
+        changes = self.sync(data['next'])['changes']
+        self.assertEqual(
+            changes[0], {
+                'id': str(first.id), 'notebook': str(self.notebook.id), 'is_deleted': True,
+                'updated_at': changes[0]['updated_at'],
+            }
+        )
+        self.assertEqual(changes[1]['title'], 'Second, edited')
+
+    def test_api_delete_sends_tombstone(self):
+        """Test deleting a note through the detail endpoint reaches sync clients."""
+        note = self.add('Doomed')
+        self.age(note)
+        token = self.sync()['next']
+        response = self.client.delete(reverse('note-detail', kwargs={'pk': note.pk}))
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertTrue(Note.objects.filter(pk=note.pk, is_deleted=True).exists())
+        self.age(note, seconds=30)
+        changes = self.sync(token)['changes']
+        self.assertEqual([(c['id'], c['is_deleted']) for c in changes], [(str(note.id), True)])
+        detail = self.client.get(reverse('note-detail', kwargs={'pk': note.pk}))
+        self.assertEqual(detail.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_continuation_tokens_resume(self):
+        """Test limited pages chain through has_more without gaps or repeats."""
+        notes = [self.add(f'Note {i}') for i in range(7)]
+        Note.objects.filter(pk__in=[n.pk for n in notes[:4]]).update(is_deleted=True)
+        self.age(*notes)
+        seen, token = [], None
+        while True:
+            data = self.sync(token, limit=3)
+            seen.extend(change['id'] for change in data['changes'])
+            token = data['next']
+            if not data['has_more']:
+                break
+        self.assertEqual(sorted(seen), sorted(str(n.id) for n in notes))
+
+    def test_recent_changes_are_repeated_not_lost(self):
+        """Test changes inside the lag window are sent again rather than skipped."""
+        note = self.add('Fresh')
+        data = self.sync()
+        self.assertEqual([c['id'] for c in data['changes']], [str(note.id)])
+        self.assertEqual([c['id'] for c in self.sync(data['next'])['changes']], [str(note.id)])
+
+    def test_invalid_token(self):
+        """Test a malformed token is rejected."""
+        response = self.client.get(self.url, {'since': 'garbage'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class NoteBulkTestCase(TestCase):
+    """Test cases for batched note create/update/delete."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.notebook = Notebook.objects.create(name='Inbox', owner=self.user)
+        self.archive = Notebook.objects.create(name='Archive', owner=self.user)
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('note-bulk')
+
+    def post(self, *operations):
+        return self.client.post(self.url, {'operations': list(operations)}, format='json')
+
+    def create_op(self, title, **data):
+        data = {
+            'title': title, 'content': f'{title} body', 'notebook': str(self.notebook.id), **data
+        }
+        return {'op': 'create', 'data': data}
+
+    def test_mixed_batch_is_applied(self):
+        """Test creates, updates and deletes in one request, with per-item results."""
+        edited = Note.objects.create(
+            notebook=self.notebook, title='Old', content='x', owner=self.user
+        )
+        trashed = Note.objects.create(
+            notebook=self.notebook, title='Gone', content='x', owner=self.user
+        )
+        response = self.post(
+            dict(self.create_op('Alpha'), ref='local-1'),
+            self.create_op('Beta'),
+            {'op': 'update', 'id': str(edited.id),
+             'data': {'title': 'Moved', 'notebook': str(self.archive.id)}},
+            {'op': 'delete', 'id': str(trashed.id)},
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        results = response.json()['results']
+        self.assertEqual([r['op'] for r in results], ['create', 'create', 'update', 'delete'])
+        self.assertEqual(results[0]['ref'], 'local-1')
+        self.assertEqual(results[0]['note']['title'], 'Alpha')
+        self.assertEqual(results[0]['note']['owner'], self.user.id)
+        self.assertTrue(Note.objects.filter(pk=results[1]['id'], title='Beta').exists())
+
+        edited.refresh_from_db()
+        trashed.refresh_from_db()
+        self.assertEqual((edited.title, edited.notebook_id), ('Moved', self.archive.id))
+        self.assertGreater(edited.updated_at, edited.created_at)
+        self.assertTrue(trashed.is_deleted)
+
+        self.notebook.refresh_from_db()
+        self.archive.refresh_from_db()
+        self.assertEqual(self.notebook.notes_count, 2)
+        self.assertEqual(self.archive.notes_count, 1)
+
+    def test_invalid_operation_rolls_back_batch(self):
+        """Test one invalid operation rejects the whole batch and reports its index."""
+        response = self.post(
+            self.create_op('Fine'),
+            {'op': 'create', 'data': {'title': 'No body', 'notebook': str(self.notebook.id)}},
+            {'op': 'update', 'id': str(self.notebook.id), 'data': {'title': 'x'}},
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        errors = response.json()['errors']
+        self.assertEqual([e['index'] for e in errors], [1, 2])
+        self.assertIn('content', errors[0]['errors'])
+        self.assertFalse(Note.objects.exists())
+
+    def test_other_users_notebooks_and_notes_are_rejected(self):
+        """Test operations can only touch the user's own notebooks and notes."""
+        other = User.objects.create_user(
+            username='otheruser',
+            email='other@example.com',
+            password='testpass123'
+        )
+        theirs = Notebook.objects.create(name='Theirs', owner=other)
+        their_note = Note.objects.create(
+            notebook=theirs, title='Theirs', content='x', owner=other, is_public=True
+        )
+        response = self.post(
+            self.create_op('Sneaky', notebook=str(theirs.id)),
+            {'op': 'delete', 'id': str(their_note.id)},
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual([e['index'] for e in response.json()['errors']], [0, 1])
+        their_note.refresh_from_db()
+        self.assertFalse(their_note.is_deleted)
+
+    def test_limits(self):
+        """Test empty and oversized batches are rejected."""
+        self.assertEqual(self.post().status_code, status.HTTP_400_BAD_REQUEST)
+        with override_settings(NOTE_BULK_MAX_OPERATIONS=2):
+            response = self.post(*[self.create_op(f'Note {i}') for i in range(3)])
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Note.objects.exists())
+
+    def test_created_notes_are_searchable(self):
+        """Test bulk-created notes are added to the search index."""
+        self.post(self.create_op('Photosynthesis'), self.create_op('Mitochondria'))
+        response = self.client.get(reverse('note-search'), {'q': 'photosynthesis'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([r['title'] for r in response.json()['results']], ['Photosynthesis'])
+
+    def test_query_count_does_not_grow_with_batch(self):
+        """Test a batch costs a fixed number of queries, not one per note."""
+        def queries(count):
+            with CaptureQueriesContext(connection) as captured:
+                response = self.post(*[self.create_op(f'Note {i}') for i in range(count)])
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            return len(captured)
+
+        self.assertEqual(queries(2), queries(40))
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class NoteListSerializationTestCase(TestCase):
+    """Test the compiled list rendering matches NoteSerializer exactly."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        other = User.objects.create_user(
+            username='otheruser',
+            email='other@example.com',
+            password='testpass123'
+        )
+        notebook = Notebook.objects.create(name='Bücher & "quotes"', owner=self.user)
+        theirs = Notebook.objects.create(name='Theirs', owner=other)
+        for i in range(4):
+            Note.objects.create(
+                notebook=notebook, title=f'Note {i} ✓', content='x' * i, owner=self.user,
+                is_public=bool(i % 2),
+            )
+        with_image = Note.objects.create(
+            notebook=notebook, title='Picture', content='', owner=self.user
+        )
+        with_image.image.save('cover.png', ContentFile(b'not really a png'), save=True)
+        Note.objects.create(
+            notebook=theirs, title='Public', content='shared', owner=other, is_public=True
+        )
+        Note.objects.create(
+            notebook=theirs, title='Private', content='hidden', owner=other
+        )
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('note-list-create')
+
+    def expected(self, response, ids):
+        notes = Note.objects.select_related('owner', 'notebook').in_bulk(ids)
+        data = NoteSerializer(
+            [notes[note_id] for note_id in ids], many=True,
+            context={'request': response.wsgi_request},
+        ).data
+        return json.loads(JSONRenderer().render(data))
+
+    def assertMatchesSerializer(self, params):
+        response = self.client.get(self.url, dict(params, mode='full'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        results = response.json()['results']
+        self.assertTrue(results)
+        ids = [uuid.UUID(item['id']) for item in results]
+        self.assertEqual(results, self.expected(response, ids))
+        return response.json()
+
+    def test_page_mode_matches_serializer(self):
+        """Test page-number pages render the same JSON as NoteSerializer."""
+        data = self.assertMatchesSerializer({'page_size': 3})
+        self.assertEqual(data['count'], 6)
+        self.assertMatchesSerializer({'page_size': 3, 'page': 2})
+
+    def test_keyset_mode_matches_serializer(self):
+        """Test keyset pages render the same JSON and chain through next."""
+        data = self.assertMatchesSerializer({'cursor': '', 'page_size': 4})
+        self.assertIsNotNone(data['next'])
+        cursor = data['next'].split('cursor=')[1].split('&')[0]
+        data = self.assertMatchesSerializer({'cursor': cursor, 'page_size': 4})
+        self.assertIsNone(data['next'])
+
+    @override_settings(TIME_ZONE='Asia/Kolkata')
+    def test_local_time_zone_matches_serializer(self):
+        """Test timestamps are converted to the current time zone like the serializer."""
+        data = self.assertMatchesSerializer({'page_size': 2})
+        self.assertTrue(data['results'][0]['updated_at'].endswith('+05:30'))
+
+    def test_image_urls_are_absolute(self):
+        """Test file fields render as absolute URLs, like the serializer."""
+        results = self.client.get(self.url, {'page_size': 50, 'mode': 'full'}).json()['results']
+        images = [item['image'] for item in results if item['image']]
+        self.assertEqual(len(images), 1)
+        self.assertTrue(images[0].startswith('http://testserver/media/notes/cover'))
+
+    def test_summary_mode_is_default(self):
+        """Test lists return a database-truncated preview instead of the content."""
+        Note.objects.filter(title='Note 3 ✓').update(content='long ' * 1000)
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get(self.url, {'page_size': 50})
+        results = response.json()['results']
+        summary = [name for name in NoteSerializer.Meta.fields if name != 'content']
+        self.assertEqual(list(results[0]), summary + ['preview'])
+        long_note = next(item for item in results if item['title'] == 'Note 3 ✓')
+        self.assertEqual(long_note['preview'], ('long ' * 1000)[:NOTE_PREVIEW_CHARS])
+        page_query = next(q['sql'] for q in captured if 'AS "preview"' in q['sql'])
+        # content is only read inside the preview expression, never selected whole
+        self.assertNotIn(
+            '"notebook_note"."content"', re.sub(r'CASE .* AS "preview"', '', page_query)
+        )
+
+    def test_fields_and_omit(self):
+        """Test sparse fieldsets select and drop fields, and reject unknown names."""
+        results = self.client.get(self.url, {'fields': 'title,id'}).json()['results']
+        self.assertEqual(list(results[0]), ['id', 'title'])
+        results = self.client.get(
+            self.url, {'mode': 'full', 'omit': 'content,notebook_name'}
+        ).json()['results']
+        self.assertNotIn('content', results[0])
+        self.assertNotIn('notebook_name', results[0])
+        self.assertIn('title', results[0])
+        data = self.client.get(self.url, {'fields': 'title', 'cursor': '', 'page_size': 2}).json()
+        self.assertEqual(len(data['results']), 2)
+        self.assertIsNotNone(data['next'])
+        for params in ({'fields': 'title,secret'}, {'omit': 'nope'}, {'mode': 'everything'}):
+            response = self.client.get(self.url, params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_unsupported_fields_are_rejected(self):
+        """Test compiling a serializer with computed fields fails loudly."""
+        class ComputedSerializer(NoteSerializer):
+            summary = serializers.SerializerMethodField()
+
+            class Meta(NoteSerializer.Meta):
+                fields = NoteSerializer.Meta.fields + ['summary']
+
+        with self.assertRaises(TypeError):
+            CompiledRowSerializer(ComputedSerializer).plan
+
+
+@override_settings(COMPRESSED_TEXT_MIN_CHARS=1000)
+class NoteContentCompressionTestCase(TestCase):
+    """Test cases for compressed storage of long note content."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.notebook = Notebook.objects.create(name='Long', owner=self.user)
+        self.client.force_authenticate(user=self.user)
+        self.text = ' '.join(f'paragraph {i} about chlorophyll and light.' for i in range(200))
+
+    def stored(self, note):
+        return Note.objects.filter(pk=note.pk).values_list('content', flat=True).get()
+
+    def test_long_content_is_stored_compressed(self):
+        """Test long content round-trips through compressed storage, short content does not."""
+        note = Note.objects.create(
+            notebook=self.notebook, title='Long', content=self.text, owner=self.user
+        )
+        short = Note.objects.create(
+            notebook=self.notebook, title='Short', content='brief', owner=self.user
+        )
+        self.assertTrue(self.stored(note).startswith(COMPRESSED_PREFIX))
+        self.assertLess(len(self.stored(note)), len(self.text) / 3)
+        self.assertEqual(self.stored(short), 'brief')
+        self.assertEqual(Note.objects.get(pk=note.pk).content, self.text)
+
+        lookalike = COMPRESSED_PREFIX + 'not compressed'
+        note.content = lookalike
+        note.save()
+        self.assertEqual(Note.objects.get(pk=note.pk).content, lookalike)
+
+    def test_decompression_is_lazy(self):
+        """Test loaded content stays compressed until it is read, and saves as it was."""
+        note = Note.objects.create(
+            notebook=self.notebook, title='Long', content=self.text, owner=self.user
+        )
+        loaded = Note.objects.get(pk=note.pk)
+        self.assertIsInstance(loaded.__dict__['content'], CompressedText)
+        loaded.is_public = True
+        loaded.save()
+        self.assertIsInstance(loaded.__dict__['content'], CompressedText)
+        self.assertEqual(loaded.content, self.text)
+        self.assertEqual(loaded.__dict__['content'], self.text)
+        self.assertEqual(Note.objects.get(pk=note.pk).content, self.text)
+
+    def test_api_search_and_pdf_use_plain_text(self):
+        """Test the API, search and PDF rendering see the decompressed text."""
+        note = Note.objects.create(
+            notebook=self.notebook, title='Long', content=self.text, owner=self.user
+        )
+        url = reverse('note-list-create')
+        item = self.client.get(url, {'mode': 'full'}).json()['results'][0]
+        self.assertEqual(item['content'], self.text)
+        item = self.client.get(url).json()['results'][0]
+        self.assertEqual(item['preview'], self.text[:NOTE_PREVIEW_CHARS])
+        detail = self.client.get(reverse('note-detail', kwargs={'pk': note.pk})).json()
+        self.assertEqual(detail['content'], self.text)
+
+        results = self.client.get(reverse('note-search'), {'q': 'chlorophyll'}).json()['results']
+        self.assertEqual([r['id'] for r in results], [str(note.id)])
+        self.assertIn('<mark>chlorophyll</mark>', results[0]['snippet'])
+        call_command('rebuild_search_index', stdout=io.StringIO())
+        results = self.client.get(reverse('note-search'), {'q': 'chlorophyll'}).json()['results']
+        self.assertEqual(len(results), 1)
+
+        pages = generate_pdf_to_file(note.title, Note.objects.get(pk=note.pk).content, io.BytesIO())
+        self.assertEqual(pages, generate_pdf_to_file(note.title, self.text, io.BytesIO()))
+
+    def test_compress_command_rewrites_existing_rows(self):
+        """Test the command compresses rows stored before compression applied."""
+        with override_settings(COMPRESSED_TEXT_MIN_CHARS=10 ** 9):
+            notes = [
+                Note.objects.create(
+                    notebook=self.notebook, title=f'Old {i}', content=self.text, owner=self.user
+                )
+                for i in range(3)
+            ]
+        before = [Note.objects.get(pk=n.pk).updated_at for n in notes]
+        self.assertFalse(self.stored(notes[0]).startswith(COMPRESSED_PREFIX))
+        out = io.StringIO()
+        call_command('compress_note_content', '--batch-size', '2', stdout=out)
+        self.assertIn('Compressed 3 note(s).', out.getvalue())
+        for note, updated_at in zip(notes, before):
+            self.assertTrue(self.stored(note).startswith(COMPRESSED_PREFIX))
+            reloaded = Note.objects.get(pk=note.pk)
+            self.assertEqual((reloaded.content, reloaded.updated_at), (self.text, updated_at))
+        results = self.client.get(reverse('note-search'), {'q': 'chlorophyll'}).json()['results']
+        self.assertEqual(len(results), 3)
+
+
+class NoteRevisionTestCase(TestCase):
+    """Test cases for note revision history."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.other = User.objects.create_user(
+            username='other',
+            email='other@example.com',
+            password='testpass123'
+        )
+        self.notebook = Notebook.objects.create(name='Drafts', owner=self.user)
+        self.client.force_authenticate(user=self.user)
+        self.lines = [f'line {i} of the essay\n' for i in range(100)]
+
+    def create_note(self, content):
+        response = self.client.post(reverse('note-list-create'), {
+            'title': 'Essay', 'content': content, 'notebook': str(self.notebook.id),
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return Note.objects.get(pk=response.data['id'])
+
+    def edit(self, note, **data):
+        url = reverse('note-detail', kwargs={'pk': note.pk})
+        response = self.client.patch(url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def versions(self, note, count):
+        """Save `count` edits, each changing one line, and return every content saved."""
+        contents = [note.content]
+        for i in range(count):
+            lines = contents[-1].splitlines(keepends=True)
+            lines[i % len(lines)] = f'edit {i}\n'
+            contents.append(''.join(lines))
+            self.edit(note, content=contents[-1])
+        return contents
+
+    @override_settings(NOTE_REVISION_SNAPSHOT_EVERY=5, NOTE_REVISION_KEEP=0)
+    def test_revisions_are_deltas_between_snapshots(self):
+        """Test saves record compact deltas, a snapshot every N, and every version rebuilds."""
+        note = self.create_note(''.join(self.lines))
+        contents = self.versions(note, 11)
+        revisions = list(note.revisions.order_by('number'))
+        self.assertEqual([r.number for r in revisions], list(range(1, 13)))
+        snapshots = [r.number for r in revisions if r.kind == NoteRevision.KIND_SNAPSHOT]
+        self.assertEqual(snapshots, [1, 6, 11])
+        for revision, content in zip(revisions, contents):
+            self.assertEqual(revision_content(revision), content)
+            if revision.kind == NoteRevision.KIND_DELTA:
+                self.assertLess(len(revision.data), len(content) / 10)
+
+        # a title-only edit is a revision too; a save that changes nothing is not
+        self.edit(note, title='Essay v2')
+        self.edit(note, is_public=True)
+        self.edit(note, title='Essay v2')
+        self.assertEqual(note.revisions.count(), 13)
+        self.assertEqual(note.revisions.get(number=13).title, 'Essay v2')
+
+    def test_list_detail_and_restore(self):
+        """Test the revision endpoints, and that a restore is recorded as a new revision."""
+        note = self.create_note(''.join(self.lines))
+        contents = self.versions(note, 3)
+        response = self.client.get(reverse('note-revisions', kwargs={'pk': note.pk}))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([r['number'] for r in response.data], [4, 3, 2, 1])
+        self.assertNotIn('content', response.data[0])
+
+        url = reverse('note-revision', kwargs={'pk': note.pk, 'number': 2})
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['content'], contents[1])
+        self.assertEqual(response.data['author'], self.user.id)
+
+        url = reverse('note-revision-restore', kwargs={'pk': note.pk, 'number': 2})
+        response = self.client.post(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['content'], contents[1])
+        self.assertEqual(Note.objects.get(pk=note.pk).content, contents[1])
+        latest = note.revisions.latest('number')
+        self.assertEqual((latest.number, revision_content(latest)), (5, contents[1]))
+
+        url = reverse('note-revision', kwargs={'pk': note.pk, 'number': 99})
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_revisions_are_owner_only(self):
+        """Test other users cannot list, read or restore a note's revisions."""
+        note = self.create_note('private draft')
+        note.is_public = True
+        note.save()
+        self.client.force_authenticate(user=self.other)
+        urls = [
+            reverse('note-revisions', kwargs={'pk': note.pk}),
+            reverse('note-revision', kwargs={'pk': note.pk, 'number': 1}),
+        ]
+        for url in urls:
+            self.assertEqual(self.client.get(url).status_code, status.HTTP_403_FORBIDDEN)
+        url = reverse('note-revision-restore', kwargs={'pk': note.pk, 'number': 1})
+        self.assertEqual(self.client.post(url).status_code, status.HTTP_403_FORBIDDEN)
+        missing = reverse('note-revisions', kwargs={'pk': uuid.uuid4()})
+        self.assertEqual(self.client.get(missing).status_code, status.HTTP_404_NOT_FOUND)
+
+    @override_settings(NOTE_REVISION_SNAPSHOT_EVERY=10, NOTE_REVISION_KEEP=4)
+    def test_keep_limit_rebases_oldest_revision(self):
+        """Test only the newest KEEP revisions remain, and the oldest becomes a snapshot."""
+        note = self.create_note(''.join(self.lines))
+        contents = self.versions(note, 6)
+        revisions = list(note.revisions.order_by('number'))
+        self.assertEqual([r.number for r in revisions], [4, 5, 6, 7])
+        self.assertEqual(revisions[0].kind, NoteRevision.KIND_SNAPSHOT)
+        for revision, content in zip(revisions, contents[3:]):
+            self.assertEqual(revision_content(revision), content)
+
+    @override_settings(NOTE_REVISION_KEEP=0)
+    def test_prune_command_drops_old_revisions(self):
+        """Test the age limit keeps recent revisions and always a note's latest one."""
+        note = self.create_note(''.join(self.lines))
+        contents = self.versions(note, 4)
+        stale = self.create_note('untouched for a long time')
+        old = timezone.now() - timedelta(days=40)
+        NoteRevision.objects.filter(note=note, number__lte=3).update(created_at=old)
+        NoteRevision.objects.filter(note=stale).update(created_at=old)
+
+        out = io.StringIO()
+        call_command('prune_note_revisions', '--days', '30', stdout=out)
+        self.assertIn('Deleted 3 note revision(s).', out.getvalue())
+        self.assertEqual(list(stale.revisions.values_list('number', flat=True)), [1])
+        revisions = list(note.revisions.order_by('number'))
+        self.assertEqual([r.number for r in revisions], [4, 5])
+        self.assertEqual(revisions[0].kind, NoteRevision.KIND_SNAPSHOT)
+        self.assertEqual(revision_content(revisions[-1]), contents[-1])
+
+    def test_bulk_operations_record_revisions(self):
+        """Test bulk creates and content updates record revisions in the same request."""
+        note = self.create_note('first draft')
+        response = self.client.post(reverse('note-bulk'), {'operations': [
+            {'op': 'create', 'data': {
+                'title': 'New', 'content': 'fresh', 'notebook': str(self.notebook.id),
+            }},
+            {'op': 'update', 'id': str(note.id), 'data': {'content': 'second draft'}},
+        ]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        created = response.data['results'][0]['id']
+        self.assertEqual(NoteRevision.objects.filter(note_id=created).count(), 1)
+        latest = note.revisions.latest('number')
+        self.assertEqual((latest.number, revision_content(latest)), (2, 'second draft'))
+
+    def test_first_edit_keeps_the_version_without_revisions(self):
+        """Test editing a note that has no revisions first records its stored version."""
+        with override_settings(COMPRESSED_TEXT_MIN_CHARS=10):
+            patched = Note.objects.create(
+                notebook=self.notebook, owner=self.user, title='Imported', content='old ' * 50,
+            )
+        bulked = Note.objects.create(
+            notebook=self.notebook, owner=self.user, title='Legacy', content='legacy text',
+        )
+        self.edit(patched, title='Renamed', content='new text')
+        response = self.client.post(reverse('note-bulk'), {'operations': [
+            {'op': 'update', 'id': str(bulked.id), 'data': {'content': 'rewritten'}},
+        ]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        for note, versions in (
+            (patched, [('Imported', 'old ' * 50, None), ('Renamed', 'new text', self.user)]),
+            (bulked, [('Legacy', 'legacy text', None), ('Legacy', 'rewritten', self.user)]),
+        ):
+            revisions = list(note.revisions.order_by('number'))
+            self.assertEqual([r.number for r in revisions], [1, 2])
+            self.assertEqual(
+                [(r.title, revision_content(r), r.author) for r in revisions], versions
+            )
@@ -1,16 +1,40 @@
 from django.urls import path
 from .views import (
     NotebookListCreateView,
+    NotebookExportView,
     NoteListCreateView,
+    NoteSearchView,
+    NoteChangesView,
+    NoteBulkView,
     NoteRetrieveUpdateDestroyView,
+    NoteRevisionListView,
+    NoteRevisionDetailView,
+    NoteRevisionRestoreView,
     GeneratePDFFromNoteView,
+    PDFGenerationJobView,
     # NotebookRetrieveUpdateDestroyView,
 )
 
 urlpatterns = [
     path('notebooks/', NotebookListCreateView.as_view(), name='notebook-list-create'),
+    path('notebooks/<uuid:pk>/export/<str:kind>/', NotebookExportView.as_view(), name='notebook-export'),
     # path('notebooks/<uuid:pk>/', NotebookRetrieveUpdateDestroyView.as_view(), name='notebook-list-create'),
     path('notes/', NoteListCreateView.as_view(), name='note-list-create'),
+    path('notes/bulk/', NoteBulkView.as_view(), name='note-bulk'),
+    path('notes/changes/', NoteChangesView.as_view(), name='note-changes'),
+    path('notes/search/', NoteSearchView.as_view(), name='note-search'),
     path('notes/<uuid:pk>/', NoteRetrieveUpdateDestroyView.as_view(), name='note-detail'),
+    path('notes/<uuid:pk>/revisions/', NoteRevisionListView.as_view(), name='note-revisions'),
+    path(
+        'notes/<uuid:pk>/revisions/<int:number>/',
+        NoteRevisionDetailView.as_view(),
+        name='note-revision',
+    ),
+    path(
+        'notes/<uuid:pk>/revisions/<int:number>/restore/',
+        NoteRevisionRestoreView.as_view(),
+        name='note-revision-restore',
+    ),
     path('notes/<uuid:pk>/generate-pdf/', GeneratePDFFromNoteView.as_view(), name='note-generate-pdf'),
+    path('pdf-jobs/<uuid:pk>/', PDFGenerationJobView.as_view(), name='pdf-generation-job'),
 ]
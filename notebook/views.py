@@ -1,35 +1,103 @@
+import logging
+import uuid
+
 from rest_framework import generics, status
 from rest_framework.permissions import IsAuthenticated
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.exceptions import NotFound, ParseError, PermissionDenied
 from rest_framework.views import APIView
 from rest_framework.response import Response
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from django.db import transaction
 from django.db.models import Q
-from django.core.files.base import ContentFile
+from django.urls import reverse
 
-from .models import Notebook, Note
-from .serializers import NotebookSerializer, NoteSerializer
+from .models import Notebook, Note, NoteRevision, PDFGenerationJob
+from .serializers import (
+    NotebookSerializer, NoteSerializer, NoteRevisionSerializer, NoteTombstoneSerializer,
+    PDFGenerationJobSerializer,
+)
 from .permissions import IsOwnerOrReadOnly
-from PDFs.models import PDF
+from .services import generate_pdf_for_note
+from .bulk import apply_note_operations, validate_note_operations
+from .export import notebook_pdf_stream, notebook_zip_stream
+from .revisions import record_initial_revisions, record_revisions, revision_content
+from .search import search_notes
+from .sync import note_changes
+from .tasks import run_pdf_generation_job
 from PDFs.serializers import PDFSerializer
-from PDFs.utils.generator import generate_pdf_from_text
+from edunova.celery import background_jobs_available
+from edunova.exceptions import ServiceUnavailable
+from edunova.fields import COMPRESSED_PREFIX, decompress_text, text_preview
+from edunova.pagination import KeysetPageNumberPagination, decode_position, encode_position
+from edunova.search import next_page_link, page_window, query_terms, search_supported
+from edunova.serializers import CompiledListMixin, CompiledRowSerializer
+
+logger = logging.getLogger(__name__)
+
 
-class StandardResultsSetPagination(PageNumberPagination):
+class StandardResultsSetPagination(KeysetPageNumberPagination):
+    # ?cursor= walks (updated_at, id) on the (owner, is_deleted, updated_at) index
+    keyset_field = 'updated_at'
     page_size = 10
     page_size_query_param = 'page_size'
     max_page_size = 50
 
 
+class NotebookPagination(KeysetPageNumberPagination):
+    # ?cursor= walks (created_at, id) on the (owner, created_at) index
+    keyset_field = 'created_at'
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+
 # Notebook Views
 class NotebookListCreateView(generics.ListCreateAPIView):
-    queryset = Notebook.objects.select_related('owner').all().order_by('-created_at')
     serializer_class = NotebookSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = NotebookPagination
+
+    def get_queryset(self):
+        # The summary (note/PDF counts, last note update) is stored on Notebook, so a page
+        # is one query on the (owner, created_at) index.
+        return Notebook.objects.filter(owner=self.request.user).order_by('-created_at')
     
     def perform_create(self, serializer):
         serializer.save(owner=self.request.user)
 
 
 
+class NotebookExportView(APIView):
+    """
+    Stream a whole notebook as one PDF (`export/pdf/`) or as a ZIP of the PDFs linked
+    to its notes (`export/zip/`).
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, pk, kind):
+        if kind not in ('pdf', 'zip'):
+            return Response({'detail': 'Unknown export format.'}, status=status.HTTP_404_NOT_FOUND)
+        try:
+            notebook = Notebook.objects.get(pk=pk)
+        except Notebook.DoesNotExist:
+            return Response({'detail': 'Notebook not found.'}, status=status.HTTP_404_NOT_FOUND)
+
+        if notebook.owner_id != request.user.id:
+            return Response({'detail': 'Not permitted.'}, status=status.HTTP_403_FORBIDDEN)
+
+        if kind == 'pdf':
+            stream, content_type = notebook_pdf_stream(notebook), 'application/pdf'
+        else:
+            stream, content_type = notebook_zip_stream(notebook, request.user), 'application/zip'
+        response = StreamingHttpResponse(
+            (chunk for chunk in stream if chunk), content_type=content_type
+        )
+        file_name = (notebook.name or 'notebook').replace(' ', '_').replace('"', '')
+        response['Content-Disposition'] = f'attachment; filename="{file_name}.{kind}"'
+        return response
+
+
 """
 This feature is not in use or unnecessary.
 still kept it. maybe use later
@@ -43,9 +111,26 @@ still kept it. maybe use later
 #         return Notebook.objects.select_related('owner').order_by('-created_at')
 
 
-class NoteListCreateView(generics.ListCreateAPIView):
-    
+# Characters of `content` returned as `preview` by the summary list mode
+NOTE_PREVIEW_CHARS = 200
+
+
+class NoteListCreateView(CompiledListMixin, generics.ListCreateAPIView):
+    """
+    Lists default to `?mode=summary`: every note field except `content`, plus `preview`
+    (its first NOTE_PREVIEW_CHARS characters, cut in the database). `?mode=full` returns
+    NoteSerializer's fields; `?fields=` / `?omit=` pick fields explicitly.
+    """
     serializer_class = NoteSerializer
+    # list pages render .values() rows (same JSON as NoteSerializer)
+    row_serializer = CompiledRowSerializer(
+        NoteSerializer, annotations={'preview': text_preview('content', NOTE_PREVIEW_CHARS)}
+    )
+    row_modes = {
+        'summary': [f for f in NoteSerializer.Meta.fields if f != 'content'] + ['preview'],
+        'full': NoteSerializer.Meta.fields,
+    }
+    default_row_mode = 'summary'
     permission_classes = [IsAuthenticated]
     pagination_class = StandardResultsSetPagination
 
@@ -60,7 +145,157 @@ class NoteListCreateView(generics.ListCreateAPIView):
         )
 
     def perform_create(self, serializer):
-        serializer.save(owner=self.request.user)
+        with transaction.atomic():
+            note = serializer.save(owner=self.request.user)
+            record_revisions([note], author=self.request.user)
+
+
+class NoteSearchView(APIView):
+    """
+    Ranked full-text search over the notes the user may read: `?q=` (every word must
+    match, as a prefix), `?page=`, `?page_size=`. Each result carries `rank` and an
+    HTML `snippet` with matches wrapped in <mark>. No total count is computed, so
+    latency depends on the page, not on the number of notes.
+    """
+    permission_classes = [IsAuthenticated]
+    page_size = 10
+    max_page_size = 50
+
+    def get(self, request):
+        text = request.query_params.get('q', '')
+        if not query_terms(text):
+            return Response(
+                {'detail': 'Query parameter "q" is required.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        page, page_size, offset = page_window(request, self.page_size, self.max_page_size)
+
+        if search_supported():
+            hits = search_notes(text, request.user, page_size + 1, offset)
+        else:
+            hits = self.fallback_search(text, request.user, page_size + 1, offset)
+        has_next = len(hits) > page_size
+        hits = hits[:page_size]
+
+        notes = Note.objects.select_related('owner', 'notebook').in_bulk(
+            [note_id for note_id, _, _ in hits]
+        )
+        results = []
+        for note_id, rank, snippet in hits:
+            if note_id in notes:
+                data = NoteSerializer(notes[note_id], context={'request': request}).data
+                data['rank'] = rank
+                data['snippet'] = snippet
+                results.append(data)
+
+        return Response({'next': next_page_link(request, page, has_next), 'results': results})
+
+    def fallback_search(self, text, user, limit, offset):
+        # Databases without a search backend: unranked substring match. SQL cannot look
+        # inside compressed contents, so those notes are candidates matched after
+        # decompressing them.
+        terms = [term.lower() for term in query_terms(text)]
+        compressed = Q(content__startswith=COMPRESSED_PREFIX)
+        notes = Note.objects.filter(is_deleted=False).filter(Q(owner=user) | Q(is_public=True))
+        for term in terms:
+            notes = notes.filter(Q(title__icontains=term) | Q(content__icontains=term) | compressed)
+        ids = []
+        rows = notes.order_by('-updated_at').values_list('id', 'title', 'content')
+        for note_id, title, content in rows.iterator():
+            document = f'{title}\n{decompress_text(content)}'.lower()
+            if all(term in document for term in terms):
+                ids.append(note_id)
+                if len(ids) == offset + limit:
+                    break
+        return [(note_id, None, None) for note_id in ids[offset:]]
+
+
+class NoteChangesView(APIView):
+    """
+    Delta sync for the user's own notes: `?since=<token>` (omit for a full sync) returns
+    the notes created or updated since the token, and tombstones
+    (`{"id", "is_deleted": true, ...}`) for notes soft-deleted since then.
+    Pass `next` back as `since`; keep going while `has_more` is true.
+    Changes near the present may be delivered twice, so apply them idempotently.
+    """
+    permission_classes = [IsAuthenticated]
+    default_limit = 200
+    max_limit = 1000
+
+    def get(self, request):
+        position = None
+        since = request.query_params.get('since')
+        if since:
+            try:
+                value, pk = decode_position(since)
+                position = (value, uuid.UUID(str(pk)))
+            except ValueError:
+                raise ParseError('Invalid sync token.')
+        try:
+            limit = int(request.query_params.get('limit', self.default_limit))
+        except ValueError:
+            raise ParseError('Invalid limit.')
+        limit = min(max(limit, 1), self.max_limit)
+
+        notes, next_position, has_more = note_changes(request.user, position, limit)
+        changes = []
+        for note in notes:
+            if note.is_deleted:
+                changes.append(NoteTombstoneSerializer(note).data)
+            else:
+                changes.append(NoteSerializer(note, context={'request': request}).data)
+        return Response({
+            'changes': changes,
+            'next': encode_position(next_position) if next_position else None,
+            'has_more': has_more,
+        })
+
+
+class NoteBulkView(APIView):
+    """
+    Apply a batch of note operations in one request and one transaction:
+    `{"operations": [{"op": "create", "data": {...}}, {"op": "update", "id": ..., "data": {...}},
+    {"op": "delete", "id": ...}]}`. `data` takes the same fields as the single-note
+    endpoints; "delete" moves the note to the trash (is_deleted). Either every operation
+    is applied (200, one result per operation, in order) or none is (400, with the
+    errors of each invalid operation). An optional `ref` is echoed back in the result.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        operations = request.data.get('operations') if isinstance(request.data, dict) else None
+        if not isinstance(operations, list) or not operations:
+            return Response(
+                {'detail': '"operations" must be a non-empty list.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        limit = settings.NOTE_BULK_MAX_OPERATIONS
+        if len(operations) > limit:
+            return Response(
+                {'detail': f'At most {limit} operations are accepted per request.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        operations, errors = validate_note_operations(request.user, operations)
+        if errors:
+            return Response(
+                {'detail': 'No operations were applied.', 'errors': errors},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        notes = apply_note_operations(request.user, operations)
+
+        # serialized as one list so the serializer fields are built once
+        written = [note for operation, note in zip(operations, notes) if operation.op != 'delete']
+        data = iter(NoteSerializer(written, many=True, context={'request': request}).data)
+        results = []
+        for operation, note in zip(operations, notes):
+            result = {'index': operation.index, 'op': operation.op, 'id': str(note.pk)}
+            if operation.ref is not None:
+                result['ref'] = operation.ref
+            if operation.op != 'delete':
+                result['note'] = next(data)
+            results.append(result)
+        return Response({'results': results})
 
 
 class NoteRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
@@ -70,6 +305,77 @@ class NoteRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
     def get_queryset(self):
         return Note.objects.select_related('owner', 'notebook').filter(is_deleted=False)
 
+    def perform_update(self, serializer):
+        revised = bool({'title', 'content'} & set(serializer.validated_data))
+        with transaction.atomic():
+            if revised:
+                record_initial_revisions([serializer.instance.pk])
+            note = serializer.save()
+            if revised:
+                record_revisions([note], author=self.request.user)
+
+    def perform_destroy(self, instance):
+        # soft delete, like bulk deletes: sync clients receive a tombstone, and Note.save
+        # keeps the notebook counters and the search index current
+        instance.is_deleted = True
+        instance.save()
+
+
+class NoteRevisionView(APIView):
+    """Base for the revision endpoints: the note's owner only."""
+    permission_classes = [IsAuthenticated]
+
+    def get_note(self, request, pk):
+        try:
+            note = Note.objects.select_related('owner', 'notebook').get(pk=pk, is_deleted=False)
+        except Note.DoesNotExist:
+            raise NotFound('Note not found.')
+        if note.owner_id != request.user.id:
+            raise PermissionDenied('Not permitted.')
+        return note
+
+    def get_revision(self, note, number):
+        try:
+            return note.revisions.get(number=number)
+        except NoteRevision.DoesNotExist:
+            raise NotFound('Revision not found.')
+
+
+class NoteRevisionListView(NoteRevisionView):
+    """A note's retained revisions, newest first (without content)."""
+
+    def get(self, request, pk):
+        note = self.get_note(request, pk)
+        revisions = note.revisions.defer('data').order_by('-number')
+        return Response(NoteRevisionSerializer(revisions, many=True).data)
+
+
+class NoteRevisionDetailView(NoteRevisionView):
+    """One revision with its content, rebuilt from the nearest snapshot."""
+
+    def get(self, request, pk, number):
+        revision = self.get_revision(self.get_note(request, pk), number)
+        data = NoteRevisionSerializer(revision).data
+        data['content'] = revision_content(revision)
+        return Response(data)
+
+
+class NoteRevisionRestoreView(NoteRevisionView):
+    """
+    Make a revision's title and content current again. The restore is saved as a new
+    revision, so history is never rewritten.
+    """
+
+    def post(self, request, pk, number):
+        note = self.get_note(request, pk)
+        revision = self.get_revision(note, number)
+        note.title = revision.title
+        note.content = revision_content(revision)
+        with transaction.atomic():
+            note.save()
+            record_revisions([note], author=request.user)
+        return Response(NoteSerializer(note, context={'request': request}).data)
+
 
 class GeneratePDFFromNoteView(APIView):
     permission_classes = [IsAuthenticated]
@@ -83,20 +389,39 @@ class GeneratePDFFromNoteView(APIView):
         if note.owner_id != request.user.id:
             return Response({'detail': 'Not permitted.'}, status=status.HTTP_403_FORBIDDEN)
 
-        # Generate PDF bytes
-        buffer = generate_pdf_from_text(note.title, note.content)
-        pdf_bytes = buffer.getvalue()
-        file_name = f"{note.title or 'note'}".replace(' ', '_') + ".pdf"
-
-        pdf_instance = PDF(
-            file_name=file_name,
-            title=note.title,
-            description=f"Generated from note {note.id}",
-            linked_note=note,
-            uploaded_by=request.user,
-            is_public=False,
-        )
-        pdf_instance.file.save(file_name, ContentFile(pdf_bytes), save=True)
+        if self.run_async(request):
+            # Queue the rendering so the request returns immediately; poll the job for the PDF
+            job = PDFGenerationJob.objects.create(note=note, owner=request.user)
+            transaction.on_commit(lambda: run_pdf_generation_job.delay(str(job.pk)))
+            data = PDFGenerationJobSerializer(job).data
+            data['status_url'] = request.build_absolute_uri(
+                reverse('pdf-generation-job', kwargs={'pk': job.pk})
+            )
+            return Response(data, status=status.HTTP_202_ACCEPTED)
 
+        # Unchanged notes return the PDF generated earlier instead of rendering again
+        pdf_instance, created = generate_pdf_for_note(note, request.user)
         data = PDFSerializer(pdf_instance, context={'request': request}).data
-        return Response(data, status=status.HTTP_201_CREATED)
+        return Response(data, status=status.HTTP_201_CREATED if created else status.HTTP_200_OK)
+
+    def run_async(self, request):
+        requested = request.query_params.get('async')
+        if requested is not None and requested.lower() not in ('1', 'true', 'yes'):
+            return False
+        if requested is None and not settings.PDF_GENERATION_ASYNC:
+            return False
+        if background_jobs_available():
+            return True
+        logger.error("PDF generation requested in the background but no CELERY_BROKER_URL is set")
+        if requested is None:
+            # PDF_GENERATION_ASYNC without a broker: render in the request as before
+            return False
+        raise ServiceUnavailable('Background jobs are not configured; retry without async.')
+
+
+class PDFGenerationJobView(generics.RetrieveAPIView):
+    serializer_class = PDFGenerationJobSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        return PDFGenerationJob.objects.filter(owner=self.request.user)